@@ -0,0 +1,203 @@
+"""
+Recall@k versus latency benchmark of the IVFIndex against exact search.
+
+Trains an IVFIndex on a sample of synthetic ada-002-like embeddings (see embedding_sampler), adds the
+corpus in blocks while keeping the exact float32 top-k of every query, and then searches with a range
+of n_probe values. For every n_probe it prints as JSON the recall@k against the exact top-k and the
+median and p95 latency of a single-query search. The last entry scans every list, i.e. an exhaustive
+search over the same int8 rows, as the exact-search latency baseline.
+
+The corpus is generated block by block, so a million 1,536-dimensional vectors only need the int8
+index (about 1.5 GB) in memory.
+
+Usage (from cv_analysis/backend):
+
+    python -m benchmarks.ann_recall --count 1000000 --queries 200 --output ann.json
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+
+for _name, _value in {
+    "COGNITIVE_SEARCH_API_KEY": "benchmark",
+    "COGNITIVE_SEARCH_ENDPOINT": "https://benchmark.search.windows.net",
+    "COGNITIVE_SEARCH_INDEX_NAME": "benchmark-cvs",
+    "AZURE_OPENAI_API_KEY": "benchmark",
+    "AZURE_OPENAI_API_BASE": "https://benchmark.openai.azure.com",
+    "ADA_API_VERSION": "2023-05-15",
+    "ADA_MODEL": "text-embedding-ada-002",
+    "ADA_DEPLOYMENT_NAME": "benchmark-ada"
+}.items():
+    os.environ.setdefault(_name, _value)
+
+import numpy as np
+import config
+from benchmarks.synthetic_cvs import embedding_sampler
+from utils.ann_index import IVFIndex
+
+# Corpus rows generated and added to the index at a time
+ADD_BLOCK_ROWS = 20000
+
+
+def merge_top_k(top_indices, top_scores, block_scores, block_start, top_k):
+    """
+    Merges the scores of a block of corpus rows into the running exact top-k of every query.
+
+    Args:
+        top_indices (numpy.ndarray): The (queries, k) best row indices so far.
+        top_scores (numpy.ndarray): Their cosine similarities.
+        block_scores (numpy.ndarray): The (queries, block rows) similarities of the block.
+        block_start (int): The index of the block's first row.
+        top_k (int): The number of rows per query.
+
+    Returns:
+        tuple: The merged (queries, top_k) row indices and similarities, best first.
+    """
+    block_indices = np.broadcast_to(np.arange(block_start, block_start + block_scores.shape[1]), block_scores.shape)
+    indices = np.concatenate([top_indices, block_indices], axis=1)
+    scores = np.concatenate([top_scores, block_scores], axis=1)
+    k = min(top_k, scores.shape[1])
+    best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    best = np.take_along_axis(best, np.argsort(-np.take_along_axis(scores, best, axis=1), axis=1), axis=1)
+    return np.take_along_axis(indices, best, axis=1), np.take_along_axis(scores, best, axis=1)
+
+
+def measure(index, queries, exact_indices, top_k, n_probe):
+    """
+    Searches the index with every query and compares the results to the exact top-k.
+
+    Args:
+        index (IVFIndex): The index.
+        queries (numpy.ndarray): The query matrix.
+        exact_indices (numpy.ndarray): The exact top-k rows per query.
+        top_k (int): The number of CVs per query.
+        n_probe (int): The number of lists to scan.
+
+    Returns:
+        dict: The recall and latency of the setting.
+    """
+    hits = 0
+    latencies = []
+    for query, expected_rows in zip(queries, exact_indices):
+        started = time.perf_counter()
+        results = index.search_similar_cv(query, top_k=top_k, n_probe=n_probe)
+        latencies.append(time.perf_counter() - started)
+        hits += len({int(result["cv_id"]) for result in results} & set(expected_rows.tolist()))
+    return {
+        "n_probe": n_probe,
+        "recall_at_k": round(hits / (len(queries) * top_k), 4),
+        "latency_ms_p50": round(float(np.percentile(latencies, 50)) * 1000, 2),
+        "latency_ms_p95": round(float(np.percentile(latencies, 95)) * 1000, 2)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recall@k versus latency benchmark of the IVFIndex.")
+    parser.add_argument("--count", type=int, default=1000000, help="Number of synthetic CVs (default: %(default)s).")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries (default: %(default)s).")
+    parser.add_argument("--dimension", type=int, default=config.EMBEDDING_DIMENSION,
+                        help="Dimension of the synthetic embeddings (default: %(default)s).")
+    parser.add_argument("--topics", type=int, default=500, help="Number of synthetic topics (default: %(default)s).")
+    parser.add_argument("--lists", type=int, default=config.ANN_INDEX_CONFIG["n_lists"],
+                        help="Number of IVF lists, 0 for about sqrt(count) (default: %(default)s).")
+    parser.add_argument("--probes", default="1,2,4,8,16,32,64",
+                        help="Comma-separated n_probe values to measure (default: %(default)s).")
+    parser.add_argument("--encoding", default=config.ANN_INDEX_CONFIG["encoding"],
+                        help="Row encoding of the index (default: %(default)s).")
+    parser.add_argument("--kmeans-iterations", type=int, default=config.ANN_INDEX_CONFIG["kmeans_iterations"],
+                        help="Number of k-means iterations (default: %(default)s).")
+    parser.add_argument("--top-k", type=int, default=10, help="Number of ranked CVs (default: %(default)s).")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic data (default: %(default)s).")
+    parser.add_argument("--save", action="store_true", help="Also measure saving and loading the index.")
+    parser.add_argument("--directory", help="Save the index in this directory instead of a temporary one.")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+    args = parser.parse_args(argv)
+    config.app_logger.setLevel(logging.WARNING)
+
+    sample = embedding_sampler(args.dimension, args.topics, args.seed)
+    queries = sample(args.queries)
+    n_lists = args.lists or int(round(np.sqrt(args.count)))
+    index = IVFIndex(
+        n_lists=n_lists, encoding=args.encoding, train_size=0,
+        kmeans_iterations=args.kmeans_iterations, dimension=args.dimension
+    )
+
+    started = time.perf_counter()
+    index.train(sample(min(args.count, n_lists * IVFIndex.TRAIN_ROWS_PER_LIST)))
+    train_seconds = time.perf_counter() - started
+    print(f"Trained {n_lists} lists in {train_seconds:.1f}s", file=sys.stderr)
+
+    exact_indices = np.zeros((len(queries), 0), dtype=np.int64)
+    exact_scores = np.zeros((len(queries), 0), dtype=np.float32)
+    add_seconds = 0.0
+    for start in range(0, args.count, ADD_BLOCK_ROWS):
+        block = sample(min(ADD_BLOCK_ROWS, args.count - start))
+        exact_indices, exact_scores = merge_top_k(exact_indices, exact_scores, queries @ block.T, start, args.top_k)
+        started = time.perf_counter()
+        index.add_vectors([str(row) for row in range(start, start + len(block))], block)
+        add_seconds += time.perf_counter() - started
+    print(f"Added {args.count} vectors in {add_seconds:.1f}s", file=sys.stderr)
+
+    probes = sorted({min(int(probe), n_lists) for probe in args.probes.split(",")} | {n_lists})
+    runs = []
+    for n_probe in probes:
+        run = measure(index, queries, exact_indices, args.top_k, n_probe)
+        runs.append(run)
+        print(f"n_probe {n_probe}: recall@{args.top_k} {run['recall_at_k']:.4f}, "
+              f"p50 {run['latency_ms_p50']} ms, p95 {run['latency_ms_p95']} ms", file=sys.stderr)
+
+    persistence = None
+    if args.save:
+        with tempfile.TemporaryDirectory(dir=args.directory) as directory:
+            path = os.path.join(directory, "index.npz")
+            started = time.perf_counter()
+            index.save(path)
+            save_seconds = time.perf_counter() - started
+            file_bytes = os.path.getsize(path)
+            started = time.perf_counter()
+            IVFIndex.load(path)
+            persistence = {
+                "save_seconds": round(save_seconds, 2),
+                "load_seconds": round(time.perf_counter() - started, 2),
+                "file_mb": round(file_bytes / 1e6, 1)
+            }
+
+    report = {
+        "benchmark": "ann_recall",
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            "count": args.count,
+            "queries": args.queries,
+            "dimension": args.dimension,
+            "topics": args.topics,
+            "n_lists": n_lists,
+            "encoding": args.encoding,
+            "kmeans_iterations": args.kmeans_iterations,
+            "top_k": args.top_k,
+            "seed": args.seed
+        },
+        "train_seconds": round(train_seconds, 2),
+        "add_seconds": round(add_seconds, 2),
+        "index": index.stats(),
+        "persistence": persistence,
+        "runs": runs
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Recall, latency and size benchmark of the EmbeddingStore encodings against exact float32 search.
+
+Builds a float32, a float16 and an int8 store from the same embeddings and, for every encoding with
+and without full-precision re-ranking, prints as JSON:
+    - recall@k: the share of the exact float32 top-k CVs that the store returns,
+    - the mean absolute error of the returned cosine similarities,
+    - the median and p95 latency of a single-query search,
+    - the bytes scanned per CV and the projected page cache needed for a million CVs.
+
+By default the embeddings are synthetic: 1,536-dimensional vectors that share a dominant common
+direction and cluster around topics, so that, like ada-002 CV embeddings, most cosine similarities
+fall in a narrow band around 0.8 and quantization error matters (see embedding_sampler). Real
+embeddings can be used with --corpus, which reads the matrix of a local CV corpus file
+(config.CV_CORPUS_CONFIG["local_path"]); a held-out share of its rows then serves as queries.
+
+Usage (from cv_analysis/backend):
+
+    python -m benchmarks.embedding_store_recall --count 100000 --queries 200 --output store.json
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+
+for _name, _value in {
+    "COGNITIVE_SEARCH_API_KEY": "benchmark",
+    "COGNITIVE_SEARCH_ENDPOINT": "https://benchmark.search.windows.net",
+    "COGNITIVE_SEARCH_INDEX_NAME": "benchmark-cvs",
+    "AZURE_OPENAI_API_KEY": "benchmark",
+    "AZURE_OPENAI_API_BASE": "https://benchmark.openai.azure.com",
+    "ADA_API_VERSION": "2023-05-15",
+    "ADA_MODEL": "text-embedding-ada-002",
+    "ADA_DEPLOYMENT_NAME": "benchmark-ada"
+}.items():
+    os.environ.setdefault(_name, _value)
+
+import numpy as np
+import config
+from benchmarks.synthetic_cvs import embedding_sampler
+from utils.embedding_store import EmbeddingStore
+
+# Rows appended to a store at a time
+APPEND_BLOCK_ROWS = 10000
+
+
+def synthetic_embeddings(count, queries, dimension, topics, seed):
+    """
+    Generates ada-002-like CV and job description embeddings (see embedding_sampler).
+
+    Args:
+        count (int): The number of CV embeddings.
+        queries (int): The number of job description embeddings.
+        dimension (int): The embedding dimension.
+        topics (int): The number of topic clusters.
+        seed (int): The seed of the random generator.
+
+    Returns:
+        tuple: The (count, dimension) CV matrix and the (queries, dimension) query matrix, float32.
+    """
+    sample = embedding_sampler(dimension, topics, seed)
+    return sample(count), sample(queries)
+
+
+def corpus_embeddings(path, queries, seed):
+    """
+    Reads the embeddings of a local CV corpus file and holds out some of them as queries.
+
+    Args:
+        path (str): The .npz file saved by LocalSearcher.save.
+        queries (int): The number of held-out query rows.
+        seed (int): The seed of the random generator.
+
+    Returns:
+        tuple: The CV matrix and the query matrix, float32.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        matrix = np.asarray(data["matrix"], dtype=np.float32)
+    held_out = np.zeros(len(matrix), dtype=bool)
+    held_out[np.random.default_rng(seed).choice(len(matrix), min(queries, len(matrix) // 2), replace=False)] = True
+    return np.ascontiguousarray(matrix[~held_out]), np.ascontiguousarray(matrix[held_out])
+
+
+def exact_top_k(vectors, queries, top_k):
+    """
+    Computes the exact float32 top-k rows of every query.
+
+    Args:
+        vectors (numpy.ndarray): The unit-length CV matrix.
+        queries (numpy.ndarray): The unit-length query matrix.
+        top_k (int): The number of rows per query.
+
+    Returns:
+        tuple: The (queries, top_k) row indices and their cosine similarities, best first.
+    """
+    similarities = queries @ vectors.T
+    top_indices = np.argpartition(-similarities, top_k - 1, axis=1)[:, :top_k]
+    top_scores = np.take_along_axis(similarities, top_indices, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    return np.take_along_axis(top_indices, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+def build_store(path, encoding, vectors):
+    """
+    Appends the CV matrix to a new store in blocks.
+
+    Args:
+        path (str): The directory of the store.
+        encoding (str): The store encoding.
+        vectors (numpy.ndarray): The CV matrix.
+
+    Returns:
+        tuple: The store and the seconds the appends took.
+    """
+    started = time.perf_counter()
+    store = EmbeddingStore(path, encoding=encoding, keep_full_precision=True, dimension=vectors.shape[1])
+    for start in range(0, len(vectors), APPEND_BLOCK_ROWS):
+        block = vectors[start:start + APPEND_BLOCK_ROWS]
+        store.add_vectors([str(row) for row in range(start, start + len(block))], block)
+    return store, time.perf_counter() - started
+
+
+def measure(store, queries, exact_indices, exact_scores, top_k, rerank_oversample):
+    """
+    Searches the store with every query and compares the results to the exact top-k.
+
+    Args:
+        store (EmbeddingStore): The store.
+        queries (numpy.ndarray): The query matrix.
+        exact_indices (numpy.ndarray): The exact top-k rows per query.
+        exact_scores (numpy.ndarray): The exact cosine similarities of those rows.
+        top_k (int): The number of CVs per query.
+        rerank_oversample (int): The re-ranking oversampling factor, 0 to disable it.
+
+    Returns:
+        dict: The recall, score error and latency of the configuration.
+    """
+    hits = 0
+    score_errors = []
+    latencies = []
+    for query, expected_rows, expected_scores in zip(queries, exact_indices, exact_scores):
+        started = time.perf_counter()
+        results = store.search_similar_cv(query, top_k=top_k, rerank_oversample=rerank_oversample)
+        latencies.append(time.perf_counter() - started)
+
+        returned_rows = [int(result["cv_id"]) for result in results]
+        hits += len(set(returned_rows) & set(expected_rows.tolist()))
+        # The store reports 1 / (2 - cosine), convert back to compare with the exact cosine
+        returned_scores = np.asarray([2 - 1 / result["similarity_score"] for result in results])
+        score_errors.append(np.abs(returned_scores - expected_scores[:len(returned_scores)]).mean())
+
+    return {
+        "rerank_oversample": rerank_oversample,
+        "recall_at_k": round(hits / (len(queries) * top_k), 4),
+        "mean_abs_score_error": float(f"{np.mean(score_errors):.2e}"),
+        "latency_ms_p50": round(float(np.percentile(latencies, 50)) * 1000, 2),
+        "latency_ms_p95": round(float(np.percentile(latencies, 95)) * 1000, 2)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recall and latency benchmark of the EmbeddingStore encodings.")
+    parser.add_argument("--count", type=int, default=100000, help="Number of synthetic CVs (default: %(default)s).")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries (default: %(default)s).")
+    parser.add_argument("--dimension", type=int, default=config.EMBEDDING_DIMENSION,
+                        help="Dimension of the synthetic embeddings (default: %(default)s).")
+    parser.add_argument("--topics", type=int, default=500, help="Number of synthetic topics (default: %(default)s).")
+    parser.add_argument("--corpus", help="Use the embeddings of this local CV corpus .npz file instead.")
+    parser.add_argument("--top-k", type=int, default=10, help="Number of ranked CVs (default: %(default)s).")
+    parser.add_argument("--rerank-oversample", type=int, default=config.EMBEDDING_STORE_CONFIG["rerank_oversample"],
+                        help="Oversampling factor of the re-ranked runs (default: %(default)s).")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic data (default: %(default)s).")
+    parser.add_argument("--directory", help="Build the stores in this directory instead of a temporary one.")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+    args = parser.parse_args(argv)
+    config.app_logger.setLevel(logging.WARNING)
+
+    if args.corpus:
+        vectors, queries = corpus_embeddings(args.corpus, args.queries, args.seed)
+    else:
+        vectors, queries = synthetic_embeddings(args.count, args.queries, args.dimension, args.topics, args.seed)
+    exact_indices, exact_scores = exact_top_k(vectors, queries, args.top_k)
+
+    with tempfile.TemporaryDirectory(dir=args.directory) as directory:
+        encodings = []
+        for encoding in ("float32", "float16", "int8"):
+            store, build_seconds = build_store(os.path.join(directory, f"{encoding}.store"), encoding, vectors)
+            sizes = store.nbytes()
+            scanned_bytes_per_cv = sizes["scanned_bytes"] / len(vectors)
+            runs = [measure(store, queries, exact_indices, exact_scores, args.top_k, 0)]
+            if encoding != "float32" and args.rerank_oversample:
+                runs.append(measure(store, queries, exact_indices, exact_scores, args.top_k, args.rerank_oversample))
+            encodings.append({
+                "encoding": encoding,
+                "build_seconds": round(build_seconds, 2),
+                "scanned_bytes_per_cv": round(scanned_bytes_per_cv, 1),
+                "full_precision_bytes_per_cv": round(sizes["full_precision_bytes"] / len(vectors), 1),
+                "page_cache_gb_per_million_cvs": round(scanned_bytes_per_cv * 1e6 / 1e9, 2),
+                "runs": runs
+            })
+            print(f"{encoding}: recall@{args.top_k} "
+                  + ", ".join(f"{run['recall_at_k']:.4f} (rerank {run['rerank_oversample']})" for run in runs),
+                  file=sys.stderr)
+
+    report = {
+        "benchmark": "embedding_store_recall",
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            "data": args.corpus or "synthetic",
+            "count": len(vectors),
+            "queries": len(queries),
+            "dimension": vectors.shape[1],
+            "topics": None if args.corpus else args.topics,
+            "top_k": args.top_k,
+            "seed": args.seed
+        },
+        "encodings": encodings
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
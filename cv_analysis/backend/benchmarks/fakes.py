@@ -0,0 +1,270 @@
+import hashlib
+import json
+import re
+import threading
+import time
+import numpy as np
+import openai
+import config
+
+
+class FakeOpenAI:
+    """
+    In-process replacement for the Azure OpenAI chat and embedding endpoints.
+
+    Every call sleeps for a configurable latency and returns a deterministic response: chat calls
+    echo the user input (wrapped in the JSON format of the combined CV extraction when asked for JSON),
+    and embeddings are pseudo-random unit vectors derived from a hash of the input text.
+    """
+
+    def __init__(self, chat_latency_seconds, embedding_latency_seconds):
+        """
+        Initializes the FakeOpenAI.
+
+        Args:
+            chat_latency_seconds (float): The simulated duration of a chat completion.
+            embedding_latency_seconds (float): The simulated duration of an embedding request.
+        """
+        self.chat_latency_seconds = chat_latency_seconds
+        self.embedding_latency_seconds = embedding_latency_seconds
+        self.chat_calls = 0
+        self.embedding_calls = 0
+        self._lock = threading.Lock()
+
+    def install(self):
+        """
+        Replaces the openai API functions used by the backend with the fakes.
+        """
+        openai.ChatCompletion.create = self.create_chat_completion
+        openai.Embedding.create = self.create_embedding
+
+    def create_chat_completion(self, engine=None, messages=None, max_tokens=None, **kwargs):
+        """
+        Simulates openai.ChatCompletion.create.
+
+        Returns:
+            dict: A response in the format of the ChatCompletion API.
+        """
+        with self._lock:
+            self.chat_calls += 1
+        time.sleep(self.chat_latency_seconds)
+        system_message, user_message = messages[0]["content"], messages[-1]["content"]
+        if "JSON" in system_message:
+            content = json.dumps({
+                "cleaned_text": user_message,
+                "contact_info": {"email": None, "phone": None, "address": None}
+            })
+        else:
+            content = user_message
+        prompt_tokens = sum(len(message["content"]) // 4 for message in messages)
+        completion_tokens = len(content) // 4
+        return {
+            "choices": [{"message": {"role": "assistant", "content": content}}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    def create_embedding(self, input=None, engine=None, **kwargs):
+        """
+        Simulates openai.Embedding.create.
+
+        Returns:
+            dict: A response in the format of the Embedding API.
+        """
+        with self._lock:
+            self.embedding_calls += 1
+        time.sleep(self.embedding_latency_seconds)
+        texts = input if isinstance(input, list) else [input]
+        tokens = sum(len(text) // 4 for text in texts)
+        return {
+            "data": [{"index": index, "embedding": self.embed(text)} for index, text in enumerate(texts)],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+        }
+
+    @staticmethod
+    def embed(text):
+        """
+        Returns the deterministic fake embedding of a text.
+
+        Args:
+            text (str): The input text.
+
+        Returns:
+            list: A unit vector of config.EMBEDDING_DIMENSION floats.
+        """
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(config.EMBEDDING_DIMENSION).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+
+class FakeSearchService:
+    """
+    In-process replacement for an Azure Cognitive Search service.
+
+    It keeps the documents of each index in memory and supports the operations used by Indexer and
+    AISearcher: index management, document upload and deletion, and searches with "eq", "and" and
+    search.in filters and exhaustive vector queries. Every call sleeps for a configurable latency.
+    """
+
+    def __init__(self, latency_seconds):
+        """
+        Initializes the FakeSearchService.
+
+        Args:
+            latency_seconds (float): The simulated duration of a request.
+        """
+        self.latency_seconds = latency_seconds
+        self.indexes = {}
+        self.documents = {}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def install(self):
+        """
+        Makes the shared search clients of utils.clients use this service.
+        """
+        import utils.clients
+
+        service = self
+
+        class FakeSearchIndexClient:
+            def __init__(self, *args, **kwargs):
+                pass
+
+            def __getattr__(self, name):
+                return getattr(service, name)
+
+        class FakeSearchClient:
+            def __init__(self, endpoint=None, index_name=None, credential=None, **kwargs):
+                self.index_name = index_name
+
+            def close(self):
+                pass
+
+            def get_document_count(self):
+                service._request()
+                return len(service.documents.get(self.index_name, {}))
+
+            def upload_documents(self, documents):
+                service.upload_documents(self.index_name, documents)
+
+            def delete_documents(self, documents):
+                service.delete_documents(self.index_name, documents)
+
+            def search(self, **kwargs):
+                return service.search(self.index_name, **kwargs)
+
+        utils.clients.close_clients()
+        utils.clients.SearchIndexClient = FakeSearchIndexClient
+        utils.clients.SearchClient = FakeSearchClient
+
+    def _request(self):
+        """
+        Counts and delays a simulated request.
+        """
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency_seconds)
+
+    # SearchIndexClient operations
+
+    def close(self):
+        pass
+
+    def list_index_names(self):
+        self._request()
+        return list(self.indexes)
+
+    def create_index(self, index):
+        self._request()
+        with self._lock:
+            self.indexes[index.name] = index
+            self.documents.setdefault(index.name, {})
+
+    def get_index(self, name):
+        self._request()
+        return self.indexes[name]
+
+    def create_or_update_index(self, index):
+        self._request()
+        with self._lock:
+            self.indexes[index.name] = index
+
+    def delete_index(self, name):
+        self._request()
+        with self._lock:
+            self.indexes.pop(name, None)
+            self.documents.pop(name, None)
+
+    # SearchClient operations
+
+    def upload_documents(self, index_name, documents):
+        self._request()
+        with self._lock:
+            index_documents = self.documents.setdefault(index_name, {})
+            for document in documents:
+                index_documents[document["id"]] = dict(
+                    document, cv_vector=np.asarray(document["cv_vector"], dtype=np.float32)
+                )
+
+    def delete_documents(self, index_name, documents):
+        self._request()
+        with self._lock:
+            index_documents = self.documents.get(index_name, {})
+            for document in documents:
+                index_documents.pop(document["id"], None)
+
+    def search(self, index_name, search_text=None, filter=None, vector_queries=None, select=None, top=None, **kwargs):
+        self._request()
+        with self._lock:
+            documents = [
+                document for document in self.documents.get(index_name, {}).values()
+                if self._matches(document, filter)
+            ]
+        if vector_queries and documents:
+            query = np.asarray(vector_queries[0].vector, dtype=np.float32)
+            query /= np.linalg.norm(query) or 1.0
+            vectors = np.stack([document["cv_vector"] for document in documents])
+            similarities = vectors @ query / np.maximum(np.linalg.norm(vectors, axis=1), 1e-12)
+            order = np.argsort(-similarities)[:vector_queries[0].k_nearest_neighbors]
+            # Azure Cognitive Search reports cosine similarity as 1 / (2 - cosine)
+            documents = [dict(documents[i], **{"@search.score": float(1 / (2 - similarities[i]))}) for i in order]
+        if top:
+            documents = documents[:top]
+        if select:
+            documents = [
+                {key: value for key, value in document.items() if key in select or key.startswith("@")}
+                for document in documents
+            ]
+        return documents
+
+    @staticmethod
+    def _matches(document, odata_filter):
+        """
+        Evaluates the subset of OData filters generated by Indexer and AISearcher.
+
+        Args:
+            document (dict): The indexed document.
+            odata_filter (str or None): The filter expression.
+
+        Returns:
+            bool: True if the document matches the filter.
+        """
+        if not odata_filter:
+            return True
+        for condition in odata_filter.split(" and "):
+            match = re.fullmatch(r"(\w+) eq '(.*)'", condition.strip())
+            if match:
+                if document.get(match[1]) != match[2].replace("''", "'"):
+                    return False
+                continue
+            match = re.fullmatch(r"search\.in\((\w+), '(.*)', '(.)'\)", condition.strip())
+            if match:
+                if document.get(match[1]) not in match[2].replace("''", "'").split(match[3]):
+                    return False
+                continue
+            raise ValueError(f"Unsupported filter: {condition}")
+        return True
@@ -0,0 +1,365 @@
+"""
+Offline per-stage benchmark of the CV matching pipeline.
+
+Runs the real PDFProcessor, CVEmbedder, JobPostingEmbedder, Indexer and AISearcher code paths of
+/find-best-cv on synthetic CV PDFs, with in-process fakes for Azure OpenAI and Azure Cognitive Search
+that answer after a configurable latency, and prints per-stage wall time, throughput and peak memory
+(RSS of the API process; the PDF worker processes are not included) as JSON so runs of different
+commits can be compared.
+
+Usage (from cv_analysis/backend):
+
+    python -m benchmarks.run_pipeline --sizes 10,100,1000,10000 --output benchmark.json
+
+No network access is needed. Credentials default to dummy values, and the embedding cache, result
+cache and client-side OpenAI quota are disabled unless they are set in the environment. tiktoken
+loads its encodings from TIKTOKEN_CACHE_DIR when it cannot be downloaded, so point it to a directory
+populated once on a connected machine.
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+for _name, _value in {
+    "COGNITIVE_SEARCH_API_KEY": "benchmark",
+    "COGNITIVE_SEARCH_ENDPOINT": "https://benchmark.search.windows.net",
+    "COGNITIVE_SEARCH_INDEX_NAME": "benchmark-cvs",
+    "AZURE_OPENAI_API_KEY": "benchmark",
+    "AZURE_OPENAI_API_BASE": "https://benchmark.openai.azure.com",
+    "ADA_API_VERSION": "2023-05-15",
+    "ADA_MODEL": "text-embedding-ada-002",
+    "ADA_DEPLOYMENT_NAME": "benchmark-ada",
+    "SEARCH_BACKEND": "azure",
+    "EMBEDDING_CACHE_ENABLED": "false",
+    "RESULT_CACHE_ENABLED": "false",
+    "EMBEDDING_REQUESTS_PER_MINUTE": "0",
+    "EMBEDDING_TOKENS_PER_MINUTE": "0",
+    "CHAT_REQUESTS_PER_MINUTE": "0",
+    "CHAT_TOKENS_PER_MINUTE": "0"
+}.items():
+    os.environ.setdefault(_name, _value)
+
+import config
+from benchmarks.fakes import FakeOpenAI, FakeSearchService
+from benchmarks.synthetic_cvs import generate_job_description, generate_uploads
+from src.embedder.cv_embedder import CVEmbedder
+from src.embedder.job_posting_embedder import JobPostingEmbedder
+from src.processors.pdf_processor import PDFProcessor
+from utils.indexer import Indexer
+from utils.search import AISearcher
+
+
+def _current_rss_bytes():
+    """
+    Returns the resident set size of this process.
+
+    Returns:
+        int: The current RSS in bytes, or the peak RSS where /proc is not available.
+    """
+    try:
+        with open("/proc/self/statm") as statm_file:
+            return int(statm_file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class StageRecorder:
+    """
+    Measures the exclusive wall time and peak memory of nested pipeline stages.
+
+    Stages form a stack: while a nested stage runs, its parent is paused, so the time of every
+    stage excludes the stages it contains. A background thread samples the process RSS and charges
+    the peak to the stage on top of the stack.
+    """
+
+    SAMPLE_INTERVAL_SECONDS = 0.01
+
+    def __init__(self):
+        """
+        Initializes the StageRecorder and starts the memory sampler.
+        """
+        self.stages = {}
+        self._stack = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name="benchmark-memory-sampler", daemon=True)
+        self._sampler.start()
+
+    def stage(self, name, items=0):
+        """
+        Returns a context manager that records a stage.
+
+        Args:
+            name (str): The name of the stage. Repeated stages with the same name are added up.
+            items (int, optional): The number of items the stage processes, used for throughput.
+
+        Returns:
+            contextmanager: The stage context.
+        """
+        recorder = self
+
+        class _Stage:
+            def __enter__(self):
+                recorder._push(name, items)
+                return self
+
+            def __exit__(self, *exc_info):
+                recorder._pop()
+
+        return _Stage()
+
+    def wrap(self, name, function, items=None):
+        """
+        Wraps a function so that every call is recorded as a stage.
+
+        Args:
+            name (str): The name of the stage.
+            function (callable): The function to wrap.
+            items (callable, optional): Returns the number of processed items from the call's result.
+
+        Returns:
+            callable: The wrapped function.
+        """
+        def wrapped(*args, **kwargs):
+            with self.stage(name):
+                result = function(*args, **kwargs)
+            if items:
+                self.add_items(name, items(result))
+            return result
+
+        return wrapped
+
+    def add_items(self, name, items):
+        """
+        Adds processed items to a stage.
+
+        Args:
+            name (str): The name of the stage.
+            items (int): The number of items.
+        """
+        with self._lock:
+            self.stages.setdefault(name, self._new_stage())["items"] += items
+
+    def stop(self):
+        """
+        Stops the memory sampler.
+        """
+        self._stopped.set()
+        self._sampler.join()
+
+    def report(self):
+        """
+        Returns the recorded stages.
+
+        Returns:
+            dict: The wall time in seconds, item count, throughput in items per second and peak RSS
+                  in megabytes of every stage, in the order the stages started.
+        """
+        with self._lock:
+            return {
+                name: {
+                    "wall_seconds": round(stage["wall_seconds"], 4),
+                    "items": stage["items"],
+                    "throughput_per_second": round(stage["items"] / stage["wall_seconds"], 2)
+                    if stage["wall_seconds"] and stage["items"] else None,
+                    "peak_rss_mb": round(stage["peak_rss_bytes"] / 2 ** 20, 1)
+                }
+                for name, stage in self.stages.items()
+            }
+
+    @staticmethod
+    def _new_stage():
+        return {"wall_seconds": 0.0, "items": 0, "peak_rss_bytes": 0}
+
+    def _push(self, name, items):
+        now = time.perf_counter()
+        with self._lock:
+            if self._stack:
+                parent_name, parent_started = self._stack[-1]
+                self.stages[parent_name]["wall_seconds"] += now - parent_started
+            stage = self.stages.setdefault(name, self._new_stage())
+            stage["items"] += items
+            stage["peak_rss_bytes"] = max(stage["peak_rss_bytes"], _current_rss_bytes())
+            self._stack.append((name, now))
+
+    def _pop(self):
+        now = time.perf_counter()
+        with self._lock:
+            name, started = self._stack.pop()
+            stage = self.stages[name]
+            stage["wall_seconds"] += now - started
+            stage["peak_rss_bytes"] = max(stage["peak_rss_bytes"], _current_rss_bytes())
+            if self._stack:
+                # Resume the parent stage
+                self._stack[-1] = (self._stack[-1][0], now)
+
+    def _sample(self):
+        while not self._stopped.wait(self.SAMPLE_INTERVAL_SECONDS):
+            rss = _current_rss_bytes()
+            with self._lock:
+                if self._stack:
+                    stage = self.stages[self._stack[-1][0]]
+                    stage["peak_rss_bytes"] = max(stage["peak_rss_bytes"], rss)
+
+
+def run_pipeline(cv_count, fake_openai, fake_search, seed, top_k):
+    """
+    Runs the /find-best-cv pipeline once on synthetic CVs and records its stages.
+
+    The stages run one after the other, unlike the endpoint, which embeds the job description while
+    the CVs are processed, so each stage is measured on its own:
+        pdf_parsing, cv_cleaning (the OpenAI cleaning and contact extraction calls), cv_embedding,
+        job_embedding, indexing, search and cleanup.
+
+    Args:
+        cv_count (int): The number of synthetic CVs.
+        fake_openai (FakeOpenAI): The installed OpenAI fake.
+        fake_search (FakeSearchService): The installed search fake.
+        seed (int): The seed of the synthetic data.
+        top_k (int): The number of CVs to rank.
+
+    Returns:
+        dict: The measurements of the run.
+    """
+    generation_started = time.perf_counter()
+    uploads = generate_uploads(cv_count, seed)
+    job_description = generate_job_description(seed)
+    generation_seconds = time.perf_counter() - generation_started
+
+    calls_before = (fake_openai.chat_calls, fake_openai.embedding_calls, fake_search.calls)
+    recorder = StageRecorder()
+    extract_texts_from_all_pdfs = PDFProcessor.extract_texts_from_all_pdfs
+    PDFProcessor.extract_texts_from_all_pdfs = recorder.wrap(
+        "pdf_parsing", extract_texts_from_all_pdfs, items=len
+    )
+    try:
+        started = time.perf_counter()
+        cv_embedder = CVEmbedder(uploads)
+        cv_embedder.embedder.embed_texts = recorder.wrap(
+            "cv_embedding", cv_embedder.embedder.embed_texts, items=len
+        )
+        with recorder.stage("cv_cleaning"):
+            cv_embeddings = cv_embedder.embed_all_cvs()
+        recorder.add_items("cv_cleaning", recorder.stages["pdf_parsing"]["items"])
+
+        with recorder.stage("job_embedding", items=1):
+            job_embedding = JobPostingEmbedder(job_description).get_job_embedding()
+
+        indexer = Indexer(cv_embeddings, batch_id=uuid.uuid4().hex)
+        with recorder.stage("indexing", items=len(cv_embeddings)):
+            indexer.ingest_embeddings()
+        with recorder.stage("search", items=1):
+            similar_cvs = AISearcher().search_similar_cv(job_embedding, top_k=top_k, batch_id=indexer.batch_id)
+        with recorder.stage("cleanup", items=len(indexer.uploaded_document_ids)):
+            indexer.delete_batch()
+        total_seconds = time.perf_counter() - started
+    finally:
+        PDFProcessor.extract_texts_from_all_pdfs = extract_texts_from_all_pdfs
+        recorder.stop()
+
+    stages = recorder.report()
+    return {
+        "cv_count": cv_count,
+        "embedded_cvs": len(cv_embeddings),
+        "ranked_cvs": len(similar_cvs),
+        "generation_seconds": round(generation_seconds, 4),
+        "total_seconds": round(total_seconds, 4),
+        "throughput_cvs_per_second": round(cv_count / total_seconds, 2) if total_seconds else None,
+        "peak_rss_mb": max((stage["peak_rss_mb"] for stage in stages.values()), default=None),
+        "stages": stages,
+        "calls": {
+            "chat_completions": fake_openai.chat_calls - calls_before[0],
+            "embedding_requests": fake_openai.embedding_calls - calls_before[1],
+            "search_requests": fake_search.calls - calls_before[2]
+        }
+    }
+
+
+def _git_commit():
+    """
+    Returns the commit of the working tree, if it is a git checkout.
+
+    Returns:
+        str or None: The commit hash.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline per-stage benchmark of the CV matching pipeline.")
+    parser.add_argument("--sizes", default="10,100,1000,10000",
+                        help="Comma-separated numbers of synthetic CVs, one run each (default: %(default)s).")
+    parser.add_argument("--chat-latency", type=float, default=0.5,
+                        help="Simulated seconds per chat completion (default: %(default)s).")
+    parser.add_argument("--embedding-latency", type=float, default=0.1,
+                        help="Simulated seconds per embedding request (default: %(default)s).")
+    parser.add_argument("--search-latency", type=float, default=0.05,
+                        help="Simulated seconds per search request (default: %(default)s).")
+    parser.add_argument("--top-k", type=int, default=10, help="Number of ranked CVs (default: %(default)s).")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic data (default: %(default)s).")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+    parser.add_argument("--verbose", action="store_true", help="Keep the backend's INFO logs.")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        config.app_logger.setLevel(logging.WARNING)
+
+    fake_openai = FakeOpenAI(args.chat_latency, args.embedding_latency)
+    fake_openai.install()
+    fake_search = FakeSearchService(args.search_latency)
+    fake_search.install()
+    # Like the server's startup warm-up, the index is created before the measured runs
+    Indexer({}).create_index()
+
+    runs = []
+    for cv_count in (int(size) for size in args.sizes.split(",")):
+        run = run_pipeline(cv_count, fake_openai, fake_search, args.seed, args.top_k)
+        runs.append(run)
+        print(f"{cv_count} CVs: {run['total_seconds']:.2f}s", file=sys.stderr)
+
+    report = {
+        "benchmark": "cv_pipeline",
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            "chat_latency_seconds": args.chat_latency,
+            "embedding_latency_seconds": args.embedding_latency,
+            "search_latency_seconds": args.search_latency,
+            "top_k": args.top_k,
+            "seed": args.seed,
+            "concurrency_limit": config.CONCURRENCY_LIMIT,
+            "pdf_max_workers": config.PDF_PROCESSING_CONFIG["max_workers"],
+            "cv_extraction_mode": config.CV_EXTRACTION_MODE,
+            "chunk_pooling": config.CV_CHUNKING_CONFIG["pooling"],
+            "embedding_batch_max_inputs": config.EMBEDDING_BATCH_CONFIG["max_inputs"]
+        },
+        "runs": runs
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import random
+import numpy as np
+
+FIRST_NAMES = [
+    "Ahmet", "Ayşe", "Mehmet", "Elif", "Mustafa", "Zeynep", "Emre", "Selin", "Burak", "Deniz",
+    "Can", "Ece", "Oğuz", "İrem", "Kerem", "Şule", "John", "Maria", "David", "Anna"
+]
+LAST_NAMES = [
+    "Yılmaz", "Kaya", "Demir", "Şahin", "Çelik", "Yıldız", "Öztürk", "Aydın", "Arslan", "Doğan",
+    "Koç", "Kurt", "Smith", "Garcia", "Müller", "Rossi"
+]
+CITIES = ["İstanbul", "Ankara", "İzmir", "Bursa", "Antalya", "Eskişehir", "Berlin", "London"]
+SKILLS = [
+    "Python", "Java", "C#", ".NET", "JavaScript", "TypeScript", "React", "Angular", "SQL", "PostgreSQL",
+    "Docker", "Kubernetes", "Azure", "AWS", "FastAPI", "Django", "Spring Boot", "Machine Learning",
+    "Data Analysis", "Pandas", "Power BI", "Project Management", "Scrum", "Git", "Linux", "Go"
+]
+TITLES = [
+    "Software Engineer", "Backend Developer", "Data Scientist", "Frontend Developer", "DevOps Engineer",
+    "Business Analyst", "Project Manager", "QA Engineer", "Data Engineer", "Full Stack Developer"
+]
+COMPANIES = ["LC Waikiki", "Trendyol", "Getir", "Turkcell", "Arçelik", "Garanti BBVA", "Hepsiburada", "Siemens"]
+SENTENCES = [
+    "Designed and maintained services handling {n} requests per day using {skill}.",
+    "Led a team of {n} engineers delivering {skill} based solutions for retail operations.",
+    "Reduced processing time by {n} percent by optimizing {skill} workloads.",
+    "Built reporting pipelines with {skill} used by {n} stakeholders across the company.",
+    "Migrated legacy systems to {skill}, improving reliability and deployment frequency.",
+    "Collaborated with product owners to define requirements and deliver {skill} features on time."
+]
+
+# Helvetica in the PDF below is WinAnsi encoded, which has no glyphs for these Turkish letters
+_PDF_TRANSLATION = str.maketrans("ğĞıİşŞ", "gGiISS", "\u0307")
+LINES_PER_PAGE = 50
+
+
+def generate_cv_text(index, seed=0):
+    """
+    Generates the text of a synthetic CV.
+
+    CVs differ in length (two to six positions) and content, and are reproducible for the same
+    index and seed.
+
+    Args:
+        index (int): The number of the CV.
+        seed (int, optional): The seed of the random generator. Defaults to 0.
+
+    Returns:
+        str: The CV text, one line per "\\n".
+    """
+    rng = random.Random(seed * 1_000_003 + index)
+    first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    skills = rng.sample(SKILLS, rng.randint(4, 10))
+    lines = [
+        f"{first_name} {last_name}",
+        rng.choice(TITLES),
+        f"Email: {first_name.lower()}.{last_name.lower()}{index}@example.com",
+        f"Phone: +90 5{rng.randint(30, 59)} {rng.randint(100, 999)} {rng.randint(10, 99)} {rng.randint(10, 99)}",
+        f"Address: {rng.choice(CITIES)}, Turkey",
+        "",
+        "SKILLS",
+        ", ".join(skills),
+        "",
+        "EXPERIENCE"
+    ]
+    for _ in range(rng.randint(2, 6)):
+        lines.append(f"{rng.choice(TITLES)} at {rng.choice(COMPANIES)} ({rng.randint(2008, 2020)} - {rng.randint(2021, 2025)})")
+        for _ in range(rng.randint(2, 5)):
+            lines.append(rng.choice(SENTENCES).format(n=rng.randint(2, 90), skill=rng.choice(skills)))
+        lines.append("")
+    lines += ["EDUCATION", f"B.Sc. Computer Engineering, {rng.choice(CITIES)} University"]
+    return "\n".join(lines)
+
+
+def generate_job_description(seed=0):
+    """
+    Generates a synthetic job description.
+
+    Args:
+        seed (int, optional): The seed of the random generator. Defaults to 0.
+
+    Returns:
+        str: The job description.
+    """
+    rng = random.Random(seed)
+    skills = rng.sample(SKILLS, 5)
+    return (
+        f"We are looking for a {rng.choice(TITLES)} with experience in {', '.join(skills)}. "
+        f"The candidate will design, build and operate services for our e-commerce platform in {rng.choice(CITIES)}."
+    )
+
+
+def embedding_sampler(dimension, topics=500, seed=0):
+    """
+    Returns a generator of unit-length embeddings that resemble ada-002 CV embeddings.
+
+    The vectors share a dominant common direction and cluster around topics, so that, like real CV
+    embeddings, most cosine similarities fall in a narrow band around 0.8.
+
+    Args:
+        dimension (int): The embedding dimension.
+        topics (int, optional): The number of topic clusters. Defaults to 500.
+        seed (int, optional): The seed of the random generator. Defaults to 0.
+
+    Returns:
+        callable: Takes a number of rows and returns a new (rows, dimension) float32 matrix.
+    """
+    rng = np.random.default_rng(seed)
+    scale = 1 / np.sqrt(dimension)
+    common = rng.standard_normal(dimension).astype(np.float32)
+    common /= np.linalg.norm(common)
+    centers = rng.standard_normal((topics, dimension)).astype(np.float32) * scale
+
+    def sample(rows):
+        vectors = (
+            0.8 * common
+            + 0.5 * centers[rng.integers(0, topics, rows)]
+            + 0.35 * rng.standard_normal((rows, dimension)).astype(np.float32) * scale
+        )
+        return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+    return sample
+
+
+def make_pdf(text):
+    """
+    Renders text as a minimal PDF document with one Helvetica text line per input line.
+
+    The document is written by hand so that no PDF library is needed to generate benchmark data.
+
+    Args:
+        text (str): The text of the document.
+
+    Returns:
+        bytes: The PDF file content.
+    """
+    lines = text.translate(_PDF_TRANSLATION).split("\n")
+    pages = [lines[start:start + LINES_PER_PAGE] for start in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+    font_object = len(pages) * 2 + 3
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            " ".join(f"{3 + page * 2} 0 R" for page in range(len(pages))), len(pages)
+        )
+    ]
+    for page, page_lines in enumerate(pages):
+        escaped_lines = (
+            line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in page_lines
+        )
+        content = "BT /F1 10 Tf 50 800 Td 14 TL " + " ".join(f"({line}) '" for line in escaped_lines) + " ET"
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents %d 0 R "
+            "/Resources << /Font << /F1 %d 0 R >> >> >>" % (4 + page * 2, font_object)
+        )
+        objects.append("<< /Length %d >>\nstream\n%s\nendstream" % (len(content.encode("latin-1")), content))
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref_offset = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    pdf += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("latin-1")
+    return pdf
+
+
+def generate_uploads(count, seed=0):
+    """
+    Generates synthetic CV uploads in the format accepted by PDFProcessor and CVEmbedder.
+
+    Args:
+        count (int): The number of CVs.
+        seed (int, optional): The seed of the random generator. Defaults to 0.
+
+    Returns:
+        dict: A dictionary mapping a unique upload id to a (filename, PDF bytes) tuple.
+    """
+    return {
+        f"upload-{index:06d}": (f"cv_{index:06d}.pdf", make_pdf(generate_cv_text(index, seed)))
+        for index in range(count)
+    }
@@ -31,6 +31,130 @@ ADA_CONFIG = {
     'deployment_name': os.environ['ADA_DEPLOYMENT_NAME']
 }
 
+# Search backend used to rank CVs: "azure" (Azure Cognitive Search) or "local" (in-process NumPy engine)
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'azure')
+
+# Persistent embedding cache (SQLite), keyed by normalized text and embedding model
+EMBEDDING_CACHE_CONFIG = {
+    'enabled': os.getenv('EMBEDDING_CACHE_ENABLED', 'true').lower() == 'true',
+    'path': os.getenv('EMBEDDING_CACHE_PATH', 'embedding_cache.sqlite3'),
+    'max_entries': int(os.getenv('EMBEDDING_CACHE_MAX_ENTRIES', '100000'))
+}
+
+# Limits used to pack several texts into one embedding request
+EMBEDDING_BATCH_CONFIG = {
+    'max_inputs': int(os.getenv('EMBEDDING_BATCH_MAX_INPUTS', '16')),
+    'max_tokens_per_request': int(os.getenv('EMBEDDING_BATCH_MAX_TOKENS', '100000'))
+}
+
+# PDF text extraction worker pool, per-file timeout and per-worker memory guard
+PDF_PROCESSING_CONFIG = {
+    'max_workers': int(os.getenv('PDF_MAX_WORKERS', str(os.cpu_count() or 1))),
+    'timeout_seconds': float(os.getenv('PDF_TIMEOUT_SECONDS', '30')),
+    'max_memory_mb': int(os.getenv('PDF_MAX_MEMORY_MB', '512'))
+}
+
+# CV extraction mode: "combined" (one JSON completion for cleaned text and contact fields)
+# or "two_call" (separate cleaning and contact extraction completions, kept for comparison)
+CV_EXTRACTION_MODE = os.getenv('CV_EXTRACTION_MODE', 'combined')
+
+# Minimum confidence (0-1) of the regex contact extractor before falling back to OpenAI
+CONTACT_EXTRACTION_CONFIDENCE_THRESHOLD = float(os.getenv('CONTACT_EXTRACTION_CONFIDENCE_THRESHOLD', '0.8'))
+
+# Exact and near-duplicate CV detection on the raw PDF text, before the OpenAI stages: uploads whose
+# word shingles reach the Jaccard similarity threshold with an earlier upload of the batch are merged
+DUPLICATE_DETECTION_CONFIG = {
+    'enabled': os.getenv('DUPLICATE_DETECTION_ENABLED', 'true').lower() == 'true',
+    'similarity_threshold': float(os.getenv('DUPLICATE_SIMILARITY_THRESHOLD', '0.9')),
+    'shingle_size': int(os.getenv('DUPLICATE_SHINGLE_SIZE', '5')),
+    'num_permutations': int(os.getenv('DUPLICATE_MINHASH_PERMUTATIONS', '128')),
+    'bands': int(os.getenv('DUPLICATE_LSH_BANDS', '16'))
+}
+
+# Token-bounded chunking of long CVs (cleaning chunks counted with `encoding`, embedding chunks with
+# `embedding_encoding`) and the pooling used to combine chunk vectors into a CV score: "mean" (one
+# averaged vector) or "max" (best chunk wins)
+CV_CHUNKING_CONFIG = {
+    'cleaning_max_tokens': int(os.getenv('CV_CLEANING_CHUNK_TOKENS', '1500')),
+    'embedding_max_tokens': int(os.getenv('CV_EMBEDDING_CHUNK_TOKENS', '6000')),
+    'pooling': os.getenv('CV_CHUNK_POOLING', 'mean'),
+    'search_oversample': int(os.getenv('CV_CHUNK_SEARCH_OVERSAMPLE', '5'))
+}
+
+# Persistent CV corpus: CVs are ingested once and kept for later searches, in a dedicated Azure
+# Cognitive Search index (azure backend) or in a NumPy file on disk (local backend)
+CV_CORPUS_CONFIG = {
+    'index_name': os.getenv('CV_CORPUS_INDEX_NAME', f"{COGNITIVE_SEARCH_CONFIG['index_name']}-corpus"),
+    'local_path': os.getenv('CV_CORPUS_LOCAL_PATH', 'cv_corpus.npz')
+}
+
+# Compact memory-mapped embedding store used for the local CV corpus instead of the .npz file when
+# enabled. Rows are encoded as "float32", "float16" or "int8" (scalar-quantized with a per-row scale);
+# the best top_k * rerank_oversample rows are re-scored with the float32 rows kept next to them
+# (0 disables re-ranking)
+EMBEDDING_STORE_CONFIG = {
+    'enabled': os.getenv('EMBEDDING_STORE_ENABLED', 'false').lower() == 'true',
+    'path': os.getenv('EMBEDDING_STORE_PATH', 'cv_corpus.store'),
+    'encoding': os.getenv('EMBEDDING_STORE_ENCODING', 'int8'),
+    'keep_full_precision': os.getenv('EMBEDDING_STORE_KEEP_FULL_PRECISION', 'true').lower() == 'true',
+    'rerank_oversample': int(os.getenv('EMBEDDING_STORE_RERANK_OVERSAMPLE', '4'))
+}
+
+# Approximate nearest-neighbour (IVF) index used for the local CV corpus instead of exact search when
+# enabled (it takes precedence over the embedding store). Once train_size CVs are indexed they are
+# clustered into n_lists k-means lists (0: about the square root of the corpus size), and a search only
+# scans the n_probe lists nearest to the job embedding
+ANN_INDEX_CONFIG = {
+    'enabled': os.getenv('ANN_INDEX_ENABLED', 'false').lower() == 'true',
+    'path': os.getenv('ANN_INDEX_PATH', 'cv_corpus.ivf.npz'),
+    'encoding': os.getenv('ANN_INDEX_ENCODING', 'int8'),
+    'n_lists': int(os.getenv('ANN_INDEX_LISTS', '0')),
+    'n_probe': int(os.getenv('ANN_INDEX_PROBES', '16')),
+    'train_size': int(os.getenv('ANN_INDEX_TRAIN_SIZE', '10000')),
+    'kmeans_iterations': int(os.getenv('ANN_INDEX_KMEANS_ITERATIONS', '10'))
+}
+
+# Minimum number of seconds between two provisional rankings sent by /find-best-cv/stream
+STREAM_RANKING_INTERVAL_SECONDS = float(os.getenv('STREAM_RANKING_INTERVAL_SECONDS', '1.0'))
+
+# Persistent cache of CV rankings (SQLite), keyed by job description and corpus version, with a
+# near-duplicate fallback for job descriptions whose embeddings reach the cosine similarity threshold
+RESULT_CACHE_CONFIG = {
+    'enabled': os.getenv('RESULT_CACHE_ENABLED', 'true').lower() == 'true',
+    'path': os.getenv('RESULT_CACHE_PATH', 'result_cache.sqlite3'),
+    'max_entries': int(os.getenv('RESULT_CACHE_MAX_ENTRIES', '1000')),
+    'similarity_threshold': float(os.getenv('RESULT_CACHE_SIMILARITY_THRESHOLD', '0.98'))
+}
+
+# Asynchronous matching jobs: SQLite job state, number of jobs run at once and status stream poll interval
+JOB_CONFIG = {
+    'db_path': os.getenv('JOB_DB_PATH', 'jobs.sqlite3'),
+    'max_workers': int(os.getenv('JOB_MAX_WORKERS', '2')),
+    'poll_interval_seconds': float(os.getenv('JOB_POLL_INTERVAL_SECONDS', '1.0'))
+}
+
+# Client-side Azure OpenAI quota of the embedding and chat deployments (0 disables a budget) and the
+# jittered exponential backoff used to retry rate-limited (429) and server error (5xx) responses
+OPENAI_RATE_LIMIT_CONFIG = {
+    'embedding_requests_per_minute': int(os.getenv('EMBEDDING_REQUESTS_PER_MINUTE', '1440')),
+    'embedding_tokens_per_minute': int(os.getenv('EMBEDDING_TOKENS_PER_MINUTE', '240000')),
+    'chat_requests_per_minute': int(os.getenv('CHAT_REQUESTS_PER_MINUTE', '480')),
+    'chat_tokens_per_minute': int(os.getenv('CHAT_TOKENS_PER_MINUTE', '80000')),
+    'max_retries': int(os.getenv('OPENAI_MAX_RETRIES', '6')),
+    'backoff_base_seconds': float(os.getenv('OPENAI_BACKOFF_BASE_SECONDS', '1.0')),
+    'backoff_max_seconds': float(os.getenv('OPENAI_BACKOFF_MAX_SECONDS', '60'))
+}
+
+# Token accounting: optional response header with the per-request token usage, and the USD prices
+# per 1K tokens used to estimate cost (cost is only reported when a price is set)
+TOKEN_USAGE_CONFIG = {
+    'response_header': os.getenv('TOKEN_USAGE_HEADER_ENABLED', 'false').lower() == 'true',
+    'header_name': os.getenv('TOKEN_USAGE_HEADER_NAME', 'X-Token-Usage'),
+    'chat_prompt_price_per_1k': float(os.getenv('CHAT_PROMPT_PRICE_PER_1K', '0')),
+    'chat_completion_price_per_1k': float(os.getenv('CHAT_COMPLETION_PRICE_PER_1K', '0')),
+    'embedding_price_per_1k': float(os.getenv('EMBEDDING_PRICE_PER_1K', '0'))
+}
+
 BLOB_STORAGE_CONFIG = {
     'connection_string': os.getenv('AZURE_STORAGE_CONNECTION_STRING'),
     'container_name': os.getenv('CONTAINER_NAME')
@@ -43,6 +167,13 @@ openai.api_version = AZURE_OPENAI_CONFIG['api_version']
 
 encoding = tiktoken.encoding_for_model("gpt-4o")
 
+# The embedding model tokenizes differently from the chat model (cl100k_base for ada-002, with an
+# 8,191-token input limit), so embedding inputs are counted with its own encoding
+try:
+    embedding_encoding = tiktoken.encoding_for_model(ADA_CONFIG['model'])
+except KeyError:
+    embedding_encoding = tiktoken.get_encoding("cl100k_base")
+
 EMAIL_CONFIG = {
     'smtp_server': os.getenv('SMTP_SERVER'),
     'smtp_port': os.getenv('SMTP_PORT'),
@@ -1,111 +1,682 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, UploadFile, File, Form
+from fastapi.responses import Response, StreamingResponse
 from typing import List
 from src.embedder.cv_embedder import CVEmbedder
+from src.embedder.embedder import Embedder
 from src.embedder.job_posting_embedder import JobPostingEmbedder
+from src.jobs.job_runner import get_job_runner
+from utils.search_backend import match_jobs, rank_cvs
+from utils.local_search import LocalSearcher
+from utils.embedding_cache import get_embedding_cache
+from utils.contact_extractor import contact_extraction_stats
+from utils.cv_corpus import content_id, get_cv_corpus
+from utils.job_store import get_job_store
+from utils.keyword_filter import keyword_filter_stats, parse_terms
+from utils.result_cache import ResultCache, get_result_cache
+from utils.clients import close_clients, get_http_session
+from utils.rate_limiter import rate_limiter_stats
+from utils.metrics import InFlightRequestsMiddleware, render_metrics
+from utils.token_usage import TokenUsageMiddleware, bind_usage, current_usage
 from utils.indexer import Indexer
-from utils.search import AISearcher
-import shutil
 import os
 import config
-import tempfile  # Import tempfile module
+import asyncio
+import json
+import threading
+import time
 import uuid      # Import uuid for unique identifiers
 
-app = FastAPI()
+def warm_up_connections():
+    """
+    Opens the connections to Azure OpenAI and Azure Cognitive Search before the first request arrives.
+
+    The search indexes are created or verified once here, so requests do not check them again.
+    Failures are logged and do not prevent the server from starting; the clients retry on first use.
+    """
+    get_http_session()
+    if config.SEARCH_BACKEND == "azure":
+        try:
+            indexer = Indexer({})
+            indexer.create_index()
+            indexer.search_client.get_document_count()
+            get_cv_corpus()
+            config.app_logger.info("Azure Cognitive Search connection is warmed up.")
+        except Exception as e:
+            config.app_logger.error(f"Error warming up Azure Cognitive Search: {str(e)}")
+    if Embedder().warm_up():
+        config.app_logger.info("Azure OpenAI connection is warmed up.")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Creates the shared clients and warms up their connections on startup, resumes the matching jobs
+    that were queued or running when the server stopped, and closes the connections on shutdown.
+    """
+    await asyncio.to_thread(warm_up_connections)
+    get_job_runner().resume_unfinished_jobs()
+    yield
+    close_clients()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(InFlightRequestsMiddleware)
+app.add_middleware(TokenUsageMiddleware)
+
+def collect_uploaded_files(uploaded_files: List[UploadFile]):
+    """
+    Maps uploaded files to unique upload ids without writing them to disk.
+
+    The in-memory streams behind the UploadFile objects are passed on as they are, so two uploads
+    that share a filename are still processed as separate CVs.
+
+    Args:
+        uploaded_files (List[UploadFile]): The files uploaded by the user.
+
+    Returns:
+        dict: A dictionary mapping a unique upload id to a (filename, file stream) tuple.
+    """
+    return {
+        uuid.uuid4().hex: (os.path.basename(uploaded_file.filename), uploaded_file.file)
+        for uploaded_file in uploaded_files
+    }
+
+async def find_cached_ranking(job_description, corpus_version, top_k):
+    """
+    Looks up a cached ranking for a job description and corpus version.
+
+    The exact job description is tried first. On a miss the job description is embedded and the
+    ranking of the most similar cached job description of the same corpus version is used if it
+    reaches the similarity threshold (see ResultCache.find_similar).
+
+    Args:
+        job_description (str): The text of the job description.
+        corpus_version (str): The version of the ranked CV set.
+        top_k (int): The number of ranked CVs.
+
+    Returns:
+        tuple: The cached result as stored by cache_ranking (None on a miss or if caching is disabled)
+               and the job embedding if it was computed for the lookup (None otherwise), so callers do
+               not embed it twice.
+    """
+    result_cache = get_result_cache()
+    if not result_cache:
+        return None, None
+
+    cache_key = result_cache.make_key(job_description, corpus_version, top_k)
+    cached_ranking = await asyncio.to_thread(result_cache.get, cache_key)
+    if cached_ranking is not None:
+        return cached_ranking, None
+
+    job_embedder = await asyncio.to_thread(JobPostingEmbedder, job_description)
+    job_embedding = job_embedder.get_job_embedding()
+    if job_embedding is None:
+        return None, None
+    return await asyncio.to_thread(result_cache.find_similar, job_embedding, corpus_version, top_k), job_embedding
 
-def save_uploaded_file(uploaded_file: UploadFile, destination: str):
+def cache_ranking(job_description, corpus_version, top_k, job_embedding, similar_cvs, merged_cvs=None):
     """
-    Saves an uploaded file to the specified destination path.
+    Stores a ranking in the result cache. Empty rankings are not cached, since they usually come from errors.
 
     Args:
-        uploaded_file (UploadFile): The file uploaded by the user.
-        destination (str): The file system path where the file will be saved.
+        job_description (str): The text of the job description.
+        corpus_version (str): The version of the ranked CV set.
+        top_k (int): The number of ranked CVs.
+        job_embedding (list): The embedding vector of the job description.
+        similar_cvs (list): The ranking to cache.
+        merged_cvs (list, optional): The uploads merged as duplicates of another upload. If given, the
+            ranking is cached together with them as a {"cv_list": ..., "merged_cvs": ...} dictionary.
     """
-    with open(destination, "wb") as buffer:
-        shutil.copyfileobj(uploaded_file.file, buffer)
+    result_cache = get_result_cache()
+    if result_cache and job_embedding is not None and similar_cvs:
+        result_cache.put(
+            result_cache.make_key(job_description, corpus_version, top_k), corpus_version, top_k,
+            job_embedding, similar_cvs if merged_cvs is None else {"cv_list": similar_cvs, "merged_cvs": merged_cvs}
+        )
 
 @app.post("/find-best-cv")
-async def find_best_cvs(job_description: str = Form(...), cv_pdfs: List[UploadFile] = File(...)):
+async def find_best_cvs(
+    job_description: str = Form(...),
+    cv_pdfs: List[UploadFile] = File(...),
+    must_have_terms: str = Form("")
+):
     """
     Processes the job description and uploaded CV PDFs to find the most suitable CVs.
 
     This endpoint performs the following steps:
-        1. Embeds the job description using JobPostingEmbedder.
-        2. Saves uploaded CV PDFs to a temporary directory.
-        3. Embeds all CVs using CVEmbedder.
-        4. Indexes the CV embeddings using Indexer.
-        5. Searches for the most similar CVs using AISearcher.
-        6. Deletes all indexed documents to clean up.
-        7. Cleans up temporary files.
+        1. Keys the uploaded CV PDF streams by unique upload ids (no temporary files are written).
+        2. Returns the cached ranking if the same (or a nearly identical) job description was already
+           matched against the same CV files (see ResultCache). Requests with must-have terms are
+           not cached, since their response also reports the skipped CVs.
+        3. Embeds the job description using JobPostingEmbedder and, in parallel,
+           embeds all CVs using CVEmbedder. Exact and near-duplicate uploads are merged into one
+           representative, and with must-have terms, CVs whose raw PDF text lacks any of them are
+           skipped, both before the OpenAI stages.
+        4. Ranks the CV embeddings with the configured search backend (Azure Cognitive Search
+           or the in-process LocalSearcher, see config.SEARCH_BACKEND) and caches the ranking.
 
     Args:
         job_description (str): The text of the job description provided by the user.
         cv_pdfs (List[UploadFile]): A list of uploaded CV PDF files.
+        must_have_terms (str, optional): Words or phrases every CV must contain, separated by commas,
+            semicolons or new lines (e.g. "Python, SQL"). Matching ignores case and Turkish
+            diacritics. Defaults to no filtering.
 
     Returns:
         dict: A dictionary containing a list of the best matching CVs' names, similarity scores, and contact information.
-              If no suitable CVs are found, returns a message indicating so.
+              If no suitable CVs are found, returns a message indicating so. A "merged_cvs" list, also
+              returned with cached rankings, holds the uploads that were merged as duplicates of
+              another upload (empty if there were none). With must-have terms, a
+              "keyword_filter" entry lists the skipped CVs with their missing terms and the number of
+              OpenAI calls the filter saved.
               In case of errors, returns an error message.
     """
-    # Create a unique temporary directory for this request
-    temp_dir = tempfile.mkdtemp(prefix="cv_uploads_")
-    config.app_logger.info(f"Temporary directory created at {temp_dir}")
-
     try:
-        # Embed the job description to obtain its embedding vector
-        job_embedder = JobPostingEmbedder(job_description)
-        job_embedding = job_embedder.get_job_embedding()
-
-        # Save each uploaded PDF file to the temporary directory
-        for pdf_file in cv_pdfs:
-            # Ensure the filename is safe
-            filename = os.path.basename(pdf_file.filename)
-            file_path = os.path.join(temp_dir, filename)
-            save_uploaded_file(pdf_file, file_path)
-            config.app_logger.info(f"Saved uploaded file to {file_path}")
-
-        # Embed all CVs by processing the saved PDF files
-        cv_embedder = CVEmbedder(temp_dir)
-        cv_embeddings = cv_embedder.embed_all_cvs()
-        config.app_logger.info(f"Generated embeddings for {len(cv_embeddings)} CVs")
-
-        # Initialize the Indexer and ingest the CV embeddings into Azure Cognitive Search
-        indexer = Indexer(cv_embeddings)
-        indexer.ingest_embeddings()
-        config.app_logger.info("Embeddings ingested into the indexer")
+        # Key the uploaded PDF streams by unique upload ids
+        cv_documents = collect_uploaded_files(cv_pdfs)
+        config.app_logger.info(f"Received {len(cv_documents)} uploaded CV file(s)")
+        terms = parse_terms(must_have_terms)
 
-        # Initialize the AISearcher and search for the most similar CVs based on the job embedding
-        ai_searcher = AISearcher()
-        similar_cvs = ai_searcher.search_similar_cv(job_embedding, top_k=10)  # Retrieve top 10 similar CVs
-        config.app_logger.info(f"Search completed, found {len(similar_cvs)} similar CV(s).")
+        # Reuse the ranking of an earlier request for the same job description and CV files. Rankings
+        # cached without their merged uploads are treated as misses.
+        similar_cvs, job_embedding = None, None
+        merged_cvs = []
+        if not terms:
+            corpus_version = await asyncio.to_thread(
+                ResultCache.upload_version, [uploaded_file.file for uploaded_file in cv_pdfs]
+            )
+            cached_result, job_embedding = await find_cached_ranking(job_description, corpus_version, 10)
+            if isinstance(cached_result, dict):
+                similar_cvs, merged_cvs = cached_result["cv_list"], cached_result["merged_cvs"]
+        if similar_cvs is not None:
+            config.app_logger.info("Returning the cached ranking.")
+        else:
+            cv_embedder = CVEmbedder(cv_documents)
+            if job_embedding is None:
+                # Embed the job description and all CVs in parallel, off the event loop
+                job_embedder, cv_embeddings = await asyncio.gather(
+                    asyncio.to_thread(JobPostingEmbedder, job_description),
+                    asyncio.to_thread(cv_embedder.embed_all_cvs, terms)
+                )
+                job_embedding = job_embedder.get_job_embedding()
+            else:
+                cv_embeddings = await asyncio.to_thread(cv_embedder.embed_all_cvs)
+            config.app_logger.info(f"Generated embeddings for {len(cv_embeddings)} CVs")
+            merged_cvs = list(cv_embedder.duplicate_cvs.values())
 
-        # Delete all indexed documents to clean up the search index
-        indexer.delete_all_documents()
-        config.app_logger.info("Indexed data deleted.")
+            # Rank the CVs against the job embedding with the configured search backend
+            similar_cvs = await asyncio.to_thread(rank_cvs, cv_embeddings, job_embedding, 10) if cv_embeddings else []
+            config.app_logger.info(f"Search completed, found {len(similar_cvs)} similar CV(s).")
+            if not terms:
+                await asyncio.to_thread(
+                    cache_ranking, job_description, corpus_version, 10, job_embedding, similar_cvs, merged_cvs
+                )
 
         if similar_cvs:
             # Prepare the list of CVs to return
-            cv_list = []
-            for cv in similar_cvs:
-                cv_info = {
-                    "cv_name": cv['cv_name'],
-                    "similarity_score": cv['similarity_score'],
-                    "contact_info": cv.get('contact_info', "No contact info available")
-                }
-                cv_list.append(cv_info)
+            cv_list = format_cv_list(similar_cvs)
             config.app_logger.info(f"Returning {len(cv_list)} CVs.")
-            return {"cv_list": cv_list}
+            response = {"cv_list": cv_list}
         else:
             config.app_logger.info("No suitable CVs found.")
-            return {"message": "No suitable CVs found."}
+            response = {"message": "No suitable CVs found."}
+        response["merged_cvs"] = merged_cvs
+        if terms:
+            response["keyword_filter"] = {
+                "must_have_terms": terms,
+                "skipped_cvs": list(cv_embedder.skipped_cvs.values()),
+                "llm_calls_saved": cv_embedder.llm_calls_saved
+            }
+        return response
+
+    except Exception as e:
+        config.app_logger.error(f"An error occurred: {str(e)}")
+        return {"error": str(e)}
+
+async def iterate_in_thread(iterator):
+    """
+    Consumes a blocking iterator on a worker thread and yields its items to the event loop.
+
+    Args:
+        iterator (iterator): The blocking iterator, e.g. a generator doing network or CPU work.
+
+    Yields:
+        The items of the iterator, in order. An exception raised by the iterator is re-raised.
+    """
+    loop = asyncio.get_running_loop()
+    items = asyncio.Queue()
+    done = object()
+
+    def produce():
+        try:
+            for item in iterator:
+                loop.call_soon_threadsafe(items.put_nowait, item)
+            loop.call_soon_threadsafe(items.put_nowait, done)
+        except Exception as e:
+            loop.call_soon_threadsafe(items.put_nowait, e)
+
+    threading.Thread(target=bind_usage(produce), daemon=True).start()
+    while True:
+        item = await items.get()
+        if item is done:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+def format_cv_list(similar_cvs):
+    """
+    Formats ranked CVs for the API response.
+
+    Args:
+        similar_cvs (list): The ranked CVs returned by the search backend.
+
+    Returns:
+        list: The CVs' names, similarity scores, and contact information.
+    """
+    return [
+        {
+            "cv_name": cv['cv_name'],
+            "similarity_score": cv['similarity_score'],
+            "contact_info": cv.get('contact_info', "No contact info available")
+        }
+        for cv in similar_cvs
+    ]
+
+@app.post("/find-best-cv/stream")
+async def find_best_cvs_stream(job_description: str = Form(...), cv_pdfs: List[UploadFile] = File(...)):
+    """
+    Streaming variant of /find-best-cv that reports progress and provisional rankings as CVs finish.
+
+    The response is newline-delimited JSON (one event object per line):
+        - {"event": "started", "total": ...} once the uploads are received.
+        - {"event": "parsed" | "cleaned" | "embedded", "cv_id": ..., "cv_name": ...} per CV and stage.
+        - {"event": "failed", "cv_id": ..., "cv_name": ..., "stage": ..., "reason": ...} for skipped CVs.
+        - {"event": "duplicate", "cv_id": ..., "cv_name": ..., "duplicate_of": ..., "duplicate_of_name": ...,
+          "similarity": ...} for CVs merged into an earlier upload with the same or nearly the same text.
+        - {"event": "ranking", "provisional": true, "processed": ..., "total": ..., "cv_list": [...]}
+          whenever new CVs were embedded, at most every config.STREAM_RANKING_INTERVAL_SECONDS.
+          Provisional rankings are computed in-process with the LocalSearcher.
+        - {"event": "ranking", "provisional": false, ...} with the final ranking from the configured
+          search backend and the request's "token_usage" (see utils.token_usage), or
+          {"event": "error", "error": ...} if the request fails.
+
+    Args:
+        job_description (str): The text of the job description provided by the user.
+        cv_pdfs (List[UploadFile]): A list of uploaded CV PDF files.
+
+    Returns:
+        StreamingResponse: The NDJSON event stream.
+    """
+    # Read the uploads now, since the request's files are closed while the response is still streaming
+    cv_documents = {
+        uuid.uuid4().hex: (os.path.basename(uploaded_file.filename), await uploaded_file.read())
+        for uploaded_file in cv_pdfs
+    }
+    config.app_logger.info(f"Received {len(cv_documents)} uploaded CV file(s) for streaming")
+
+    async def stream_events():
+        total = len(cv_documents)
+        yield json.dumps({"event": "started", "total": total}) + "\n"
+        try:
+            job_embedding_task = asyncio.create_task(asyncio.to_thread(JobPostingEmbedder, job_description))
+            provisional_searcher = LocalSearcher()
+            cv_embeddings = {}
+            # CVs embedded since the last provisional ranking, added to the searcher in one batch
+            # when the next ranking is due instead of rebuilding its matrix for every CV
+            unranked_embeddings = {}
+            processed = 0
+            last_ranking = 0.0
+
+            async for event, cv_data in iterate_in_thread(CVEmbedder(cv_documents).iter_cv_events()):
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+                if event["event"] in ("embedded", "failed", "duplicate"):
+                    processed += 1
+                elif event["event"] == "promoted":
+                    # A merged upload is processed in place of a failed CV, so it is not finished anymore
+                    processed -= 1
+                if cv_data:
+                    cv_embeddings[event["cv_id"]] = cv_data
+                    unranked_embeddings[event["cv_id"]] = cv_data
+
+                interval_elapsed = time.monotonic() - last_ranking >= config.STREAM_RANKING_INTERVAL_SECONDS
+                if unranked_embeddings and job_embedding_task.done() and interval_elapsed and processed < total:
+                    provisional_searcher.add_embeddings(unranked_embeddings)
+                    unranked_embeddings = {}
+                    job_embedding = job_embedding_task.result().get_job_embedding()
+                    yield json.dumps({
+                        "event": "ranking",
+                        "provisional": True,
+                        "processed": processed,
+                        "total": total,
+                        "cv_list": format_cv_list(provisional_searcher.search_similar_cv(job_embedding, top_k=10))
+                    }, ensure_ascii=False) + "\n"
+                    last_ranking = time.monotonic()
+
+            job_embedding = (await job_embedding_task).get_job_embedding()
+            similar_cvs = await asyncio.to_thread(rank_cvs, cv_embeddings, job_embedding, 10) if cv_embeddings else []
+            config.app_logger.info(f"Search completed, found {len(similar_cvs)} similar CV(s).")
+            final_event = {
+                "event": "ranking",
+                "provisional": False,
+                "processed": processed,
+                "total": total,
+                "cv_list": format_cv_list(similar_cvs)
+            }
+            usage = current_usage()
+            if usage is not None:
+                final_event["token_usage"] = usage.summary()
+            yield json.dumps(final_event, ensure_ascii=False) + "\n"
+
+        except Exception as e:
+            config.app_logger.error(f"An error occurred: {str(e)}")
+            yield json.dumps({"event": "error", "error": str(e)}) + "\n"
+
+    return StreamingResponse(stream_events(), media_type="application/x-ndjson")
+
+@app.post("/find-best-cv/batch")
+async def find_best_cvs_for_jobs(
+    job_descriptions: List[str] = Form(...),
+    cv_pdfs: List[UploadFile] = File(...),
+    top_k: int = Form(10, ge=1),
+    jobs_per_cv: int = Form(0, ge=0)
+):
+    """
+    Matches several job descriptions against one set of uploaded CV PDFs in a single pass.
+
+    Every CV is parsed, cleaned and embedded once (instead of once per /find-best-cv call), all job
+    descriptions are embedded in one batched request (see Embedder.embed_texts), and the whole
+    jobs x CVs similarity matrix is scored in one matrix product (see match_jobs).
+
+    Args:
+        job_descriptions (List[str]): The texts of the job descriptions, one form field per job.
+        cv_pdfs (List[UploadFile]): A list of uploaded CV PDF files.
+        top_k (int, optional): The number of top similar CVs to return per job, at least 1. Defaults to 10.
+        jobs_per_cv (int, optional): The number of best-fitting jobs to return per CV, 0 to omit
+            them. Defaults to 0.
+
+    Returns:
+        dict: A "jobs" list with, per job description in the order they were sent, its index and the
+              best matching CVs in the /find-best-cv format (or an error message if the job could not
+              be embedded), and with jobs_per_cv > 0 a "cvs" list with the best job indices and
+              similarity scores of every CV. A "merged_cvs" list holds the uploads that were merged as
+              duplicates of another upload (empty if there were none). In case of errors, returns an
+              error message.
+    """
+    try:
+        cv_documents = collect_uploaded_files(cv_pdfs)
+        config.app_logger.info(
+            f"Received {len(job_descriptions)} job description(s) and {len(cv_documents)} uploaded CV file(s)"
+        )
+
+        # Embed all job descriptions in one batch and all CVs once, in parallel, off the event loop
+        cv_embedder = CVEmbedder(cv_documents)
+        job_embeddings, cv_embeddings = await asyncio.gather(
+            asyncio.to_thread(Embedder().embed_texts, job_descriptions),
+            asyncio.to_thread(cv_embedder.embed_all_cvs)
+        )
+        config.app_logger.info(f"Generated embeddings for {len(cv_embeddings)} CVs")
+
+        job_rankings, cv_rankings = await asyncio.to_thread(
+            match_jobs, cv_embeddings, job_embeddings, top_k, jobs_per_cv
+        )
+        jobs = []
+        for job_index, (job_embedding, similar_cvs) in enumerate(zip(job_embeddings, job_rankings)):
+            if job_embedding is None:
+                config.app_logger.warning(f"Job description {job_index} could not be embedded.")
+                jobs.append({"job_index": job_index, "error": "The job description could not be embedded."})
+            else:
+                jobs.append({"job_index": job_index, "cv_list": format_cv_list(similar_cvs)})
+        config.app_logger.info(f"Matched {len(jobs)} job description(s) against {len(cv_embeddings)} CV(s).")
+
+        response = {"jobs": jobs}
+        if jobs_per_cv > 0:
+            response["cvs"] = [
+                {"cv_name": cv_ranking["cv_name"], "best_jobs": cv_ranking["best_jobs"]}
+                for cv_ranking in cv_rankings
+            ]
+        response["merged_cvs"] = list(cv_embedder.duplicate_cvs.values())
+        return response
+
+    except Exception as e:
+        config.app_logger.error(f"An error occurred: {str(e)}")
+        return {"error": str(e)}
+
+def format_job(job):
+    """
+    Formats the state of a matching job for the API response.
+
+    Args:
+        job (dict): The job state returned by JobStore.get_job.
+
+    Returns:
+        dict: The job state, with the ranked CVs formatted like the /find-best-cv response.
+    """
+    job = dict(job, processed=job["embedded"] + len(job["failed"]) + len(job["duplicates"]))
+    if job["cv_list"] is not None:
+        job["cv_list"] = format_cv_list(job["cv_list"])
+    return job
+
+@app.post("/jobs")
+async def submit_job(job_description: str = Form(...), cv_pdfs: List[UploadFile] = File(...)):
+    """
+    Submits an asynchronous matching job and returns immediately.
+
+    The job description and the uploaded CVs are saved in the job store and processed on the local
+    job worker pool. Use GET /jobs/{job_id} to poll the job or GET /jobs/{job_id}/stream to follow it.
+
+    Args:
+        job_description (str): The text of the job description provided by the user.
+        cv_pdfs (List[UploadFile]): A list of uploaded CV PDF files.
+
+    Returns:
+        dict: The job id, its status and the number of CVs. In case of errors, returns an error message.
+    """
+    try:
+        cv_documents = {
+            uuid.uuid4().hex: (os.path.basename(uploaded_file.filename), await uploaded_file.read())
+            for uploaded_file in cv_pdfs
+        }
+        job_id = await asyncio.to_thread(get_job_store().create_job, job_description, cv_documents)
+        get_job_runner().submit(job_id)
+        config.app_logger.info(f"Submitted job {job_id} with {len(cv_documents)} CV(s)")
+        return {"job_id": job_id, "status": "queued", "total": len(cv_documents)}
 
     except Exception as e:
         config.app_logger.error(f"An error occurred: {str(e)}")
         return {"error": str(e)}
 
-    finally:
-        # Clean up temporary files
-        shutil.rmtree(temp_dir)
-        config.app_logger.info(f"Temporary directory {temp_dir} deleted.")
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Returns the status, progress and, once completed, the results of a matching job.
+
+    Args:
+        job_id (str): The id returned by POST /jobs.
+
+    Returns:
+        dict: The job status ("queued", "running", "completed" or "failed"), the number of total and
+              processed CVs, the failed CVs, the ranked CVs once completed and the error if it failed.
+              If the job does not exist, returns an error message.
+    """
+    job = await asyncio.to_thread(get_job_store().get_job, job_id)
+    if job is None:
+        return {"error": f"Job {job_id} not found."}
+    return format_job(job)
+
+@app.get("/jobs/{job_id}/stream")
+async def stream_job(job_id: str):
+    """
+    Streams the state of a matching job until it is completed or failed.
+
+    The response is newline-delimited JSON: the job state (see GET /jobs/{job_id}) is sent whenever
+    it changes, checked every config.JOB_CONFIG["poll_interval_seconds"]. The last line holds the
+    final status and results.
+
+    Args:
+        job_id (str): The id returned by POST /jobs.
+
+    Returns:
+        StreamingResponse: The NDJSON job state stream.
+    """
+    async def stream_states():
+        last_updated_at = None
+        while True:
+            job = await asyncio.to_thread(get_job_store().get_job, job_id)
+            if job is None:
+                yield json.dumps({"error": f"Job {job_id} not found."}) + "\n"
+                return
+            if job["updated_at"] != last_updated_at:
+                last_updated_at = job["updated_at"]
+                yield json.dumps(format_job(job), ensure_ascii=False) + "\n"
+            if job["status"] in ("completed", "failed"):
+                return
+            await asyncio.sleep(config.JOB_CONFIG["poll_interval_seconds"])
+
+    return StreamingResponse(stream_states(), media_type="application/x-ndjson")
+
+@app.post("/cv-corpus/ingest")
+async def ingest_cv_corpus(cv_pdfs: List[UploadFile] = File(...)):
+    """
+    Adds uploaded CV PDFs to the persistent CV corpus.
+
+    Every CV gets a stable id derived from its file content. CVs that are already in the corpus
+    (or uploaded twice in the same request) are skipped, so only new CVs are cleaned and embedded.
+    New CVs whose text duplicates, or nearly duplicates, another new CV of the request are merged
+    into it and not ingested.
+
+    Args:
+        cv_pdfs (List[UploadFile]): A list of uploaded CV PDF files.
+
+    Returns:
+        dict: The ids and names of the ingested CVs, the ids of the CVs that were already indexed,
+              the CVs merged as duplicates of another CV, and the ids of the CVs that could not be
+              processed.
+              In case of errors, returns an error message.
+    """
+    try:
+        cv_documents = {}
+        for uploaded_file in cv_pdfs:
+            pdf_content = await uploaded_file.read()
+            cv_documents.setdefault(content_id(pdf_content), (os.path.basename(uploaded_file.filename), pdf_content))
+
+        cv_corpus = await asyncio.to_thread(get_cv_corpus)
+        already_indexed = await asyncio.to_thread(cv_corpus.filter_indexed, list(cv_documents))
+        new_documents = {cv_id: document for cv_id, document in cv_documents.items() if cv_id not in already_indexed}
+        config.app_logger.info(
+            f"Received {len(cv_documents)} distinct CV(s), {len(new_documents)} not yet in the corpus"
+        )
+
+        cv_embedder = CVEmbedder(new_documents)
+        cv_embeddings = await asyncio.to_thread(cv_embedder.embed_all_cvs) if new_documents else {}
+        await asyncio.to_thread(cv_corpus.add, cv_embeddings)
+
+        return {
+            "ingested": [{"cv_id": cv_id, "cv_name": cv_data["cv_name"]} for cv_id, cv_data in cv_embeddings.items()],
+            "already_indexed": sorted(already_indexed),
+            "merged": list(cv_embedder.duplicate_cvs.values()),
+            "failed": [
+                cv_id for cv_id in new_documents
+                if cv_id not in cv_embeddings and cv_id not in cv_embedder.duplicate_cvs
+            ]
+        }
+
+    except Exception as e:
+        config.app_logger.error(f"An error occurred: {str(e)}")
+        return {"error": str(e)}
+
+@app.post("/cv-corpus/search")
+async def search_cv_corpus(job_description: str = Form(...), top_k: int = Form(10, ge=1)):
+    """
+    Finds the most suitable CVs for a job description in the persistent CV corpus.
+
+    Only the job description is embedded; the CVs were embedded once at ingestion time. Rankings are
+    cached until the corpus changes (see ResultCache).
+
+    Args:
+        job_description (str): The text of the job description provided by the user.
+        top_k (int, optional): The number of top similar CVs to return. Defaults to 10.
+
+    Returns:
+        dict: A dictionary containing a list of the best matching CVs' ids, names, similarity scores,
+              and contact information. If no suitable CVs are found, returns a message indicating so.
+              In case of errors, returns an error message.
+    """
+    try:
+        cv_corpus = await asyncio.to_thread(get_cv_corpus)
+        corpus_version = await asyncio.to_thread(cv_corpus.version)
+        similar_cvs, job_embedding = await find_cached_ranking(job_description, corpus_version, top_k)
+        if similar_cvs is not None:
+            config.app_logger.info("Returning the cached corpus ranking.")
+        else:
+            if job_embedding is None:
+                job_embedder = await asyncio.to_thread(JobPostingEmbedder, job_description)
+                job_embedding = job_embedder.get_job_embedding()
+            similar_cvs = await asyncio.to_thread(cv_corpus.search, job_embedding, top_k)
+            config.app_logger.info(f"Corpus search completed, found {len(similar_cvs)} similar CV(s).")
+            await asyncio.to_thread(cache_ranking, job_description, corpus_version, top_k, job_embedding, similar_cvs)
+
+        if similar_cvs:
+            return {"cv_list": similar_cvs}
+        return {"message": "No suitable CVs found."}
+
+    except Exception as e:
+        config.app_logger.error(f"An error occurred: {str(e)}")
+        return {"error": str(e)}
+
+@app.delete("/cv-corpus/{cv_id}")
+async def delete_from_cv_corpus(cv_id: str):
+    """
+    Removes a CV from the persistent CV corpus.
+
+    Args:
+        cv_id (str): The id of the CV, as returned by the ingest endpoint.
+
+    Returns:
+        dict: Whether the CV was found and deleted. In case of errors, returns an error message.
+    """
+    try:
+        cv_corpus = await asyncio.to_thread(get_cv_corpus)
+        deleted = await asyncio.to_thread(cv_corpus.delete, cv_id)
+        return {"cv_id": cv_id, "deleted": deleted}
+
+    except Exception as e:
+        config.app_logger.error(f"An error occurred: {str(e)}")
+        return {"error": str(e)}
+
+@app.get("/stats")
+def get_stats():
+    """
+    Returns runtime counters of the CV analysis backend.
+
+    Returns:
+        dict: A dictionary with the embedding and result cache hit/miss counters (None if caching is
+              disabled), the contact extraction fast path/fallback counters, the must-have-terms
+              filter counters and the Azure OpenAI scheduler counters of each deployment.
+    """
+    embedding_cache = get_embedding_cache()
+    result_cache = get_result_cache()
+    return {
+        "embedding_cache": embedding_cache.stats() if embedding_cache else None,
+        "result_cache": result_cache.stats() if result_cache else None,
+        "contact_extraction": contact_extraction_stats.stats(),
+        "keyword_filter": keyword_filter_stats.stats(),
+        "rate_limits": rate_limiter_stats()
+    }
+
+@app.get("/metrics")
+def get_metrics():
+    """
+    Exposes the backend's metrics in the Prometheus text format.
+
+    Includes per-stage latency histograms (PDF parsing, GPT cleaning, contact extraction, embedding,
+    index create/upload/delete and search), upstream error and rate limit counters, the number of
+    processed CVs, the OpenAI tokens and estimated cost per stage and the number of requests in flight.
+
+    Returns:
+        Response: The metrics payload.
+    """
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
 
 # Run the FastAPI application using Uvicorn
 if __name__ == "__main__":
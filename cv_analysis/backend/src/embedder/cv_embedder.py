@@ -1,77 +1,575 @@
+import queue
 import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import numpy as np
 from src.embedder.embedder import Embedder
 from src.processors.pdf_processor import PDFProcessor
 
 from utils.openAI import OpenAIClient
+from utils.contact_extractor import ContactExtractor, contact_extraction_stats
+from utils.duplicate_detector import DuplicateDetector
+from utils.keyword_filter import KeywordIndex, keyword_filter_stats
+from utils.metrics import CVS_PROCESSED
+from utils.token_usage import bind_usage
+from utils.text_chunker import chunk_text
+import config
 
 
 class CVEmbedder:
     """
-    A class to handle the embedding of CVs from a specified folder.
+    A class to handle the embedding of CVs from a specified folder or from in-memory uploads.
 
     This class extracts text from PDF CVs, removes contact information using OpenAI,
-    and generates embeddings for the cleaned CV text.
+    and generates embeddings for the cleaned CV text. The per-CV OpenAI calls run on a
+    thread pool bounded by config.CONCURRENCY_LIMIT, so many CVs are processed at once.
+    Long CVs are split into token-bounded chunks that are cleaned and embedded in parallel.
     """
 
-    def __init__(self, cv_folder_path):
+    def __init__(self, cv_source):
         """
-        Initializes the CVEmbedder with the path to the CV folder.
+        Initializes the CVEmbedder with the CV PDFs to process.
 
         Args:
-            cv_folder_path (str): The path to the folder containing CV PDFs.
+            cv_source (str or dict): The path to the folder containing CV PDFs, or a dictionary
+                mapping a unique upload id to a (filename, content) tuple (see PDFProcessor).
         """
-        self.cv_folder_path = cv_folder_path
+        self.cv_source = cv_source
         self.embedder = Embedder()
         self.openai_client = OpenAIClient(engine="gpt-4o")
+        self.contact_extractor = ContactExtractor()
+        self.duplicate_cvs = {}
+        self.skipped_cvs = {}
+        self.llm_calls_saved = 0
 
-    def embed_all_cvs(self):
+    def embed_all_cvs(self, must_have_terms=None):
         """
-        Processes and embeds all CVs in the specified folder.
+        Processes and embeds all CVs in the specified folder or upload mapping.
 
-        For each CV:
-            1. Extracts contact information using OpenAI.
-            2. Removes the contact information from the CV text.
-            3. Generates an embedding for the cleaned CV text.
-            4. Stores the embedding along with the CV name and contact information.
+        Right after text extraction, exact and near-duplicate CVs are merged into the first upload
+        they duplicate (see DuplicateDetector and config.DUPLICATE_DETECTION_CONFIG); the merged CVs
+        are recorded in `duplicate_cvs` and are not processed further, unless their representative
+        cannot be cleaned, in which case the next of them takes its place (see _promote_duplicate).
+
+        If must-have terms are given, the raw PDF texts are first checked against them with an
+        in-memory KeywordIndex (case- and Turkish-diacritic-insensitive). CVs that lack any term skip
+        all OpenAI stages; they are recorded in `skipped_cvs` and the chat completions they would
+        have used are estimated in `llm_calls_saved`.
+
+        For each remaining CV, concurrently on a bounded thread pool, the extracted PDF text is cleaned
+        and its contact information is extracted and removed using OpenAI (see _process_cv).
+
+        The cleaned CV texts are then split into chunks that fit the embedding model's token limit
+        (config.CV_CHUNKING_CONFIG["embedding_max_tokens"], counted with config.embedding_encoding) and
+        all chunks are embedded together with Embedder.embed_texts, which packs them into a handful of
+        multi-input requests.
+
+        Args:
+            must_have_terms (list of str, optional): Words or phrases every CV must contain.
 
         Returns:
-            dict: A dictionary where each key is the CV name and the value is another
-                  dictionary containing the CV name, its embedding, and contact information.
+            dict: A dictionary where each key is the CV key (the filename for a folder, the upload id
+                  for in-memory uploads) and the value is another dictionary containing the CV name,
+                  its embedding (the normalized mean of its chunk vectors), the individual chunk
+                  embeddings for CVs with several chunks, and contact information.
         """
+        pdf_processor = PDFProcessor(self.cv_source)
+        raw_cv_texts = pdf_processor.extract_texts_from_all_pdfs()
+        duplicate_detector = self._new_duplicate_detector()
+        duplicate_texts = {}
+        if raw_cv_texts and duplicate_detector:
+            representative_texts = {}
+            for cv_key, raw_pdf_text in raw_cv_texts.items():
+                if self._record_duplicate(duplicate_detector, cv_key, raw_pdf_text, pdf_processor.pdf_names):
+                    duplicate_texts[cv_key] = raw_pdf_text
+                else:
+                    representative_texts[cv_key] = raw_pdf_text
+            raw_cv_texts = representative_texts
+        if raw_cv_texts and must_have_terms:
+            raw_cv_texts = self._filter_by_terms(raw_cv_texts, must_have_terms, pdf_processor.pdf_names)
+        if not raw_cv_texts:
+            CVS_PROCESSED.labels("duplicate").inc(len(self.duplicate_cvs))
+            CVS_PROCESSED.labels("failed").inc(
+                len(pdf_processor.pdf_names) - len(self.duplicate_cvs) - len(self.skipped_cvs)
+            )
+            return {}
+
+        cv_keys = list(raw_cv_texts)
+        max_workers = min(config.CONCURRENCY_LIMIT, len(cv_keys))
+        # CV tasks wait on chunk tasks, so chunks run on a separate pool to avoid starving it
+        with ThreadPoolExecutor(max_workers=config.CONCURRENCY_LIMIT) as chunk_executor, \
+                ThreadPoolExecutor(max_workers=max_workers) as executor:
+            process_cv = bind_usage(partial(self._process_cv, chunk_executor=chunk_executor))
+            processed_cvs = list(executor.map(process_cv, raw_cv_texts.values()))
+
+            # CVs whose text could not be cleaned are left out instead of embedding an empty text, and
+            # the next upload merged into them, if any, is processed in their place
+            for position, (cv_key, (cv_text, _)) in enumerate(zip(cv_keys, processed_cvs)):
+                if cv_text is None:
+                    config.app_logger.error(f"Cleaning failed for {pdf_processor.pdf_names[cv_key]}, skipping it.")
+                    promoted = self._promote_duplicate(
+                        cv_key, duplicate_texts, must_have_terms, pdf_processor.pdf_names, chunk_executor
+                    )
+                    if promoted:
+                        cv_keys[position], processed_cvs[position] = promoted
+        # Generate embeddings for all chunks of all cleaned CV texts in batched requests
+        cv_chunks = [
+            chunk_text(cv_text, config.CV_CHUNKING_CONFIG["embedding_max_tokens"], config.embedding_encoding)
+            if cv_text is not None else []
+            for cv_text, _ in processed_cvs
+        ]
+        chunk_embeddings = self.embedder.embed_texts([chunk for chunks in cv_chunks for chunk in chunks])
+
         cv_embeddings = {}
-        for cv_name, cv_text in self._get_all_cv_texts().items():
-            # Extract contact information from the CV text
-            contact_info = self.openai_client.extract_contact_info(cv_text)
-            # Remove contact information from the CV text
-            cv_text_without_contact = cv_text.replace(contact_info, "")
-
-            # Generate embedding for the cleaned CV text
-            embedding = self.embedder.embed_text(cv_text_without_contact)
-            if embedding:
-                # Add contact information after embedding
-                cv_embeddings[cv_name] = {
-                    "cv_name": cv_name,
-                    "embedding": embedding,
-                    "contact_info": contact_info,  # Add contact information
-                }
+        offset = 0
+        for cv_key, chunks, (_, contact_info) in zip(cv_keys, cv_chunks, processed_cvs):
+            if not chunks:
+                continue
+            embeddings = chunk_embeddings[offset:offset + len(chunks)]
+            offset += len(chunks)
+            cv_data = self._build_cv_data(pdf_processor.pdf_names[cv_key], embeddings, contact_info)
+            if cv_data:
+                cv_embeddings[cv_key] = cv_data
+        CVS_PROCESSED.labels("embedded").inc(len(cv_embeddings))
+        CVS_PROCESSED.labels("duplicate").inc(len(self.duplicate_cvs))
+        CVS_PROCESSED.labels("failed").inc(
+            len(pdf_processor.pdf_names) - len(cv_embeddings) - len(self.duplicate_cvs) - len(self.skipped_cvs)
+        )
         return cv_embeddings
 
-    def _get_all_cv_texts(self):
+    def iter_cv_events(self):
+        """
+        Processes and embeds all CVs one by one, yielding a progress event after every stage.
+
+        Unlike embed_all_cvs, which waits for every CV to finish a stage before starting the next
+        one, each CV moves through parsing, cleaning and embedding on its own as soon as its PDF
+        is parsed. The chunks of each CV are embedded in one request as soon as it is cleaned, so the
+        first CVs are ready to be ranked while the rest of the batch is still being processed.
+
+        A parsed CV that duplicates an earlier CV of the batch is not processed further and gets a
+        "duplicate" event instead (see embed_all_cvs). If the CV it was merged into fails, the first
+        upload merged into that CV gets a "promoted" event and is processed in its place; the other
+        uploads of the group are then merged into the promoted one.
+
+        Yields:
+            tuple: A progress event and the CV's embedding data. The event is a dictionary with the
+                   "event" name ("parsed", "duplicate", "promoted", "cleaned", "embedded" or "failed"),
+                   "cv_id" and "cv_name"; failed events also carry the failing "stage" and the "reason",
+                   duplicate events the "duplicate_of" CV id and name and the "similarity", and promoted
+                   events the id and name of the failed CV ("replaces", "replaces_name") and the ids of
+                   the "duplicates" now merged into them. The embedding data, in the format of
+                   embed_all_cvs values, is only set for "embedded" events.
+        """
+        pdf_processor = PDFProcessor(self.cv_source)
+        duplicate_detector = self._new_duplicate_detector()
+        events = queue.Queue()
+        in_progress = 0
+        # The raw text of every merged upload, and for every duplicate group (keyed by the detector's
+        # representative) the CV currently processed for it, or None once all of them failed
+        duplicate_texts = {}
+        group_of = {}
+        active_cv = {}
+
+        def process_and_embed(cv_key, raw_pdf_text, chunk_executor):
+            cv_name = pdf_processor.pdf_names[cv_key]
+            try:
+                cv_text, contact_info = self._process_cv(raw_pdf_text, chunk_executor)
+                if cv_text is None:
+                    events.put((self._event("failed", cv_key, cv_name, stage="cleaning",
+                                            reason="cleaning request failed"), None))
+                    return
+                events.put((self._event("cleaned", cv_key, cv_name), None))
+                embeddings = self.embedder.embed_texts(chunk_text(
+                    cv_text, config.CV_CHUNKING_CONFIG["embedding_max_tokens"], config.embedding_encoding
+                ))
+                cv_data = self._build_cv_data(cv_name, embeddings, contact_info)
+                if cv_data:
+                    events.put((self._event("embedded", cv_key, cv_name), cv_data))
+                else:
+                    events.put((self._event("failed", cv_key, cv_name, stage="embedding",
+                                            reason="embedding request failed"), None))
+            except Exception as e:
+                config.app_logger.error(f"Error processing {cv_name}: {str(e)}")
+                events.put((self._event("failed", cv_key, cv_name, stage="cleaning", reason=str(e)), None))
+
+        def settle(event, cv_data, executor, chunk_executor):
+            # Passes on a worker event; a failed CV is replaced by the next upload merged into it
+            nonlocal in_progress
+            if event["event"] in ("embedded", "failed"):
+                in_progress -= 1
+                CVS_PROCESSED.labels(event["event"]).inc()
+            yield event, cv_data
+            if event["event"] != "failed" or event["cv_id"] not in group_of:
+                return
+            group_key = group_of[event["cv_id"]]
+            duplicate_keys = [
+                key for key, duplicate in self.duplicate_cvs.items() if duplicate["duplicate_of"] == event["cv_id"]
+            ]
+            if not duplicate_keys:
+                active_cv[group_key] = None
+                return
+            promoted_key = duplicate_keys[0]
+            other_keys = self._replace_representative(event["cv_id"], promoted_key, pdf_processor.pdf_names)
+            active_cv[group_key] = promoted_key
+            group_of[promoted_key] = group_key
+            yield self._event(
+                "promoted", promoted_key, pdf_processor.pdf_names[promoted_key], replaces=event["cv_id"],
+                replaces_name=event["cv_name"], duplicates=other_keys
+            ), None
+            executor.submit(
+                bind_usage(process_and_embed), promoted_key, duplicate_texts.pop(promoted_key), chunk_executor
+            )
+            in_progress += 1
+
+        try:
+            # CV tasks wait on chunk tasks, so chunks run on a separate pool to avoid starving it
+            with ThreadPoolExecutor(max_workers=config.CONCURRENCY_LIMIT) as chunk_executor, \
+                    ThreadPoolExecutor(max_workers=config.CONCURRENCY_LIMIT) as executor:
+                for cv_key, raw_pdf_text in pdf_processor.iter_extracted_texts():
+                    cv_name = pdf_processor.pdf_names[cv_key]
+                    duplicate = None
+                    group_key = cv_key
+                    if raw_pdf_text and duplicate_detector:
+                        duplicate = self._record_duplicate(
+                            duplicate_detector, cv_key, raw_pdf_text, pdf_processor.pdf_names
+                        )
+                    if duplicate:
+                        group_key = duplicate["duplicate_of"]
+                        if active_cv[group_key] is None:
+                            # Every earlier CV of the group failed, so this one is processed instead
+                            del self.duplicate_cvs[cv_key]
+                            duplicate = None
+                        elif active_cv[group_key] != group_key:
+                            duplicate.update(
+                                duplicate_of=active_cv[group_key],
+                                duplicate_of_name=pdf_processor.pdf_names[active_cv[group_key]]
+                            )
+                    if duplicate:
+                        duplicate_texts[cv_key] = raw_pdf_text
+                        yield self._event(
+                            "duplicate", cv_key, cv_name, duplicate_of=duplicate["duplicate_of"],
+                            duplicate_of_name=duplicate["duplicate_of_name"], similarity=duplicate["similarity"]
+                        ), None
+                    elif raw_pdf_text:
+                        group_of[cv_key] = group_key
+                        active_cv[group_key] = cv_key
+                        yield self._event("parsed", cv_key, cv_name), None
+                        executor.submit(bind_usage(process_and_embed), cv_key, raw_pdf_text, chunk_executor)
+                        in_progress += 1
+                    else:
+                        reason = pdf_processor.failed_pdfs.get(cv_key, "no text could be extracted")
+                        CVS_PROCESSED.labels("failed").inc()
+                        yield self._event("failed", cv_key, cv_name, stage="parsing", reason=reason), None
+
+                    # Pass on the events of CVs that finished a stage while this PDF was being parsed
+                    while not events.empty():
+                        yield from settle(*events.get_nowait(), executor, chunk_executor)
+
+                while in_progress:
+                    yield from settle(*events.get(), executor, chunk_executor)
+        finally:
+            # Counted once the batch is done, since a merged upload may still replace a failed CV
+            CVS_PROCESSED.labels("duplicate").inc(len(self.duplicate_cvs))
+
+    @staticmethod
+    def _new_duplicate_detector():
+        """
+        Creates a DuplicateDetector with the settings of config.DUPLICATE_DETECTION_CONFIG.
+
+        Returns:
+            DuplicateDetector or None: The detector, or None if duplicate detection is disabled.
         """
-        Extracts and cleans text from all PDF CVs in the specified folder using GPT-4.
+        settings = dict(config.DUPLICATE_DETECTION_CONFIG)
+        if not settings.pop("enabled"):
+            return None
+        return DuplicateDetector(**settings)
 
-        For each PDF CV:
-            1. Extracts raw text using PDFProcessor.
-            2. Cleans the extracted text using OpenAI's GPT-4.
+    def _record_duplicate(self, duplicate_detector, cv_key, raw_pdf_text, pdf_names):
+        """
+        Checks whether a CV duplicates an earlier CV of the batch and records it in `duplicate_cvs`.
+
+        Args:
+            duplicate_detector (DuplicateDetector): The detector holding the earlier CVs.
+            cv_key (str): The key of the CV.
+            raw_pdf_text (str): The raw text extracted from the CV PDF.
+            pdf_names (dict): The filename of every CV key.
 
         Returns:
-            dict: A dictionary where each key is the CV name and the value is the cleaned text.
-        """
-        cv_texts = {}
-        pdf_processor = PDFProcessor(self.cv_folder_path)
-        # Extract raw text from all PDFs
-        for cv_name, raw_pdf_text in pdf_processor.extract_texts_from_all_pdfs().items():
-            # Clean the extracted text using GPT-4
-            clean_text = self.openai_client.extract_text_using_gpt(raw_pdf_text)
-            cv_texts[cv_name] = clean_text
-        return cv_texts
+            dict or None: The CV's id and name, the id and name of the CV it was merged into and their
+                          shingle similarity, or None if the CV is not a duplicate.
+        """
+        duplicate = duplicate_detector.add(cv_key, raw_pdf_text)
+        if duplicate is None:
+            return None
+        representative_key, similarity = duplicate
+        self.duplicate_cvs[cv_key] = {
+            "cv_id": cv_key,
+            "cv_name": pdf_names[cv_key],
+            "duplicate_of": representative_key,
+            "duplicate_of_name": pdf_names[representative_key],
+            "similarity": round(similarity, 4)
+        }
+        config.app_logger.info(
+            f"{pdf_names[cv_key]} duplicates {pdf_names[representative_key]} (similarity {similarity:.2f}), "
+            f"merging it."
+        )
+        return self.duplicate_cvs[cv_key]
+
+    def _promote_duplicate(self, cv_key, duplicate_texts, must_have_terms, pdf_names, chunk_executor):
+        """
+        Processes the uploads merged into a CV that could not be cleaned until one of them succeeds.
+
+        The merged uploads are tried in the order they were merged; with must-have terms, those whose
+        raw text lacks a term are passed over. The first one that is cleaned replaces the failed CV as
+        the representative of the others and is removed from `duplicate_cvs`.
+
+        Args:
+            cv_key (str): The key of the CV that could not be cleaned.
+            duplicate_texts (dict): The raw PDF text of every merged upload, keyed by CV key.
+            must_have_terms (list of str or None): The words or phrases every CV must contain.
+            pdf_names (dict): The filename of every CV key.
+            chunk_executor (ThreadPoolExecutor): The thread pool that cleans the chunks of a CV.
+
+        Returns:
+            tuple or None: The key of the promoted upload and its _process_cv result, or None if no
+                           merged upload could be cleaned.
+        """
+        group = [key for key, duplicate in self.duplicate_cvs.items() if duplicate["duplicate_of"] == cv_key]
+        for duplicate_key in group:
+            raw_pdf_text = duplicate_texts[duplicate_key]
+            missing_terms = KeywordIndex({duplicate_key: raw_pdf_text}).missing_terms(must_have_terms or [])
+            if missing_terms[duplicate_key]:
+                continue
+            processed_cv = self._process_cv(raw_pdf_text, chunk_executor)
+            if processed_cv[0] is None:
+                config.app_logger.error(f"Cleaning failed for {pdf_names[duplicate_key]} too.")
+                continue
+
+            self._replace_representative(cv_key, duplicate_key, pdf_names)
+            return duplicate_key, processed_cv
+        return None
+
+    def _replace_representative(self, cv_key, duplicate_key, pdf_names):
+        """
+        Makes an upload merged into a failed CV the representative of the failed CV's other duplicates.
+
+        Args:
+            cv_key (str): The key of the CV that failed.
+            duplicate_key (str): The key of the merged upload that takes its place.
+            pdf_names (dict): The filename of every CV key.
+
+        Returns:
+            list of str: The keys of the other uploads, now merged into duplicate_key.
+        """
+        del self.duplicate_cvs[duplicate_key]
+        other_keys = [key for key, duplicate in self.duplicate_cvs.items() if duplicate["duplicate_of"] == cv_key]
+        for other_key in other_keys:
+            self.duplicate_cvs[other_key].update(duplicate_of=duplicate_key, duplicate_of_name=pdf_names[duplicate_key])
+        config.app_logger.info(f"Processing {pdf_names[duplicate_key]} in place of {pdf_names[cv_key]}.")
+        return other_keys
+
+    def _filter_by_terms(self, raw_cv_texts, must_have_terms, pdf_names):
+        """
+        Keeps the CVs whose raw text contains every must-have term and records the others as skipped.
+
+        Args:
+            raw_cv_texts (dict): The raw PDF text of every CV, keyed by CV key.
+            must_have_terms (list of str): The words or phrases every CV must contain.
+            pdf_names (dict): The filename of every CV key.
+
+        Returns:
+            dict: The raw texts of the CVs that contain all terms.
+        """
+        missing_terms = KeywordIndex(raw_cv_texts).missing_terms(must_have_terms)
+        passing_cv_texts = {}
+        for cv_key, raw_pdf_text in raw_cv_texts.items():
+            if missing_terms[cv_key]:
+                self.skipped_cvs[cv_key] = {"cv_name": pdf_names[cv_key], "missing_terms": missing_terms[cv_key]}
+                self.llm_calls_saved += self._estimate_llm_calls(raw_pdf_text)
+            else:
+                passing_cv_texts[cv_key] = raw_pdf_text
+
+        CVS_PROCESSED.labels("skipped").inc(len(self.skipped_cvs))
+        keyword_filter_stats.record(len(raw_cv_texts), len(self.skipped_cvs), self.llm_calls_saved)
+        config.app_logger.info(
+            f"Must-have terms filter kept {len(passing_cv_texts)} of {len(raw_cv_texts)} CV(s), "
+            f"saving about {self.llm_calls_saved} OpenAI call(s)."
+        )
+        return passing_cv_texts
+
+    def _estimate_llm_calls(self, raw_pdf_text):
+        """
+        Estimates the chat completions _process_cv would make for a CV.
+
+        Every cleaning chunk takes one completion (cleaning, or the combined extraction), and the
+        "two_call" mode adds a contact extraction call unless the regex extractor is confident enough.
+        Embedding inputs are not counted, since they are batched with those of other CVs.
+
+        Args:
+            raw_pdf_text (str): The raw text extracted from the CV PDF.
+
+        Returns:
+            int: The estimated number of chat completions.
+        """
+        llm_calls = len(chunk_text(raw_pdf_text, config.CV_CHUNKING_CONFIG["cleaning_max_tokens"]))
+        if config.CV_EXTRACTION_MODE != "combined":
+            _, confidence = self.contact_extractor.extract(raw_pdf_text)
+            if confidence < config.CONTACT_EXTRACTION_CONFIDENCE_THRESHOLD:
+                llm_calls += 1
+        return llm_calls
+
+    def _process_cv(self, raw_pdf_text, chunk_executor):
+        """
+        Runs the OpenAI stages for a single CV.
+
+        The raw text is split into chunks of config.CV_CHUNKING_CONFIG["cleaning_max_tokens"] tokens,
+        so long CVs are not cut off by the completion limit, and the chunks are processed in parallel.
+
+        Contact information is first extracted locally with the regex-based ContactExtractor. If its
+        confidence reaches config.CONTACT_EXTRACTION_CONFIDENCE_THRESHOLD, OpenAI is only used to clean
+        the text and the contact values are removed locally. Otherwise the OpenAI path below is used.
+
+        In "combined" mode (config.CV_EXTRACTION_MODE), a single JSON completion per chunk returns the
+        cleaned text without contact details and the contact fields as a dictionary. In "two_call" mode,
+        or if the combined call fails, the text is cleaned and the contact information is extracted with
+        two separate completions and removed from the text by string replacement.
+
+        Args:
+            raw_pdf_text (str): The raw text extracted from the CV PDF.
+            chunk_executor (ThreadPoolExecutor): The pool used to process the chunks of long CVs.
+
+        Returns:
+            tuple: The cleaned CV text without contact information, and the contact information
+                   (a {"email", "phone", "address"} dictionary from the regex extractor or the combined
+                   call, a string from the two-call path). Both are None if the text could not be cleaned.
+        """
+        chunks = chunk_text(raw_pdf_text, config.CV_CHUNKING_CONFIG["cleaning_max_tokens"])
+
+        contact_info, confidence = self.contact_extractor.extract(raw_pdf_text)
+        if confidence >= config.CONTACT_EXTRACTION_CONFIDENCE_THRESHOLD:
+            contact_extraction_stats.record_fast_path(
+                llm_call_saved=config.CV_EXTRACTION_MODE != "combined"
+            )
+            cv_text = self._clean_chunks(chunks, chunk_executor)
+            if cv_text is None:
+                return None, None
+            return self.contact_extractor.remove_contact_info(cv_text, contact_info), contact_info
+        contact_extraction_stats.record_llm_fallback()
+
+        if config.CV_EXTRACTION_MODE == "combined":
+            cv_contents = self._map_chunks(self.openai_client.extract_cv_content, chunks, chunk_executor)
+            if all(cv_contents):
+                contact_info = {
+                    # Contact details usually appear once, so take the first chunk that has each field
+                    field: next((content["contact_info"][field] for content in cv_contents
+                                 if content["contact_info"][field]), None)
+                    for field in ("email", "phone", "address")
+                }
+                return "\n".join(content["cleaned_text"] for content in cv_contents), contact_info
+            config.app_logger.warning("Combined CV extraction failed, falling back to two separate calls.")
+
+        # Clean the extracted text using GPT-4
+        cv_text = self._clean_chunks(chunks, chunk_executor)
+        if cv_text is None:
+            return None, None
+        # Extract contact information from the CV text
+        contact_info = self.openai_client.extract_contact_info(cv_text)
+        if contact_info is None:
+            config.app_logger.warning("Contact extraction failed, keeping the CV without contact information.")
+            return cv_text, ""
+        # Remove contact information from the CV text
+        return cv_text.replace(contact_info, ""), contact_info
+
+    def _clean_chunks(self, chunks, chunk_executor):
+        """
+        Cleans the chunks of a CV using OpenAI and joins the cleaned chunks.
+
+        Args:
+            chunks (list of str): The chunks of the raw CV text.
+            chunk_executor (ThreadPoolExecutor): The pool used for CVs with several chunks.
+
+        Returns:
+            str or None: The cleaned CV text, or None if any chunk could not be cleaned.
+        """
+        cleaned_chunks = self._map_chunks(self.openai_client.extract_text_using_gpt, chunks, chunk_executor)
+        if any(cleaned_chunk is None for cleaned_chunk in cleaned_chunks):
+            return None
+        return "\n".join(cleaned_chunks)
+
+    @staticmethod
+    def _map_chunks(function, chunks, chunk_executor):
+        """
+        Applies a function to every chunk of a CV, in parallel when there are several chunks.
+
+        Args:
+            function (callable): The function to apply to each chunk.
+            chunks (list of str): The chunks of the CV text.
+            chunk_executor (ThreadPoolExecutor): The pool used for CVs with several chunks.
+
+        Returns:
+            list: The results in chunk order.
+        """
+        if len(chunks) == 1:
+            return [function(chunks[0])]
+        return list(chunk_executor.map(bind_usage(function), chunks))
+
+    def _build_cv_data(self, cv_name, embeddings, contact_info):
+        """
+        Combines the chunk embeddings and contact information of a CV into its embedding data.
+
+        Args:
+            cv_name (str): The filename of the CV.
+            embeddings (list): The embedding vectors of the CV's chunks (None for failed chunks).
+            contact_info (str or dict): The contact information extracted from the CV.
+
+        Returns:
+            dict or None: The CV name, its embedding (the normalized mean of its chunk vectors), the
+                          individual chunk embeddings for CVs with several chunks, and contact information.
+                          None if any chunk could not be embedded.
+        """
+        if not all(embeddings):
+            config.app_logger.error(f"Embedding failed for {cv_name}, skipping it.")
+            return None
+
+        # Add contact information after embedding
+        cv_data = {
+            "cv_name": cv_name,
+            "embedding": self._mean_pool(embeddings),
+            "contact_info": contact_info,  # Add contact information
+        }
+        if len(embeddings) > 1:
+            cv_data["chunk_embeddings"] = embeddings
+        return cv_data
+
+    @staticmethod
+    def _event(event, cv_key, cv_name, **fields):
+        """
+        Builds a progress event for iter_cv_events.
+
+        Args:
+            event (str): The event name.
+            cv_key (str): The key of the CV.
+            cv_name (str): The filename of the CV.
+            **fields: Additional event fields.
+
+        Returns:
+            dict: The progress event.
+        """
+        return {"event": event, "cv_id": cv_key, "cv_name": cv_name, **fields}
+
+    @staticmethod
+    def _mean_pool(embeddings):
+        """
+        Combines chunk embeddings into a single unit-length CV embedding.
+
+        Args:
+            embeddings (list): The chunk embedding vectors.
+
+        Returns:
+            list: The normalized mean of the chunk vectors (the vector itself for a single chunk).
+        """
+        if len(embeddings) == 1:
+            return embeddings[0]
+        mean = np.mean(np.asarray(embeddings, dtype=np.float32), axis=0)
+        norm = np.linalg.norm(mean)
+        return (mean / norm if norm else mean).tolist()
@@ -1,41 +1,170 @@
 import openai
+from concurrent.futures import ThreadPoolExecutor
 
 import config
+from utils.embedding_cache import EmbeddingCache, get_embedding_cache
+from utils.metrics import track_stage
+from utils.rate_limiter import estimate_embedding_tokens, get_rate_limiter
+from utils.token_usage import bind_usage, record_usage
 
 
 class Embedder:
     def __init__(self):
-        self._configure_openai()
+        self.cache = get_embedding_cache()
+        self.model_name = f"{config.ADA_CONFIG['model']}/{config.ADA_CONFIG['deployment_name']}"
 
-    def _configure_openai(self):
+    @staticmethod
+    def _api_params():
         """
-        Configures OpenAI with the necessary API key and endpoint.
+        Returns the Azure OpenAI connection parameters of the embedding deployment.
+
+        They are passed with every request instead of being written to the global openai settings.
+
+        Returns:
+            dict: The API type, key, base URL and version.
+        """
+        return {
+            "api_type": "azure",
+            "api_key": config.ADA_CONFIG["api_key"],
+            "api_base": config.ADA_CONFIG["api_base"],
+            "api_version": config.ADA_CONFIG["api_version"]
+        }
+
+    def warm_up(self):
         """
-        openai.api_type = "azure"
-        openai.api_key = config.ADA_CONFIG["api_key"]
-        openai.api_base = config.ADA_CONFIG["api_base"]
-        openai.api_version = config.ADA_CONFIG["api_version"]
+        Sends a minimal embedding request, bypassing the cache, to open a connection to the API.
+
+        Returns:
+            bool: True if the request succeeded.
+        """
+        return self._create_embeddings(["warm-up"])[0] is not None
 
     def embed_text(self, text):
         """
         Generates an embedding for the input text using the OpenAI API.
 
+        Embeddings are looked up in the persistent embedding cache first, so texts that were
+        already embedded with the same model are not sent to the API again.
+
         Args:
             text (str): The text to be embedded.
 
         Returns:
             list: The embedding vector.
         """
+        return self.embed_texts([text])[0]
+
+    def embed_texts(self, texts):
+        """
+        Generates embeddings for several input texts with as few OpenAI API calls as possible.
+
+        Cached embeddings are served from the embedding cache. The remaining texts are packed into
+        multi-input requests that respect the per-request input count and token limits in
+        config.EMBEDDING_BATCH_CONFIG (tokens are counted with config.embedding_encoding), and the returned
+        vectors are mapped back to their inputs by index.
+
+        Args:
+            texts (list of str): The texts to be embedded.
+
+        Returns:
+            list: The embedding vectors in the same order as the input texts. An entry is None
+                  if its text could not be embedded.
+        """
+        embeddings = [None] * len(texts)
+
+        # Serve cached embeddings and group the remaining positions by their text
+        pending_positions = {}
+        for position, text in enumerate(texts):
+            cache_key = EmbeddingCache.make_key(text, self.model_name) if self.cache else None
+            cached_embedding = self.cache.get(cache_key) if cache_key else None
+            if cached_embedding is not None:
+                embeddings[position] = cached_embedding
+            else:
+                pending_positions.setdefault(text, []).append(position)
+
+        batches = self._pack_batches(list(pending_positions))
+        if not batches:
+            return embeddings
+
+        # Send the batched requests concurrently, bounded by config.CONCURRENCY_LIMIT
+        with ThreadPoolExecutor(max_workers=min(config.CONCURRENCY_LIMIT, len(batches))) as executor:
+            batch_embeddings = list(executor.map(bind_usage(self._create_embeddings), batches))
+
+        for batch, embeddings_of_batch in zip(batches, batch_embeddings):
+            for text, embedding in zip(batch, embeddings_of_batch):
+                if embedding is None:
+                    continue
+                if self.cache:
+                    self.cache.put(EmbeddingCache.make_key(text, self.model_name), embedding)
+                for position in pending_positions[text]:
+                    embeddings[position] = embedding
+        return embeddings
+
+    def _pack_batches(self, texts):
+        """
+        Packs texts into request batches bounded by input count and token count.
+
+        A text that is longer than the per-request token budget is placed in a batch of its own.
+
+        Args:
+            texts (list of str): The texts to be packed.
+
+        Returns:
+            list: A list of batches, each a list of texts.
+        """
+        max_inputs = config.EMBEDDING_BATCH_CONFIG["max_inputs"]
+        max_tokens = config.EMBEDDING_BATCH_CONFIG["max_tokens_per_request"]
+
+        batches = []
+        batch, batch_tokens = [], 0
+        for text in texts:
+            text_tokens = len(config.embedding_encoding.encode(text))
+            if batch and (len(batch) >= max_inputs or batch_tokens + text_tokens > max_tokens):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(text)
+            batch_tokens += text_tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _create_embeddings(self, batch):
+        """
+        Sends one multi-input embedding request to the OpenAI API.
+
+        The request waits for the embedding deployment's quota and rate-limited or failed requests are
+        retried by the shared RateLimiter; the error is only logged once the retries are exhausted.
+
+        Args:
+            batch (list of str): The texts to be embedded in a single request.
+
+        Returns:
+            list: The embedding vectors in the same order as the batch, or a list of None values
+                  if the request failed.
+        """
         try:
-            response = openai.Embedding.create(
-                input=text,
-                engine=config.ADA_CONFIG["deployment_name"],
-            )
-            return response['data'][0]['embedding']
+            with track_stage("embedding"):
+                response = get_rate_limiter("embedding").call(
+                    openai.Embedding.create,
+                    estimate_embedding_tokens(batch),
+                    input=batch,
+                    engine=config.ADA_CONFIG["deployment_name"],
+                    **self._api_params()
+                )
+            record_usage("embedding", response.get('usage'), lambda: estimate_embedding_tokens(batch))
+            embeddings = [None] * len(batch)
+            for item in response['data']:
+                embeddings[item['index']] = item['embedding']
+            return embeddings
         except openai.error.APIConnectionError as e:
             config.app_logger.error(f"Failed to connect to OpenAI API: {e}")
         except openai.error.APIError as e:
             config.app_logger.error(f"OpenAI API returned an error: {e}")
         except openai.error.RateLimitError as e:
             config.app_logger.error(f"OpenAI API rate limit exceeded: {e}")
-        return None
\ No newline at end of file
+        except openai.error.InvalidRequestError as e:
+            config.app_logger.error(f"OpenAI API rejected the embedding request: {e}")
+        except openai.error.OpenAIError as e:
+            # e.g. a timeout that outlasted the retries; the batch fails without failing the other batches
+            config.app_logger.error(f"OpenAI embedding request failed: {e}")
+        return [None] * len(batch)
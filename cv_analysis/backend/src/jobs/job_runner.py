@@ -0,0 +1,127 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.embedder.cv_embedder import CVEmbedder
+from src.embedder.job_posting_embedder import JobPostingEmbedder
+from utils.job_store import get_job_store
+from utils.search_backend import rank_cvs
+from utils.token_usage import track_usage
+import config
+
+
+class JobRunner:
+    """
+    Runs asynchronous CV matching jobs on a local worker pool.
+
+    Each job processes its pending CVs with CVEmbedder.iter_cv_events and saves every CV to the
+    JobStore as soon as it is embedded, then ranks all of the job's CVs against the job description.
+    Jobs that were queued or running when the server stopped can be resumed with resume_unfinished_jobs;
+    they continue with the CVs that were not finished yet, including the uploads merged into a CV that
+    did not get embedded. Duplicates are only detected among the CVs processed in the same run: the
+    PDFs of embedded CVs are not kept, so a resumed job cannot merge a pending CV into a CV that was
+    embedded before the restart.
+    """
+
+    def __init__(self, job_store, max_workers):
+        """
+        Initializes the JobRunner.
+
+        Args:
+            job_store (JobStore): The store holding the job state.
+            max_workers (int): The number of jobs processed at the same time.
+        """
+        self.job_store = job_store
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job-runner")
+        self._active_job_ids = set()
+        self._lock = threading.Lock()
+
+    def submit(self, job_id):
+        """
+        Schedules a job on the worker pool, unless it is already scheduled.
+
+        Args:
+            job_id (str): The id of the job.
+        """
+        with self._lock:
+            if job_id in self._active_job_ids:
+                return
+            self._active_job_ids.add(job_id)
+        self.executor.submit(self._run, job_id)
+
+    def resume_unfinished_jobs(self):
+        """
+        Schedules all jobs that were queued or running, e.g. before a restart.
+
+        Returns:
+            int: The number of resumed jobs.
+        """
+        job_ids = self.job_store.get_unfinished_job_ids()
+        for job_id in job_ids:
+            self.submit(job_id)
+        if job_ids:
+            config.app_logger.info(f"Resumed {len(job_ids)} unfinished job(s).")
+        return len(job_ids)
+
+    def _run(self, job_id):
+        """
+        Processes the pending CVs of a job and ranks the job's CVs.
+
+        Args:
+            job_id (str): The id of the job.
+        """
+        with track_usage() as usage:
+            try:
+                self.job_store.set_status(job_id, "running")
+                pending_cvs = self.job_store.get_pending_cvs(job_id)
+                config.app_logger.info(f"Job {job_id}: processing {len(pending_cvs)} pending CV(s)")
+
+                if pending_cvs:
+                    for event, cv_data in CVEmbedder(pending_cvs).iter_cv_events():
+                        if cv_data:
+                            self.job_store.save_cv_embedding(job_id, event["cv_id"], cv_data)
+                        elif event["event"] == "failed":
+                            self.job_store.save_cv_failure(
+                                job_id, event["cv_id"], f"{event['stage']} failed: {event['reason']}"
+                            )
+                        elif event["event"] == "duplicate":
+                            self.job_store.save_cv_duplicate(job_id, event["cv_id"], event["duplicate_of"])
+                        elif event["event"] == "promoted":
+                            for duplicate_id in event["duplicates"]:
+                                self.job_store.save_cv_duplicate(job_id, duplicate_id, event["cv_id"])
+
+                job_embedding = JobPostingEmbedder(self.job_store.get_job_description(job_id)).get_job_embedding()
+                if job_embedding is None:
+                    raise RuntimeError("The job description could not be embedded.")
+
+                cv_embeddings = self.job_store.get_cv_embeddings(job_id)
+                similar_cvs = rank_cvs(cv_embeddings, job_embedding, 10) if cv_embeddings else []
+                self.job_store.set_status(job_id, "completed", result=similar_cvs)
+                config.app_logger.info(f"Job {job_id}: completed, found {len(similar_cvs)} similar CV(s).")
+
+            except Exception as e:
+                config.app_logger.error(f"Job {job_id} failed: {str(e)}")
+                self.job_store.set_status(job_id, "failed", error=str(e))
+            finally:
+                summary = usage.summary()
+                config.app_logger.info(
+                    f"Job {job_id}: used {summary['total_tokens']} tokens in {summary['calls']} OpenAI call(s)."
+                )
+                with self._lock:
+                    self._active_job_ids.discard(job_id)
+
+
+_job_runner = None
+_job_runner_lock = threading.Lock()
+
+
+def get_job_runner():
+    """
+    Returns the process-wide job runner, creating it on first use.
+
+    Returns:
+        JobRunner: The shared job runner.
+    """
+    global _job_runner
+    with _job_runner_lock:
+        if _job_runner is None:
+            _job_runner = JobRunner(get_job_store(), config.JOB_CONFIG["max_workers"])
+    return _job_runner
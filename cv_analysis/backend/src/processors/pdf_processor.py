@@ -1,23 +1,177 @@
+import io
 import os
+import signal
+import threading
+import time
+import multiprocessing
+from concurrent.futures import (
+    CancelledError, FIRST_COMPLETED, ProcessPoolExecutor, TimeoutError as FuturesTimeoutError, wait
+)
+from concurrent.futures.process import BrokenProcessPool
 import PyPDF2
 
+import config
+from utils.metrics import observe_stage
+
+
+class PDFExtractionTimeout(Exception):
+    """
+    Raised inside a worker process when a PDF takes longer than the per-file timeout to parse.
+    """
+
+
+def _raise_extraction_timeout(signum, frame):
+    raise PDFExtractionTimeout()
+
+
+def _limit_worker_memory(max_memory_mb):
+    """
+    Caps the address space of a PDF worker process.
+
+    The limit is the worker's current virtual memory size plus `max_memory_mb`, so a runaway
+    document raises MemoryError inside the worker instead of exhausting the host.
+
+    Args:
+        max_memory_mb (int): The additional memory in megabytes a worker may allocate.
+    """
+    try:
+        import resource
+        with open("/proc/self/status") as status_file:
+            vm_size_kb = next(
+                int(line.split()[1]) for line in status_file if line.startswith("VmSize:")
+            )
+        limit = vm_size_kb * 1024 + max_memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, OSError, StopIteration, ValueError):
+        # Memory limits are only supported on Linux; other platforms run without the guard
+        pass
+
+
+def _extract_text_worker(pdf_file, timeout_seconds):
+    """
+    Extracts text from a single PDF inside a worker process.
+
+    Args:
+        pdf_file (str or bytes): The path to the PDF file, or the PDF content itself.
+        timeout_seconds (float): The maximum time allowed to parse the file.
+
+    Returns:
+        tuple: The extracted text (or None), an error description (or None) and the parsing time in seconds.
+    """
+    started = time.perf_counter()
+    signal.signal(signal.SIGALRM, _raise_extraction_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout_seconds)
+    try:
+        with (io.BytesIO(pdf_file) if isinstance(pdf_file, bytes) else open(pdf_file, 'rb')) as file:
+            reader = PyPDF2.PdfReader(file)
+            page_texts = []
+            # Iterate through each page in the PDF and extract text
+            for page in reader.pages:
+                page_text = page.extract_text()
+                if page_text:
+                    page_texts.append(page_text)
+            return ''.join(page_texts), None, time.perf_counter() - started
+    except PDFExtractionTimeout:
+        return None, f"timed out after {timeout_seconds} seconds", time.perf_counter() - started
+    except MemoryError:
+        return None, "exceeded the worker memory limit", time.perf_counter() - started
+    except Exception as e:
+        return None, str(e), time.perf_counter() - started
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+# A file running for this many per-file timeouts is considered stuck in a hung worker
+HUNG_WORKER_TIMEOUT_FACTOR = 3
+
+
+def _get_process_pool():
+    """
+    Returns the process-wide PDF worker pool, creating it on first use.
+
+    The pool uses the "forkserver" start method so that workers are not forked from the
+    multi-threaded API process.
+
+    Returns:
+        ProcessPoolExecutor: The shared PDF worker pool.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=config.PDF_PROCESSING_CONFIG["max_workers"],
+                mp_context=multiprocessing.get_context("forkserver"),
+                initializer=_limit_worker_memory,
+                initargs=(config.PDF_PROCESSING_CONFIG["max_memory_mb"],)
+            )
+        return _process_pool
+
+
+def _retire_process_pool(pool):
+    """
+    Replaces a broken or stuck PDF worker pool without cancelling the work other requests queued on it.
+
+    The next request starts a fresh pool, while the retired pool finishes the extractions already
+    submitted to it. Every extraction ends within the per-file timeout unless its worker hangs outside
+    of Python code, so workers still alive once the retired pool's queue could have drained are hung
+    and are terminated.
+
+    Args:
+        pool (ProcessPoolExecutor): The pool to retire.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+
+    processes = list((pool._processes or {}).values())
+    rounds = -(-len(pool._pending_work_items) // config.PDF_PROCESSING_CONFIG["max_workers"])
+    pool.shutdown(wait=False)
+    reaper = threading.Timer(
+        config.PDF_PROCESSING_CONFIG["timeout_seconds"] * (rounds + 1), _terminate_processes, args=(processes,)
+    )
+    reaper.daemon = True
+    reaper.start()
+
+
+def _terminate_processes(processes):
+    """
+    Terminates the worker processes of a retired pool that are still alive.
+
+    Args:
+        processes (list of multiprocessing.Process): The worker processes.
+    """
+    for process in processes:
+        if process.is_alive():
+            config.app_logger.warning(f"Terminating hung PDF worker process {process.pid}")
+            process.terminate()
+
 
 class PDFProcessor:
     """
-    A class to handle the extraction of text from PDF files in a specified folder.
+    A class to handle the extraction of text from PDF files in a specified folder or in memory.
 
     This class provides methods to extract text from individual PDF files as well as
-    to process all PDF files within a given directory.
+    to process all PDF files within a given directory or a set of uploaded PDF streams.
+    Bulk extraction runs on a shared process pool sized to the host's cores, with a
+    per-file timeout and memory guard.
     """
 
-    def __init__(self, pdf_folder_path):
+    def __init__(self, pdf_source):
         """
-        Initializes the PDFProcessor with the path to the PDF folder.
+        Initializes the PDFProcessor with the PDFs to process.
 
         Args:
-            pdf_folder_path (str): The path to the folder containing PDF files.
+            pdf_source (str or dict): The path to the folder containing PDF files, or a dictionary
+                mapping a unique upload id to a (filename, content) tuple, where content is the PDF
+                as bytes or a binary file-like object such as the stream behind an UploadFile.
         """
-        self.pdf_folder_path = pdf_folder_path
+        self.pdf_source = pdf_source
+        self.pdf_names = {}
+        self.failed_pdfs = {}
 
     def extract_text_from_pdf(self, pdf_file):
         """
@@ -25,7 +179,7 @@ class PDFProcessor:
 
         This method attempts to read and extract text from each page of the specified PDF file
         using PyPDF2. If an error occurs during the process, it catches the exception,
-        prints an error message, and returns None.
+        logs an error message, and returns None.
 
         Args:
             pdf_file (str): The path to the PDF file from which to extract text.
@@ -36,35 +190,156 @@ class PDFProcessor:
         try:
             with open(pdf_file, 'rb') as file:
                 reader = PyPDF2.PdfReader(file)
-                text = ''
-                # Iterate through each page in the PDF and extract text
-                for page_num in range(len(reader.pages)):
-                    page_text = reader.pages[page_num].extract_text()
+                # Collect the page texts and join them once instead of concatenating repeatedly
+                page_texts = []
+                for page in reader.pages:
+                    page_text = page.extract_text()
                     if page_text:
-                        text += page_text
-                return text
+                        page_texts.append(page_text)
+                return ''.join(page_texts)
         except Exception as e:
-            print(f"Error reading {pdf_file}: {e}")
+            config.app_logger.error(f"Error reading {pdf_file}: {e}")
             return None
 
     def extract_texts_from_all_pdfs(self):
         """
-        Extracts text from all PDF files in the specified folder.
+        Extracts text from all PDF files in the specified folder or upload mapping.
+
+        For a folder, this method scans it for files with a `.pdf` extension. For in-memory uploads,
+        the PDF streams are read directly, so no temporary files or directory scans are needed.
+        Text is extracted from every PDF in parallel on the shared PDF process pool. PDFs that fail,
+        exceed the per-file timeout or the worker memory limit are left out of the result and
+        recorded in `failed_pdfs` with the reason. `pdf_names` maps every key to its filename.
+
+        Returns:
+            dict: A dictionary where each key is the PDF filename (folder mode) or the upload id
+                  (in-memory mode) and the value is the extracted text content of that PDF.
+        """
+        return {pdf_key: text for pdf_key, text in self.iter_extracted_texts() if text}
+
+    def iter_extracted_texts(self):
+        """
+        Extracts text from all PDF files and yields each result as soon as its worker finishes.
+
+        This is the incremental form of extract_texts_from_all_pdfs, used to start processing the
+        first CVs while the remaining PDFs are still being parsed.
+
+        Yields:
+            tuple: The PDF key and its extracted text, in completion order. The text is None (or empty)
+                   for PDFs that could not be read; failures are also recorded in `failed_pdfs`.
+        """
+        pdf_files = self._collect_pdf_files()
+        if not pdf_files:
+            return
+
+        timeout_seconds = config.PDF_PROCESSING_CONFIG["timeout_seconds"]
+        pool = _get_process_pool()
+        try:
+            futures = self._submit_all(pool, pdf_files, timeout_seconds)
+        except BrokenProcessPool:
+            # A previous request left the pool broken; start a fresh one and retry once
+            _retire_process_pool(pool)
+            pool = _get_process_pool()
+            futures = self._submit_all(pool, pdf_files, timeout_seconds)
+
+        # Each worker enforces its own timeout; a file is only given up on as hung once it has been
+        # running for HUNG_WORKER_TIMEOUT_FACTOR timeouts, so files queued behind this or other requests'
+        # work are never failed early. A running future may still wait in the call queue for one file.
+        hung_after = timeout_seconds * HUNG_WORKER_TIMEOUT_FACTOR
+        started = {}
+        pending = set(futures)
+        pool_retired = False
+        try:
+            while pending:
+                done, _ = wait(pending, timeout=min(timeout_seconds, 1.0), return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.discard(future)
+                    pdf_key = futures[future]
+                    try:
+                        text, error, seconds = future.result()
+                        observe_stage("pdf_parsing", seconds, success=error is None)
+                    except BrokenProcessPool as e:
+                        text, error = None, f"worker process died: {e}"
+                        if not pool_retired:
+                            _retire_process_pool(pool)
+                            pool_retired = True
+                    except CancelledError:
+                        text, error = None, "extraction was cancelled"
+                    except FuturesTimeoutError:
+                        text, error = None, "extraction timed out"
+                    if not text and error:
+                        self._record_failure(pdf_key, error)
+                    yield pdf_key, text
+
+                now = time.monotonic()
+                for future in list(pending):
+                    if not future.running():
+                        continue
+                    if now - started.setdefault(future, now) > hung_after:
+                        pending.discard(future)
+                        if not pool_retired:
+                            # Retiring the pool lets its reaper terminate the hung worker; this request's
+                            # files queued behind it then fail with BrokenProcessPool instead of waiting forever
+                            _retire_process_pool(pool)
+                            pool_retired = True
+                        self._record_failure(futures[future], "did not finish before the extraction deadline")
+                        yield futures[future], None
+        finally:
+            # Only this request's futures are cancelled, e.g. when the caller stops iterating early
+            for future in pending:
+                future.cancel()
+
+    def _record_failure(self, pdf_key, reason):
+        """
+        Records and logs a PDF that could not be processed.
 
-        This method scans the PDF folder for files with a `.pdf` extension, extracts text
-        from each valid PDF file using the `extract_text_from_pdf` method, and aggregates
-        the results into a dictionary.
+        Args:
+            pdf_key (str): The key of the PDF.
+            reason (str): Why the PDF was skipped.
+        """
+        self.failed_pdfs[pdf_key] = reason
+        config.app_logger.warning(f"Skipped {self.pdf_names[pdf_key]}: {reason}")
+
+    def _collect_pdf_files(self):
+        """
+        Resolves the PDF source into the inputs passed to the extraction workers.
 
         Returns:
-            dict: A dictionary where each key is the PDF filename and the value is the
-                  extracted text content of that PDF.
+            dict: A dictionary mapping each PDF key to a file path (folder mode) or to the
+                  PDF content as bytes (in-memory mode).
         """
-        pdf_texts = {}
+        if isinstance(self.pdf_source, dict):
+            pdf_files = {}
+            for upload_id, (filename, content) in self.pdf_source.items():
+                if hasattr(content, 'read'):
+                    content.seek(0)
+                    content = content.read()
+                self.pdf_names[upload_id] = filename
+                pdf_files[upload_id] = content
+            return pdf_files
+
+        pdf_files = {}
         # Iterate through all files in the PDF folder
-        for filename in os.listdir(self.pdf_folder_path):
+        for filename in os.listdir(self.pdf_source):
             if filename.lower().endswith('.pdf'):
-                pdf_path = os.path.join(self.pdf_folder_path, filename)
-                text = self.extract_text_from_pdf(pdf_path)
-                if text:
-                    pdf_texts[filename] = text
-        return pdf_texts
+                self.pdf_names[filename] = filename
+                pdf_files[filename] = os.path.join(self.pdf_source, filename)
+        return pdf_files
+
+    @staticmethod
+    def _submit_all(pool, pdf_files, timeout_seconds):
+        """
+        Submits one extraction task per PDF file to the worker pool.
+
+        Args:
+            pool (ProcessPoolExecutor): The PDF worker pool.
+            pdf_files (dict): A dictionary mapping PDF keys to file paths or PDF bytes.
+            timeout_seconds (float): The per-file parsing timeout.
+
+        Returns:
+            dict: A dictionary mapping each submitted future to its PDF key.
+        """
+        return {
+            pool.submit(_extract_text_worker, pdf_file, timeout_seconds): pdf_key
+            for pdf_key, pdf_file in pdf_files.items()
+        }
@@ -0,0 +1,17 @@
+import os
+import sys
+
+# config reads the Azure settings at import time; the tests never call Azure, so placeholders suffice
+for _name, _value in {
+    "COGNITIVE_SEARCH_API_KEY": "test",
+    "COGNITIVE_SEARCH_ENDPOINT": "https://test.search.windows.net",
+    "COGNITIVE_SEARCH_INDEX_NAME": "test-cvs",
+    "AZURE_OPENAI_API_KEY": "test",
+    "AZURE_OPENAI_API_BASE": "https://test.openai.azure.com",
+    "ADA_API_VERSION": "2023-05-15",
+    "ADA_MODEL": "text-embedding-ada-002",
+    "ADA_DEPLOYMENT_NAME": "test-ada"
+}.items():
+    os.environ.setdefault(_name, _value)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
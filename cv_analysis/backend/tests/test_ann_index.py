@@ -0,0 +1,131 @@
+import numpy as np
+import pytest
+import config
+from utils.ann_index import IVFIndex
+
+DIMENSION = 16
+
+
+def clustered_vectors(count, clusters=4, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, DIMENSION))
+    vectors = centers[np.arange(count) % clusters] + 0.1 * rng.normal(size=(count, DIMENSION))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def exact_top_ids(cv_ids, vectors, query, top_k):
+    order = np.argsort(-(vectors @ (query / np.linalg.norm(query))))
+    return [cv_ids[index] for index in order[:top_k]]
+
+
+def top_ids(index, query, top_k=5, n_probe=None):
+    return [result["cv_id"] for result in index.search_similar_cv(query, top_k=top_k, n_probe=n_probe)]
+
+
+def test_untrained_index_searches_exactly():
+    vectors = clustered_vectors(40)
+    cv_ids = [f"cv{row}" for row in range(40)]
+    index = IVFIndex(encoding="float32", train_size=0, dimension=DIMENSION)
+    index.add_vectors(cv_ids, vectors)
+
+    assert not index.is_trained
+    assert index.stats()["lists"] == 1
+    for query in vectors[:5]:
+        assert top_ids(index, query) == exact_top_ids(cv_ids, vectors, query, 5)
+
+
+def test_index_trains_itself_and_probing_every_list_is_exact():
+    vectors = clustered_vectors(200)
+    cv_ids = [f"cv{row}" for row in range(200)]
+    index = IVFIndex(n_lists=4, n_probe=4, encoding="float32", train_size=100, dimension=DIMENSION)
+    index.add_vectors(cv_ids[:120], vectors[:120])
+    assert index.is_trained
+
+    # Rows added after training are assigned to the existing centroids
+    index.add_vectors(cv_ids[120:], vectors[120:])
+    stats = index.stats()
+    assert stats["lists"] == 4 and stats["rows"] == 200 and stats["cvs"] == 200
+    for query in vectors[::37]:
+        assert top_ids(index, query) == exact_top_ids(cv_ids, vectors, query, 5)
+    # Probing a single list still finds a row's own CV, which lives in the nearest list
+    assert top_ids(index, vectors[7], top_k=1, n_probe=1) == ["cv7"]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "index.npz")
+    vectors = clustered_vectors(120)
+    index = IVFIndex(n_lists=4, n_probe=2, train_size=60, dimension=DIMENSION)
+    index.add_embeddings({
+        f"cv{row}": {"embedding": vectors[row].tolist(), "cv_name": f"cv{row}.pdf", "contact_info": "x@mail.com"}
+        for row in range(120)
+    })
+    index.delete_documents(["cv3", "cv50"])
+    index.save(path)
+
+    loaded = IVFIndex.load(path, n_probe=4)
+    assert loaded.n_probe == 4
+    assert loaded.encoding == "int8"
+    assert loaded.indexed_cv_ids() == index.indexed_cv_ids()
+    assert {key: value for key, value in loaded.stats().items() if key != "n_probe"} == \
+        {key: value for key, value in index.stats().items() if key != "n_probe"}
+    np.testing.assert_array_equal(loaded.centroids, index.centroids)
+    for query in vectors[::11]:
+        assert loaded.search_similar_cv(query, n_probe=4) == index.search_similar_cv(query, n_probe=4)
+    result = loaded.search_similar_cv(vectors[10], top_k=1)[0]
+    assert (result["cv_id"], result["cv_name"], result["contact_info"]) == ("cv10", "cv10.pdf", "x@mail.com")
+
+    # The rows freed by the deletes are reused after loading
+    loaded.add_vectors(["new"], vectors[3][None, :])
+    assert loaded.stats()["rows"] == 119
+    assert top_ids(loaded, vectors[3], top_k=1, n_probe=4) == ["new"]
+
+
+def test_load_of_a_missing_file_returns_an_empty_index(tmp_path):
+    index = IVFIndex.load(str(tmp_path / "missing.npz"), n_probe=3, encoding="float16", dimension=DIMENSION)
+
+    assert len(index) == 0
+    assert (index.n_probe, index.encoding, index.dimension) == (3, "float16", DIMENSION)
+
+
+def test_deletes_keep_the_remaining_rows_addressable():
+    vectors = clustered_vectors(100)
+    cv_ids = [f"cv{row}" for row in range(100)]
+    index = IVFIndex(n_lists=4, n_probe=4, encoding="float32", train_size=50, dimension=DIMENSION)
+    index.add_vectors(cv_ids, vectors)
+
+    # Removing a row moves the last row of its list into its slot (see IVFIndex._remove_row)
+    deleted = set(cv_ids[::3])
+    assert index.delete_documents(list(deleted) + ["missing"]) == len(deleted)
+    assert index.stats()["rows"] == 100 - len(deleted)
+    remaining = [row for row, cv_id in enumerate(cv_ids) if cv_id not in deleted]
+    for row in remaining:
+        assert top_ids(index, vectors[row], top_k=1) == [cv_ids[row]]
+    remaining_ids = [cv_ids[row] for row in remaining]
+    assert top_ids(index, vectors[0], top_k=5) == exact_top_ids(remaining_ids, vectors[remaining], vectors[0], 5)
+
+    # Deleting the rows again after the moves must not touch other CVs
+    assert index.delete_documents(remaining_ids[:10]) == 10
+    for row in remaining[10:]:
+        assert top_ids(index, vectors[row], top_k=1) == [cv_ids[row]]
+
+
+def test_chunked_cvs_are_replaced_with_all_their_rows(monkeypatch):
+    monkeypatch.setitem(config.CV_CHUNKING_CONFIG, "pooling", "max")
+    vectors = clustered_vectors(6)
+    index = IVFIndex(encoding="float32", train_size=0, dimension=DIMENSION)
+    index.add_embeddings({
+        "a": {"embedding": vectors[0].tolist(), "chunk_embeddings": [vectors[0].tolist(), vectors[1].tolist()]},
+        "b": {"embedding": vectors[2].tolist()}
+    })
+    assert index.stats()["rows"] == 3
+    assert top_ids(index, vectors[1], top_k=1) == ["a"]
+
+    index.add_embeddings({"a": {"embedding": vectors[3].tolist()}})
+    assert index.stats()["rows"] == 2
+    scores = {result["cv_id"]: result["similarity_score"] for result in index.search_similar_cv(vectors[1])}
+    assert scores["a"] == pytest.approx(1.0 / (2.0 - float(vectors[3] @ vectors[1])), abs=1e-5)
+
+
+def test_unsupported_encoding_is_rejected():
+    with pytest.raises(ValueError):
+        IVFIndex(encoding="int4", dimension=DIMENSION)
@@ -0,0 +1,28 @@
+from utils.contact_extractor import ContactExtractor
+
+
+def test_international_phone_does_not_run_into_the_next_line():
+    text = "John Doe\n+1 (415) 555-0132\n123 Main Street, San Francisco\njohn@doe.com\nExperience"
+    contact_info, _ = ContactExtractor().extract(text)
+
+    assert contact_info["phone"] == "+1 (415) 555-0132"
+    cleaned = ContactExtractor.remove_contact_info(text, contact_info)
+    assert "415" not in cleaned
+    assert "Main Street" not in cleaned
+    assert "Experience" in cleaned
+
+
+def test_turkish_phone_with_the_prefix_in_parentheses():
+    text = "Ayşe Yılmaz\nTel: (0532) 123 45 67\nayse@mail.com"
+    contact_info, _ = ContactExtractor().extract(text)
+
+    assert contact_info["phone"] == "(0532) 123 45 67"
+    cleaned = ContactExtractor.remove_contact_info(text, contact_info)
+    assert "0532" not in cleaned and "(" not in cleaned
+
+
+def test_phone_is_removed_from_a_reformatted_text_without_touching_the_next_line():
+    contact_info = {"email": None, "phone": "+90 532 123 45 67", "address": None}
+    cleaned = ContactExtractor.remove_contact_info("Phone: 0532-123-4567\n2019 - 2023 Engineer", contact_info)
+
+    assert cleaned == "Phone: \n2019 - 2023 Engineer"
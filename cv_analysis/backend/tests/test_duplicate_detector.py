@@ -0,0 +1,69 @@
+import pytest
+from utils.duplicate_detector import DuplicateDetector
+
+CV_TEXT = (
+    "Ayşe Yılmaz Kıdemli Yazılım Mühendisi. İstanbul Teknik Üniversitesi bilgisayar mühendisliği mezunu. "
+    "Sekiz yıl boyunca Python, Django ve PostgreSQL ile ölçeklenebilir web servisleri geliştirdi. "
+    "Mikroservis mimarisine geçişi yönetti, Kubernetes üzerinde sürekli teslimat hatları kurdu ve "
+    "ekibindeki dört geliştiriciye mentorluk yaptı. Veri işleme hatlarını Apache Kafka ile yeniden "
+    "tasarlayarak gecikmeyi yarıya indirdi. Türkçe ve İngilizce biliyor."
+)
+OTHER_TEXT = (
+    "John Smith Data Analyst. Five years of experience building dashboards in Tableau and Power BI, "
+    "writing SQL reports for the finance department and automating monthly forecasts with pandas. "
+    "Led the migration of the reporting warehouse to Snowflake and trained business users."
+)
+
+
+def test_exact_duplicates_ignore_case_diacritics_and_whitespace():
+    detector = DuplicateDetector()
+    assert detector.add("original", CV_TEXT) is None
+
+    reformatted = "\n".join(CV_TEXT.upper().split(". "))
+    assert detector.add("reformatted", reformatted) == ("original", 1.0)
+    assert detector.add("ascii", "Ayse Yilmaz Kidemli Yazilim Muhendisi. " + CV_TEXT.split(". ", 1)[1]) == ("original", 1.0)
+
+
+def test_near_duplicates_are_matched_with_their_similarity():
+    detector = DuplicateDetector()
+    detector.add("original", CV_TEXT)
+    detector.add("other", OTHER_TEXT)
+
+    edited = CV_TEXT + " Referanslar istek üzerine verilir."
+    match = detector.add("edited", edited)
+    assert match is not None
+    key, similarity = match
+    assert key == "original"
+    assert 0.9 <= similarity < 1.0
+
+
+def test_distinct_texts_are_kept_as_representatives():
+    detector = DuplicateDetector()
+
+    assert detector.add("a", CV_TEXT) is None
+    assert detector.add("b", OTHER_TEXT) is None
+    # A shortened text shares too few shingles to be a near duplicate
+    assert detector.add("half", CV_TEXT[:len(CV_TEXT) // 2]) is None
+    # Duplicates are matched against representatives, so a later copy of "b" still finds it
+    assert detector.add("b_copy", OTHER_TEXT) == ("b", 1.0)
+
+
+def test_duplicates_are_not_kept_as_representatives():
+    detector = DuplicateDetector(similarity_threshold=0.5)
+    detector.add("original", CV_TEXT)
+    detector.add("copy", CV_TEXT + " Ek bilgi.")
+
+    assert set(detector._shingles) == {"original"}
+
+
+def test_texts_without_tokens_are_never_duplicates():
+    detector = DuplicateDetector()
+
+    assert detector.add("empty", "") is None
+    assert detector.add("punctuation", " -- ... ") is None
+    assert detector.add("empty_again", "") is None
+
+
+def test_bands_must_divide_the_permutations():
+    with pytest.raises(ValueError):
+        DuplicateDetector(num_permutations=128, bands=10)
@@ -0,0 +1,153 @@
+import os
+import numpy as np
+import pytest
+from utils.embedding_store import EmbeddingStore
+
+DIMENSION = 8
+
+
+def basis(index, weight=1.0):
+    vector = np.full(DIMENSION, 0.01, dtype=np.float32)
+    vector[index] = weight
+    return vector
+
+
+def top_ids(store, query, top_k=3):
+    return [result["cv_id"] for result in store.search_similar_cv(query, top_k=top_k)]
+
+
+@pytest.mark.parametrize("encoding", ["float32", "float16", "int8"])
+def test_rows_survive_reopening(tmp_path, encoding):
+    path = str(tmp_path / "store")
+    store = EmbeddingStore(path, encoding=encoding, dimension=DIMENSION)
+    store.add_vectors(
+        ["a", "b", "c"], np.stack([basis(0), basis(1), basis(2)]),
+        cv_names=["a.pdf", "b.pdf", "c.pdf"], contact_infos=["a@mail.com", "", ""]
+    )
+
+    # The settings of an existing store come from its meta.json, not from the arguments
+    reopened = EmbeddingStore(path, encoding="float32", keep_full_precision=False, dimension=DIMENSION)
+    assert reopened.encoding == encoding
+    assert reopened.keep_full_precision == (encoding != "float32")
+    assert reopened.indexed_cv_ids() == {"a", "b", "c"}
+    results = reopened.search_similar_cv(basis(1), top_k=3)
+    assert results[0]["cv_id"] == "b"
+    assert {result["cv_id"] for result in results} == {"a", "b", "c"}
+    assert results[0]["cv_name"] == "b.pdf"
+    assert results[0]["contact_info"] == "N/A"
+    assert results[0]["similarity_score"] == pytest.approx(1.0, abs=1e-2)
+    assert reopened.search_similar_cv(basis(0), top_k=1)[0]["contact_info"] == "a@mail.com"
+
+
+def test_adding_an_existing_id_replaces_its_rows(tmp_path):
+    path = str(tmp_path / "store")
+    store = EmbeddingStore(path, dimension=DIMENSION)
+    store.add_embeddings({"a": {"embedding": basis(0).tolist()}, "b": {"embedding": basis(1).tolist()}})
+    store.add_embeddings({"a": {"embedding": basis(2).tolist(), "cv_name": "a_v2.pdf"}})
+
+    assert len(store) == 2
+    assert top_ids(store, basis(2), top_k=1) == ["a"]
+    assert store.search_similar_cv(basis(2), top_k=1)[0]["cv_name"] == "a_v2.pdf"
+    reopened = EmbeddingStore(path, dimension=DIMENSION)
+    assert len(reopened) == 2
+    assert top_ids(reopened, basis(2), top_k=1) == ["a"]
+
+
+def test_mismatched_dimensions_are_skipped(tmp_path):
+    store = EmbeddingStore(str(tmp_path / "store"), dimension=DIMENSION)
+    store.add_embeddings({"a": {"embedding": basis(0).tolist()}, "short": {"embedding": [1.0, 0.0]}})
+
+    assert store.indexed_cv_ids() == {"a"}
+
+
+def test_deletes_are_compacted_once_most_rows_are_dead(tmp_path):
+    path = str(tmp_path / "store")
+    store = EmbeddingStore(path, dimension=DIMENSION)
+    store.add_vectors(["a", "b", "c", "d"], np.stack([basis(index) for index in range(4)]))
+
+    assert store.delete_documents(["a", "missing"]) == 1
+    assert len(store.vectors()) == 4
+    assert "a" not in top_ids(store, basis(0), top_k=4)
+
+    # Three of four rows deleted: the store rewrites itself without them
+    assert store.delete_documents(["b", "c"]) == 2
+    assert len(store.vectors()) == 1
+    assert top_ids(store, basis(0), top_k=4) == ["d"]
+    assert not os.path.exists(f"{path}.compact") and not os.path.exists(f"{path}.previous")
+
+    reopened = EmbeddingStore(path, dimension=DIMENSION)
+    assert reopened.indexed_cv_ids() == {"d"}
+    reopened.add_vectors(["e"], basis(4)[None, :])
+    assert top_ids(reopened, basis(4), top_k=1) == ["e"]
+    assert top_ids(reopened, basis(3), top_k=1) == ["d"]
+
+
+def test_delete_all_documents_empties_the_files(tmp_path):
+    path = str(tmp_path / "store")
+    store = EmbeddingStore(path, dimension=DIMENSION)
+    store.add_vectors(["a", "b"], np.stack([basis(0), basis(1)]))
+    store.delete_all_documents()
+
+    assert len(store) == 0
+    assert store.search_similar_cv(basis(0)) == []
+    assert os.path.getsize(os.path.join(path, "vectors.bin")) == 0
+    assert len(EmbeddingStore(path, dimension=DIMENSION)) == 0
+
+
+def test_interrupted_compaction_restores_the_previous_store(tmp_path):
+    path = str(tmp_path / "store")
+    store = EmbeddingStore(path, dimension=DIMENSION)
+    store.add_vectors(["a", "b"], np.stack([basis(0), basis(1)]))
+
+    # Crash between the two renames of compact: only the moved-aside store and a partial copy remain
+    os.replace(path, f"{path}.previous")
+    os.makedirs(f"{path}.compact")
+
+    recovered = EmbeddingStore(path, dimension=DIMENSION)
+    assert recovered.indexed_cv_ids() == {"a", "b"}
+    assert top_ids(recovered, basis(1), top_k=1) == ["b"]
+    assert not os.path.exists(f"{path}.previous") and not os.path.exists(f"{path}.compact")
+
+
+def test_leftover_previous_store_is_dropped_when_the_swap_completed(tmp_path):
+    path = str(tmp_path / "store")
+    EmbeddingStore(path, dimension=DIMENSION).add_vectors(["a"], basis(0)[None, :])
+    stale = EmbeddingStore(f"{path}.previous", dimension=DIMENSION)
+    stale.add_vectors(["stale"], basis(1)[None, :])
+
+    store = EmbeddingStore(path, dimension=DIMENSION)
+    assert store.indexed_cv_ids() == {"a"}
+    assert not os.path.exists(f"{path}.previous")
+
+
+def test_torn_append_is_cut_off_on_open(tmp_path):
+    path = str(tmp_path / "store")
+    store = EmbeddingStore(path, encoding="int8", dimension=DIMENSION)
+    store.add_vectors(["a"], basis(0)[None, :])
+    documents_size = os.path.getsize(os.path.join(path, "documents.jsonl"))
+
+    # A crash while appending "b": its rows are written but its log line is torn
+    with open(os.path.join(path, "vectors.bin"), "ab") as vectors_file:
+        vectors_file.write(b"\x01" * DIMENSION)
+    with open(os.path.join(path, "scales.bin"), "ab") as scales_file:
+        scales_file.write(b"\x00" * 4)
+    with open(os.path.join(path, "documents.jsonl"), "a") as documents_file:
+        documents_file.write('{"cv_id": "b", "cv_na')
+
+    reopened = EmbeddingStore(path, dimension=DIMENSION)
+    assert reopened.indexed_cv_ids() == {"a"}
+    assert os.path.getsize(os.path.join(path, "documents.jsonl")) == documents_size
+    assert os.path.getsize(os.path.join(path, "vectors.bin")) == DIMENSION
+    assert os.path.getsize(os.path.join(path, "scales.bin")) == 4
+
+    reopened.add_vectors(["b"], basis(1)[None, :])
+    assert top_ids(EmbeddingStore(path, dimension=DIMENSION), basis(1), top_k=1) == ["b"]
+
+
+def test_missing_rows_are_reported(tmp_path):
+    path = str(tmp_path / "store")
+    EmbeddingStore(path, encoding="float32", dimension=DIMENSION).add_vectors(["a"], basis(0)[None, :])
+    os.truncate(os.path.join(path, "vectors.bin"), 4)
+
+    with pytest.raises(ValueError):
+        EmbeddingStore(path, dimension=DIMENSION)
@@ -0,0 +1,46 @@
+from utils.keyword_filter import KeywordIndex, normalize_text, parse_terms, tokenize
+
+
+def test_turkish_text_is_folded_to_ascii():
+    assert normalize_text("YAZILIM GELİŞTİRME") == normalize_text("Yazılım Geliştirme") == "yazilim gelistirme"
+    assert normalize_text("Çağrı Öztürk Şişli") == "cagri ozturk sisli"
+
+
+def test_tokens_keep_plus_and_hash_suffixes():
+    assert tokenize("C++, C# and C; Node.js") == ["c++", "c#", "and", "c", "node", "js"]
+
+
+def test_parse_terms_drops_empty_and_repeated_terms():
+    assert parse_terms("Python, SQL;\n;  python ,Makine Öğrenmesi,MAKİNE öğrenmesi") == ["Python", "SQL", "Makine Öğrenmesi"]
+    assert parse_terms(None) == []
+
+
+def test_phrases_must_occur_in_order():
+    index = KeywordIndex({
+        "ml": "Worked on machine learning models.",
+        "split": "Machine operator, later learning Python.",
+        "reversed": "Learning machine internals."
+    })
+
+    assert index.matching_keys("Machine Learning") == {"ml"}
+    assert index.matching_keys("machine") == {"ml", "split", "reversed"}
+    assert index.matching_keys("python") == {"split"}
+
+
+def test_whole_tokens_are_matched():
+    index = KeywordIndex({"js": "JavaScript and TypeScript", "java": "Java 17, Spring", "cpp": "C++ and C"})
+
+    assert index.matching_keys("Java") == {"java"}
+    assert index.matching_keys("C++") == {"cpp"}
+    assert index.matching_keys("C") == {"cpp"}
+    assert index.matching_keys("C#") == set()
+
+
+def test_missing_terms_per_text():
+    index = KeywordIndex()
+    index.add("a", "Yazılım geliştirme, PostgreSQL ve Docker deneyimi")
+    index.add("b", "YAZILIM GELİŞTİRME")
+    index.add("c", "")
+
+    missing = index.missing_terms(["yazilim gelistirme", "Docker", "---"])
+    assert missing == {"a": [], "b": ["Docker"], "c": ["yazilim gelistirme", "Docker"]}
@@ -0,0 +1,119 @@
+import time
+import openai
+import pytest
+from utils.rate_limiter import RateLimiter
+
+
+def make_limiter(requests_per_minute=600, tokens_per_minute=6000, max_retries=3):
+    return RateLimiter("test", requests_per_minute, tokens_per_minute, max_retries,
+                       backoff_base_seconds=0.001, backoff_max_seconds=0.01)
+
+
+def test_calls_within_the_burst_do_not_wait():
+    limiter = make_limiter()
+
+    # 6,000 tokens per minute allow a burst of 1,000 tokens
+    assert limiter.acquire(600) == pytest.approx(0.0, abs=0.01)
+    assert limiter.acquire(400) == pytest.approx(0.0, abs=0.01)
+    assert limiter.stats()["requests"] == 2
+    assert limiter.stats()["estimated_tokens"] == 1000
+
+
+def test_calls_wait_for_the_token_budget_to_refill():
+    limiter = make_limiter()
+    limiter.acquire(1000)
+
+    # 100 tokens per second refill the 30 tokens of the next call in about 0.3 seconds
+    waited = limiter.acquire(30)
+    assert 0.2 <= waited < 1.0
+    assert limiter.stats()["wait_seconds"] >= 0.2
+
+
+def test_calls_larger_than_the_burst_are_admitted_when_the_bucket_is_full():
+    limiter = make_limiter()
+
+    assert limiter.acquire(5000) == pytest.approx(0.0, abs=0.01)
+    assert limiter._available_tokens < 0
+
+
+def test_zero_quotas_disable_the_budgets():
+    limiter = make_limiter(requests_per_minute=0, tokens_per_minute=0)
+    started = time.monotonic()
+    for _ in range(20):
+        limiter.acquire(10 ** 6)
+
+    assert time.monotonic() - started < 0.1
+
+
+def test_retryable_errors_are_retried():
+    limiter = make_limiter()
+    errors = [openai.error.RateLimitError("slow down"), openai.error.APIError("bad gateway", http_status=502)]
+
+    def flaky(value):
+        if errors:
+            raise errors.pop(0)
+        return value
+
+    assert limiter.call(flaky, 10, value="ok") == "ok"
+    assert limiter.stats()["retries"] == 2
+    assert limiter.stats()["requests"] == 3
+    assert limiter.stats()["failures"] == 0
+
+
+def test_non_retryable_errors_and_exhausted_retries_are_raised():
+    limiter = make_limiter(max_retries=2)
+    attempts = []
+
+    def invalid():
+        attempts.append(1)
+        raise openai.error.InvalidRequestError("bad request", param=None, http_status=400)
+
+    with pytest.raises(openai.error.InvalidRequestError):
+        limiter.call(invalid, 10)
+    assert len(attempts) == 1
+
+    def unavailable():
+        attempts.append(1)
+        raise openai.error.ServiceUnavailableError("overloaded")
+
+    with pytest.raises(openai.error.ServiceUnavailableError):
+        limiter.call(unavailable, 10)
+    assert len(attempts) == 4
+    assert limiter.stats()["failures"] == 2
+    assert limiter.stats()["retries"] == 2
+
+
+def test_retry_after_pauses_the_deployment():
+    limiter = make_limiter()
+    error = openai.error.RateLimitError("slow down", headers={"Retry-After-Ms": "5"})
+    calls = []
+
+    def limited():
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise error
+        return "ok"
+
+    assert limiter._retry_after(error) == pytest.approx(0.005)
+    assert limiter.call(limited, 1) == "ok"
+    assert calls[1] - calls[0] >= 0.005
+    assert limiter._paused_until > calls[0]
+
+
+def test_retry_delays():
+    limiter = make_limiter()
+
+    assert limiter._retry_after(openai.error.RateLimitError("x", headers={"retry-after": "2"})) == 2.0
+    assert limiter._retry_after(openai.error.RateLimitError("x", headers={"retry-after": "soon"})) is None
+    # Retry-After is capped at backoff_max_seconds, plus up to backoff_base_seconds of jitter
+    delay = limiter._retry_delay(openai.error.RateLimitError("x", headers={"retry-after": "2"}), 0)
+    assert 0.01 <= delay <= 0.011
+    assert all(0 <= limiter._retry_delay(openai.error.APIError("x", http_status=500), 5) <= 0.01 for _ in range(20))
+
+
+def test_retryable_statuses():
+    assert RateLimiter._is_retryable(openai.error.APIError("x", http_status=503))
+    assert RateLimiter._is_retryable(openai.error.APIError("x", http_status=429))
+    assert RateLimiter._is_retryable(openai.error.Timeout("x"))
+    assert not RateLimiter._is_retryable(openai.error.APIError("x", http_status=404))
+    assert not RateLimiter._is_retryable(openai.error.AuthenticationError("x", http_status=401))
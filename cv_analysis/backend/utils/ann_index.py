@@ -0,0 +1,621 @@
+import json
+import os
+import threading
+import numpy as np
+import config
+from utils.embedding_store import ENCODINGS, EmbeddingStore, encode_rows
+
+
+class _InvertedList:
+    """
+    The rows assigned to one k-means centroid, held in growable contiguous arrays.
+
+    Rows are stored as their encoded residual to the centroid (row - centroid), so the precision of
+    int8 codes is spent on what distinguishes the rows of a list rather than on what they share.
+    """
+
+    __slots__ = ("codes", "scales", "rows", "count")
+
+    def __init__(self, dimension, dtype, quantized, capacity=0):
+        self.codes = np.empty((capacity, dimension), dtype=dtype)
+        self.scales = np.empty(capacity, dtype=np.float32) if quantized else None
+        self.rows = np.empty(capacity, dtype=np.int64)
+        self.count = 0
+
+    def append(self, codes, scales, rows):
+        """
+        Appends rows, growing the arrays by at least half of their size when they are full.
+
+        Returns:
+            int: The position of the first appended row.
+        """
+        start, end = self.count, self.count + len(rows)
+        if end > len(self.rows):
+            capacity = max(end, len(self.rows) * 3 // 2, 16)
+            self.codes = self._grow(self.codes, capacity)
+            self.rows = self._grow(self.rows, capacity)
+            if self.scales is not None:
+                self.scales = self._grow(self.scales, capacity)
+        self.codes[start:end] = codes
+        self.rows[start:end] = rows
+        if self.scales is not None:
+            self.scales[start:end] = scales
+        self.count = end
+        return start
+
+    def remove(self, position):
+        """
+        Removes a row by moving the last row into its place.
+
+        Returns:
+            int or None: The id of the moved row, or None if the removed row was the last one.
+        """
+        last = self.count - 1
+        self.count = last
+        if position == last:
+            return None
+        self.codes[position] = self.codes[last]
+        self.rows[position] = self.rows[last]
+        if self.scales is not None:
+            self.scales[position] = self.scales[last]
+        return int(self.rows[position])
+
+    def scores(self, query, centroid_score, block):
+        """
+        Returns the cosine similarity of the query with every row.
+
+        Args:
+            query (numpy.ndarray): The unit-length query.
+            centroid_score (float): The similarity of the query with the list's centroid.
+            block (numpy.ndarray): A reusable (rows, dimension) float32 buffer that encoded rows are
+                converted into a block at a time, instead of converting the whole list at once.
+        """
+        codes = self.codes[:self.count]
+        if codes.dtype == np.float32:
+            scores = codes @ query
+        else:
+            scores = np.empty(self.count, dtype=np.float32)
+            for start in range(0, self.count, len(block)):
+                rows = codes[start:start + len(block)]
+                np.copyto(block[:len(rows)], rows, casting="unsafe")
+                scores[start:start + len(rows)] = block[:len(rows)] @ query
+        if self.scales is not None:
+            scores *= self.scales[:self.count]
+        return scores + centroid_score
+
+    def decoded(self, centroid):
+        """
+        Returns the rows as float32, with int8 codes multiplied by their scales.
+
+        Args:
+            centroid (numpy.ndarray or None): The list's centroid, None for an untrained index.
+        """
+        vectors = self.codes[:self.count].astype(np.float32)
+        if self.scales is not None:
+            vectors *= self.scales[:self.count, None]
+        if centroid is not None:
+            vectors += centroid
+        return vectors
+
+    @staticmethod
+    def _grow(array, capacity):
+        grown = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+
+class IVFIndex:
+    """
+    An inverted-file (IVF) approximate nearest-neighbour index over CV embeddings.
+
+    The unit-length embeddings are clustered with spherical k-means into n_lists inverted lists. A
+    search compares the query with the centroids and only scores the rows of the n_probe nearest
+    lists, so it reads about n_probe / n_lists of the corpus instead of all of it; n_probe trades
+    recall for latency per query. Rows are stored as residuals to their centroid in the encodings of
+    EmbeddingStore (int8 by default, a quarter of the float32 size).
+
+    Until train_size rows are indexed the index holds a single list and searches are exact. It is then
+    trained on its own content; later inserts are assigned to the nearest existing centroid, and train
+    can be called again to re-cluster a corpus that has grown or drifted. Deletes remove rows in place.
+
+    The methods mirror LocalSearcher, so the index can replace it as the local CV corpus. With "max"
+    chunk pooling (config.CV_CHUNKING_CONFIG) every chunk vector gets its own row and the CV is scored
+    by its best matching chunk.
+    """
+
+    # k-means is trained on at most this many rows per list, sampled from the corpus
+    TRAIN_ROWS_PER_LIST = 64
+    # Rows assigned to the centroids at a time during training
+    ASSIGN_BLOCK_ROWS = 4096
+
+    def __init__(self, n_lists=0, n_probe=16, encoding="int8", train_size=10000, kmeans_iterations=10,
+                 dimension=config.EMBEDDING_DIMENSION):
+        """
+        Initializes an empty IVFIndex.
+
+        Args:
+            n_lists (int, optional): The number of inverted lists. 0 picks about the square root of the
+                number of rows at training time. Defaults to 0.
+            n_probe (int, optional): The number of lists scanned per query. Defaults to 16.
+            encoding (str, optional): "float32", "float16" or "int8". Defaults to "int8".
+            train_size (int, optional): The number of rows at which the index trains itself. 0 disables
+                automatic training. Defaults to 10000.
+            kmeans_iterations (int, optional): The number of k-means iterations. Defaults to 10.
+            dimension (int, optional): The embedding dimension. Defaults to config.EMBEDDING_DIMENSION.
+
+        Raises:
+            ValueError: If the encoding is not supported.
+        """
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unsupported ANN index encoding: {encoding}")
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.encoding = encoding
+        self.train_size = train_size
+        self.kmeans_iterations = kmeans_iterations
+        self.dimension = dimension
+        self._lock = threading.RLock()
+        self.delete_all_documents()
+
+    @property
+    def is_trained(self):
+        """
+        bool: Whether the rows are clustered into k-means lists.
+        """
+        return self.centroids is not None
+
+    def add_embeddings(self, cv_embeddings):
+        """
+        Adds CV embeddings to the index.
+
+        CVs whose id is already present are replaced. Embeddings with an unexpected dimension are
+        skipped and logged.
+
+        Args:
+            cv_embeddings (dict): A dictionary containing CV embeddings keyed by CV id.
+        """
+        use_chunks = config.CV_CHUNKING_CONFIG["pooling"] == "max"
+        documents = []
+        vectors = []
+        for cv_id, cv_data in cv_embeddings.items():
+            cv_name = cv_data.get('cv_name', cv_id)
+            cv_vectors = cv_data.get('chunk_embeddings') if use_chunks else None
+            cv_vectors = cv_vectors or [cv_data['embedding']]
+            if any(len(embedding) != self.dimension for embedding in cv_vectors):
+                config.app_logger.error(f"Embedding dimension mismatch for {cv_name}: Expected {self.dimension}")
+                continue
+            documents.append((cv_id, cv_name, cv_data.get('contact_info', ''), len(cv_vectors)))
+            vectors.extend(cv_vectors)
+
+        if documents:
+            self._add(documents, np.asarray(vectors, dtype=np.float32))
+        config.app_logger.info(f"{len(documents)} documents added to the ANN index.")
+
+    def add_vectors(self, cv_ids, vectors, cv_names=None, contact_infos=None):
+        """
+        Adds one embedding per CV from a NumPy matrix, without building Python lists.
+
+        Args:
+            cv_ids (list of str): The CV ids, one per row.
+            vectors (numpy.ndarray): A (len(cv_ids), dimension) array of embeddings.
+            cv_names (list of str, optional): The CV names. Defaults to the CV ids.
+            contact_infos (list of str, optional): The contact information. Defaults to empty strings.
+        """
+        cv_names = cv_names or cv_ids
+        contact_infos = contact_infos or [''] * len(cv_ids)
+        documents = [
+            (cv_id, cv_name, contact_info, 1) for cv_id, cv_name, contact_info in zip(cv_ids, cv_names, contact_infos)
+        ]
+        self._add(documents, np.asarray(vectors, dtype=np.float32).reshape(len(documents), self.dimension))
+
+    def indexed_cv_ids(self):
+        """
+        Returns the ids of all CVs held by the index.
+
+        Returns:
+            set: The CV ids.
+        """
+        with self._lock:
+            return set(self._cv_rows)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._cv_rows)
+
+    def search_similar_cv(self, job_embedding, top_k=10, n_probe=None):
+        """
+        Searches for the most similar CVs based on the provided job embedding.
+
+        Args:
+            job_embedding (list): The embedding vector for the job description.
+            top_k (int, optional): The number of top similar CVs to return. Defaults to 10.
+            n_probe (int, optional): The number of lists to scan. Defaults to the index's n_probe.
+
+        Returns:
+            list: A list of dictionaries, each containing the CV id, CV name, contact information, and
+                  similarity score. Returns an empty list if an error occurs during the search.
+        """
+        results = self.search_similar_cv_batch([job_embedding], top_k=top_k, n_probe=n_probe)
+        return results[0] if results else []
+
+    def search_similar_cv_batch(self, job_embeddings, top_k=10, n_probe=None):
+        """
+        Searches for the most similar CVs for several job embeddings.
+
+        Scores are reported on the same scale as Azure Cognitive Search cosine scores
+        (1 / (2 - cosine_similarity)), like LocalSearcher.
+
+        Args:
+            job_embeddings (list): A list of embedding vectors, one per job description.
+            top_k (int, optional): The number of top similar CVs to return per job. Defaults to 10.
+            n_probe (int, optional): The number of lists to scan. Defaults to the index's n_probe.
+
+        Returns:
+            list: One result list per job embedding, in the same format as search_similar_cv.
+                  Returns an empty list if an error occurs during the search.
+        """
+        try:
+            queries = self._normalize(np.asarray(job_embeddings, dtype=np.float32).reshape(-1, self.dimension))
+            with self._lock:
+                return [self._search(query, top_k, n_probe or self.n_probe) for query in queries]
+        except Exception as e:
+            config.app_logger.error(f"Error during ANN search for similar CVs: {str(e)}")
+            return []
+
+    def delete_documents(self, cv_ids):
+        """
+        Removes the given CVs, with all of their rows, from the index.
+
+        Args:
+            cv_ids (iterable of str): The ids of the CVs to remove. Unknown ids are ignored.
+
+        Returns:
+            int: The number of removed CVs.
+        """
+        removed = 0
+        with self._lock:
+            for cv_id in list(cv_ids):
+                rows = self._cv_rows.pop(cv_id, None)
+                if rows is None:
+                    continue
+                for row in rows:
+                    self._remove_row(row)
+                del self._cv_info[cv_id]
+                removed += 1
+        return removed
+
+    def delete_all_documents(self):
+        """
+        Removes all rows and centroids from the index.
+        """
+        with self._lock:
+            self.centroids = None
+            self._lists = [self._new_list()]
+            self._cv_rows = {}
+            self._cv_info = {}
+            self._row_cv_ids = []
+            self._row_list = np.empty(0, dtype=np.int32)
+            self._row_position = np.empty(0, dtype=np.int64)
+            self._free_rows = []
+            self._rows = 0
+
+    def train(self, sample=None):
+        """
+        Clusters the index with spherical k-means and reassigns every row to its nearest centroid.
+
+        Args:
+            sample (numpy.ndarray, optional): The float32 vectors to train on, e.g. a sample of the
+                corpus before it is added. Defaults to a sample of the rows in the index.
+        """
+        with self._lock:
+            if sample is None:
+                sample = self._sample_rows()
+            else:
+                sample = self._normalize(np.asarray(sample, dtype=np.float32).reshape(-1, self.dimension))
+            if not len(sample):
+                return
+            live_rows = len(self._row_cv_ids) - len(self._free_rows)
+            n_lists = self.n_lists or int(round(np.sqrt(max(live_rows, len(sample)))))
+            previous_centroids = self.centroids
+            self.centroids = self._kmeans(sample, max(1, min(n_lists, len(sample))))
+
+            lists, self._lists = self._lists, [self._new_list() for _ in range(len(self.centroids))]
+            for list_id, inverted_list in enumerate(lists):
+                if inverted_list.count:
+                    centroid = previous_centroids[list_id] if previous_centroids is not None else None
+                    vectors = inverted_list.decoded(centroid)
+                    self._append_rows(inverted_list.rows[:inverted_list.count], vectors, self._assign(vectors))
+        config.app_logger.info(f"ANN index trained with {len(self.centroids)} lists on {len(sample)} vectors.")
+
+    def stats(self):
+        """
+        Returns the size and balance of the index.
+
+        Returns:
+            dict: The number of CVs, rows and lists, whether the index is trained, the rows of the
+                  smallest, largest and average list, and the bytes of the stored rows.
+        """
+        with self._lock:
+            counts = np.asarray([inverted_list.count for inverted_list in self._lists])
+            row_bytes = self.dimension * np.dtype(ENCODINGS[self.encoding]).itemsize
+            if self.encoding == "int8":
+                row_bytes += 4
+            return {
+                "cvs": len(self._cv_rows),
+                "rows": int(counts.sum()),
+                "lists": len(self._lists),
+                "trained": self.is_trained,
+                "n_probe": self.n_probe,
+                "min_list_rows": int(counts.min()),
+                "max_list_rows": int(counts.max()),
+                "mean_list_rows": round(float(counts.mean()), 1),
+                "row_bytes": int(counts.sum()) * row_bytes
+            }
+
+    def save(self, path):
+        """
+        Saves the index to a NumPy .npz file.
+
+        The file is written under a temporary name and then moved into place, so a crash during
+        saving never leaves a truncated file behind. n_probe is not saved, since it is a search setting.
+
+        Args:
+            path (str): The path of the .npz file.
+        """
+        with self._lock:
+            lists = self._lists
+            metadata = json.dumps({
+                "encoding": self.encoding,
+                "n_lists": self.n_lists,
+                "train_size": self.train_size,
+                "kmeans_iterations": self.kmeans_iterations,
+                "dimension": self.dimension,
+                "row_cv_ids": [self._row_cv_ids[row] for row in range(self._rows)],
+                "cv_info": self._cv_info
+            })
+            arrays = {
+                "centroids": self.centroids if self.is_trained else np.empty((0, self.dimension), dtype=np.float32),
+                "list_counts": np.asarray([inverted_list.count for inverted_list in lists], dtype=np.int64),
+                "codes": np.concatenate([inverted_list.codes[:inverted_list.count] for inverted_list in lists]),
+                "rows": np.concatenate([inverted_list.rows[:inverted_list.count] for inverted_list in lists]),
+                "metadata": np.array(metadata)
+            }
+            if self.encoding == "int8":
+                arrays["scales"] = np.concatenate([
+                    inverted_list.scales[:inverted_list.count] for inverted_list in lists
+                ])
+            temporary_path = f"{path}.tmp.npz"
+            np.savez(temporary_path, **arrays)
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path, **settings):
+        """
+        Loads an index saved with save.
+
+        Args:
+            path (str): The path of the .npz file.
+            **settings: The IVFIndex arguments of a new index if the file does not exist. n_probe also
+                applies to a loaded index; the other settings are read from the file.
+
+        Returns:
+            IVFIndex: The loaded index, or an empty one if the file does not exist.
+        """
+        if not os.path.exists(path):
+            return cls(**settings)
+        with np.load(path, allow_pickle=False) as data:
+            metadata = json.loads(str(data["metadata"]))
+            index = cls(
+                n_lists=metadata["n_lists"],
+                n_probe=settings.get("n_probe", 16),
+                encoding=metadata["encoding"],
+                train_size=metadata["train_size"],
+                kmeans_iterations=metadata["kmeans_iterations"],
+                dimension=metadata["dimension"]
+            )
+            list_counts = data["list_counts"]
+            codes, rows = data["codes"], data["rows"]
+            scales = data["scales"] if "scales" in data else None
+            centroids = data["centroids"]
+
+        index.centroids = centroids if len(centroids) else None
+        index._row_cv_ids = metadata["row_cv_ids"]
+        index._rows = len(index._row_cv_ids)
+        index._row_list = np.zeros(index._rows, dtype=np.int32)
+        index._row_position = np.zeros(index._rows, dtype=np.int64)
+        index._lists = []
+        start = 0
+        for list_id, count in enumerate(list_counts):
+            inverted_list = index._new_list(int(count))
+            end = start + int(count)
+            inverted_list.append(codes[start:end], scales[start:end] if scales is not None else None, rows[start:end])
+            index._row_list[rows[start:end]] = list_id
+            index._row_position[rows[start:end]] = np.arange(count)
+            index._lists.append(inverted_list)
+            start = end
+
+        index._cv_info = metadata["cv_info"]
+        for row, cv_id in enumerate(index._row_cv_ids):
+            if cv_id is None:
+                index._free_rows.append(row)
+            else:
+                index._cv_rows.setdefault(cv_id, []).append(row)
+        return index
+
+    def _add(self, documents, vectors):
+        """
+        Adds CVs and their rows, replacing existing CVs with the same ids.
+
+        Args:
+            documents (list of tuple): The (CV id, CV name, contact info, number of rows) of every CV.
+            vectors (numpy.ndarray): The float32 rows of all CVs, in order.
+        """
+        vectors = self._normalize(vectors)
+        with self._lock:
+            self.delete_documents([document[0] for document in documents])
+            rows = []
+            for cv_id, cv_name, contact_info, row_count in documents:
+                cv_rows = [self._allocate_row(cv_id) for _ in range(row_count)]
+                self._cv_rows[cv_id] = cv_rows
+                self._cv_info[cv_id] = [cv_name, contact_info]
+                rows.extend(cv_rows)
+
+            assignments = self._assign(vectors) if self.is_trained else np.zeros(len(rows), dtype=np.int64)
+            self._append_rows(np.asarray(rows, dtype=np.int64), vectors, assignments)
+            live_rows = len(self._row_cv_ids) - len(self._free_rows)
+            if not self.is_trained and self.train_size and live_rows >= self.train_size:
+                self.train()
+
+    def _append_rows(self, rows, vectors, assignments):
+        """
+        Encodes rows as residuals to their centroids, appends them to their lists and records their locations.
+        """
+        if self.is_trained:
+            vectors = vectors - self.centroids[assignments]
+        codes, scales = encode_rows(vectors, self.encoding)
+        order = np.argsort(assignments, kind="stable")
+        sorted_assignments = assignments[order]
+        boundaries = np.flatnonzero(np.diff(sorted_assignments)) + 1
+        for group in np.split(order, boundaries):
+            if not len(group):
+                continue
+            list_id = int(assignments[group[0]])
+            start = self._lists[list_id].append(
+                codes[group], scales[group] if scales is not None else None, rows[group]
+            )
+            self._row_list[rows[group]] = list_id
+            self._row_position[rows[group]] = np.arange(start, start + len(group))
+
+    def _allocate_row(self, cv_id):
+        if self._free_rows:
+            row = self._free_rows.pop()
+            self._row_cv_ids[row] = cv_id
+            return row
+        row = self._rows
+        self._rows += 1
+        self._row_cv_ids.append(cv_id)
+        if row >= len(self._row_list):
+            capacity = max(1024, len(self._row_list) * 2)
+            self._row_list = _InvertedList._grow(self._row_list, capacity)
+            self._row_position = _InvertedList._grow(self._row_position, capacity)
+        return row
+
+    def _remove_row(self, row):
+        moved_row = self._lists[self._row_list[row]].remove(int(self._row_position[row]))
+        if moved_row is not None:
+            self._row_position[moved_row] = self._row_position[row]
+        self._row_cv_ids[row] = None
+        self._free_rows.append(row)
+
+    def _search(self, query, top_k, n_probe):
+        """
+        Searches the n_probe lists nearest to a unit-length query. Must be called with the lock held.
+        """
+        if self.is_trained:
+            centroid_scores = self.centroids @ query
+            n_probe = min(n_probe, len(self.centroids))
+            probed = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+        else:
+            centroid_scores = np.zeros(1, dtype=np.float32)
+            probed = [0]
+        probed = [list_id for list_id in probed if self._lists[list_id].count]
+        if not probed:
+            return []
+        block = np.empty((EmbeddingStore.BLOCK_ROWS, self.dimension), dtype=np.float32)
+        scores = np.concatenate([
+            self._lists[list_id].scores(query, centroid_scores[list_id], block) for list_id in probed
+        ])
+        rows = np.concatenate([self._lists[list_id].rows[:self._lists[list_id].count] for list_id in probed])
+
+        # CVs with several chunk rows can take several of the best rows, so look further
+        multi_row = len(self._cv_rows) != len(self._row_cv_ids) - len(self._free_rows)
+        candidates = min(len(scores), top_k * config.CV_CHUNKING_CONFIG["search_oversample"] if multi_row else top_k)
+        top_indices = np.argpartition(-scores, candidates - 1)[:candidates]
+        top_indices = top_indices[np.argsort(-scores[top_indices])]
+
+        results = []
+        seen = set()
+        for index in top_indices:
+            cv_id = self._row_cv_ids[rows[index]]
+            if cv_id in seen:
+                continue
+            seen.add(cv_id)
+            cv_name, contact_info = self._cv_info[cv_id]
+            results.append({
+                "cv_id": cv_id,
+                "cv_name": cv_name,
+                "contact_info": contact_info or "N/A",
+                "similarity_score": float(1.0 / (2.0 - scores[index]))
+            })
+            if len(results) == top_k:
+                break
+        return results
+
+    def _sample_rows(self):
+        """
+        Returns a random sample of the indexed rows, decoded to float32.
+        """
+        centroids = self.centroids if self.is_trained else [None] * len(self._lists)
+        rows = np.concatenate([
+            inverted_list.decoded(centroid) for inverted_list, centroid in zip(self._lists, centroids)
+        ])
+        n_lists = self.n_lists or int(round(np.sqrt(len(rows))))
+        sample_size = max(1, n_lists) * self.TRAIN_ROWS_PER_LIST
+        if len(rows) > sample_size:
+            rows = rows[np.random.default_rng(0).choice(len(rows), sample_size, replace=False)]
+        return self._normalize(rows)
+
+    def _kmeans(self, sample, n_lists):
+        """
+        Runs spherical k-means (cosine similarity, unit-length centroids).
+
+        Args:
+            sample (numpy.ndarray): The unit-length training vectors.
+            n_lists (int): The number of centroids.
+
+        Returns:
+            numpy.ndarray: The (n_lists, dimension) float32 centroids.
+        """
+        rng = np.random.default_rng(0)
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(self.kmeans_iterations):
+            assignments = self._assign(sample, centroids)
+            order = np.argsort(assignments, kind="stable")
+            counts = np.bincount(assignments, minlength=n_lists)
+            non_empty = np.flatnonzero(counts)
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[non_empty]
+            centroids[non_empty] = np.add.reduceat(sample[order], starts, axis=0)
+            # Lists that lost all of their rows restart from a random training vector
+            empty = np.flatnonzero(counts == 0)
+            centroids[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+            centroids = self._normalize(centroids)
+        return centroids
+
+    def _assign(self, vectors, centroids=None):
+        """
+        Returns the index of the nearest centroid of every vector.
+        """
+        centroids = self.centroids if centroids is None else centroids
+        assignments = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), self.ASSIGN_BLOCK_ROWS):
+            block = vectors[start:start + self.ASSIGN_BLOCK_ROWS]
+            assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        return assignments
+
+    def _new_list(self, capacity=0):
+        return _InvertedList(self.dimension, ENCODINGS[self.encoding], self.encoding == "int8", capacity)
+
+    @staticmethod
+    def _normalize(vectors):
+        """
+        Scales each row of the given matrix to unit length.
+
+        Args:
+            vectors (numpy.ndarray): A 2D float32 array of embedding vectors.
+
+        Returns:
+            numpy.ndarray: A C-contiguous float32 array with unit-length rows (zero rows are left as zeros).
+        """
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return np.ascontiguousarray(vectors / norms, dtype=np.float32)
@@ -0,0 +1,157 @@
+import threading
+import openai
+import requests
+from azure.core.credentials import AzureKeyCredential
+from azure.core.pipeline.transport import RequestsTransport
+from azure.search.documents import SearchClient
+from azure.search.documents.indexes import SearchIndexClient
+import config
+
+_lock = threading.Lock()
+_session = None
+_transport = None
+_search_index_client = None
+_search_clients = {}
+_ready_indexes = set()
+
+
+def _new_http_session():
+    """
+    Creates an HTTP session that keeps up to config.CONCURRENCY_LIMIT connections per host alive.
+
+    Returns:
+        requests.Session: The new session.
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=config.CONCURRENCY_LIMIT,
+        pool_maxsize=config.CONCURRENCY_LIMIT,
+        max_retries=2
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_http_session():
+    """
+    Returns the process-wide HTTP session of the Azure Cognitive Search clients.
+
+    The session keeps up to config.CONCURRENCY_LIMIT connections per host alive, so concurrent
+    requests reuse open TLS connections instead of performing a new handshake per call.
+
+    The OpenAI client does not share it: openai<1.0 keeps one session per thread and closes it every
+    few minutes, which would close the search transport's connections too. It is given a factory for
+    sessions with the same connection pool settings instead.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            _session = _new_http_session()
+            openai.requestssession = _new_http_session
+    return _session
+
+
+def _get_transport():
+    """
+    Returns the Azure SDK transport built on the shared HTTP session.
+
+    Returns:
+        RequestsTransport: The shared transport.
+    """
+    global _transport
+    session = get_http_session()
+    with _lock:
+        if _transport is None:
+            _transport = RequestsTransport(session=session, session_owner=False)
+    return _transport
+
+
+def get_search_index_client():
+    """
+    Returns the process-wide Azure Cognitive Search index management client.
+
+    Returns:
+        SearchIndexClient: The shared client.
+    """
+    global _search_index_client
+    transport = _get_transport()
+    with _lock:
+        if _search_index_client is None:
+            _search_index_client = SearchIndexClient(
+                endpoint=config.COGNITIVE_SEARCH_CONFIG["endpoint"],
+                credential=AzureKeyCredential(config.COGNITIVE_SEARCH_CONFIG["api_key"]),
+                transport=transport
+            )
+    return _search_index_client
+
+
+def get_search_client(index_name):
+    """
+    Returns the process-wide Azure Cognitive Search client of an index.
+
+    Args:
+        index_name (str): The name of the search index.
+
+    Returns:
+        SearchClient: The shared client of the index.
+    """
+    transport = _get_transport()
+    with _lock:
+        if index_name not in _search_clients:
+            _search_clients[index_name] = SearchClient(
+                endpoint=config.COGNITIVE_SEARCH_CONFIG["endpoint"],
+                index_name=index_name,
+                credential=AzureKeyCredential(config.COGNITIVE_SEARCH_CONFIG["api_key"]),
+                transport=transport
+            )
+        return _search_clients[index_name]
+
+
+def is_index_ready(index_name):
+    """
+    Returns whether an index was already created or verified by this process.
+
+    Args:
+        index_name (str): The name of the search index.
+
+    Returns:
+        bool: True if the index is known to exist with the current schema.
+    """
+    with _lock:
+        return index_name in _ready_indexes
+
+
+def set_index_ready(index_name, ready=True):
+    """
+    Records whether an index exists with the current schema, so later requests skip the check.
+
+    Args:
+        index_name (str): The name of the search index.
+        ready (bool, optional): False to forget the index, e.g. before deleting it. Defaults to True.
+    """
+    with _lock:
+        if ready:
+            _ready_indexes.add(index_name)
+        else:
+            _ready_indexes.discard(index_name)
+
+
+def close_clients():
+    """
+    Closes the shared clients and their connections.
+    """
+    global _session, _transport, _search_index_client
+    with _lock:
+        for client in [_search_index_client, *_search_clients.values()]:
+            if client is not None:
+                client.close()
+        if _session is not None:
+            _session.close()
+        _session = _transport = _search_index_client = None
+        _search_clients.clear()
+        _ready_indexes.clear()
+        openai.requestssession = None
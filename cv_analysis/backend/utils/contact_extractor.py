@@ -0,0 +1,186 @@
+import re
+import threading
+import config
+
+
+class ContactExtractor:
+    """
+    A deterministic, regex-based extractor for CV contact information.
+
+    This class finds the email address, phone number (Turkish mobile/landline and international
+    formats) and postal address in raw CV text without calling an LLM, and scores how confident
+    the result is. Callers only fall back to OpenAI when the confidence is below the threshold.
+    """
+
+    EMAIL_PATTERN = re.compile(r"[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}")
+
+    # Digit groups are separated by spaces, tabs, dashes or dots only, so a number never runs into the next line
+    PHONE_PATTERNS = [
+        # International numbers: +country code followed by digit groups
+        re.compile(r"(?<![\d+])\+[1-9]\d{0,2}(?:[ \t\-.]?\(?\d{1,4}\)?){2,5}(?!\d)"),
+        # Turkish numbers: +90 / 0090 / 0 prefix, 3-digit area or mobile code, 7 digits; the prefix may
+        # be inside the parentheses, as in (0532)
+        re.compile(
+            r"(?<![\d+(])\(?(?:(?:\+|00)90[ \t\-.]?|0[ \t\-.]?)?\(?[2-5]\d{2}\)?[ \t\-.]?"
+            r"\d{3}[ \t\-.]?\d{2}[ \t\-.]?\d{2}(?!\d)"
+        ),
+    ]
+
+    ADDRESS_LABEL_PATTERN = re.compile(r"^\s*(?:Adres|Address|Ev Adresi)\s*[:\-]\s*(.+)$", re.IGNORECASE | re.MULTILINE)
+
+    ADDRESS_LINE_PATTERN = re.compile(
+        r"^.*(?:\bMah(?:allesi)?\b\.?|\bCad(?:desi)?\b\.?|\bSok(?:ak|\.)|\bBulvar[ıi]\b|\bBlv\.|"
+        r"\bApt\.?|\bNo\s*:\s*\d+|\b\d{5}\s+[A-ZÇĞİÖŞÜ][a-zçğıöşü]+|"
+        r"\bStreet\b|\bAvenue\b|\bRoad\b|\bSt\.\s|\bAve\.\s).*$",
+        re.MULTILINE
+    )
+
+    FIELD_WEIGHTS = {"email": 0.4, "phone": 0.4, "address": 0.2}
+
+    def extract(self, text):
+        """
+        Extracts contact information from raw CV text.
+
+        Each field contributes its weight to the confidence score when exactly one distinct value
+        is found; ambiguous fields (several distinct candidates) contribute half of their weight.
+
+        Args:
+            text (str): The raw CV text.
+
+        Returns:
+            tuple: A {"email", "phone", "address"} dictionary (None for fields that were not found)
+                   and a confidence score between 0 and 1.
+        """
+        candidates = {
+            "email": self._unique(self.EMAIL_PATTERN.findall(text)),
+            "phone": self._unique(
+                (
+                    match.group(0).strip()
+                    for pattern in self.PHONE_PATTERNS
+                    for match in pattern.finditer(text)
+                    if 10 <= len(re.sub(r"\D", "", match.group(0))) <= 15
+                ),
+                # The same number written with or without the country code counts once
+                key=lambda phone: re.sub(r"\D", "", phone)[-10:]
+            ),
+            "address": self._unique(
+                [match.group(1).strip() for match in self.ADDRESS_LABEL_PATTERN.finditer(text)]
+                or [match.group(0).strip() for match in self.ADDRESS_LINE_PATTERN.finditer(text)]
+            ),
+        }
+
+        contact_info = {}
+        confidence = 0.0
+        for field, values in candidates.items():
+            if field == "address" and values:
+                # Address lines often share a line with the email or phone number
+                address = self.remove_contact_info(values[0], contact_info)
+                contact_info[field] = " ".join(address.split()).strip(" |,;-") or None
+            else:
+                contact_info[field] = values[0] if values else None
+            if len(values) == 1:
+                confidence += self.FIELD_WEIGHTS[field]
+            elif values:
+                confidence += self.FIELD_WEIGHTS[field] / 2
+        return contact_info, round(confidence, 2)
+
+    @staticmethod
+    def remove_contact_info(text, contact_info):
+        """
+        Removes the extracted contact values from a CV text.
+
+        The phone number is removed where it appears exactly as extracted. Otherwise, e.g. in a text
+        cleaned by OpenAI, it is matched by its last ten digits with other separators or without the
+        country code; the digits may be separated by spaces, tabs, dashes, dots and parentheses but
+        never by a line break, so nothing on the following line is removed.
+
+        Args:
+            text (str): The CV text.
+            contact_info (dict): The {"email", "phone", "address"} dictionary returned by extract.
+
+        Returns:
+            str: The CV text without the contact values.
+        """
+        if contact_info.get("email"):
+            text = text.replace(contact_info["email"], "")
+        if contact_info.get("phone") and contact_info["phone"] in text:
+            text = text.replace(contact_info["phone"], "")
+        elif contact_info.get("phone"):
+            digits = re.sub(r"\D", "", contact_info["phone"])[-10:]
+            text = re.sub(r"(?:\+\d{1,3}|00\d{1,3}|0)?[ \t\-.()]*" + r"[ \t\-.()]*".join(digits), "", text)
+        if contact_info.get("address"):
+            text = text.replace(contact_info["address"], "")
+        return text
+
+    @staticmethod
+    def _unique(values, key=None):
+        """
+        Deduplicates values while keeping their order of appearance.
+
+        Args:
+            values (iterable of str): The candidate values.
+            key (callable, optional): Maps a value to its comparison key. By default values are
+                compared without whitespace and case differences.
+
+        Returns:
+            list: The distinct values.
+        """
+        seen = set()
+        unique_values = []
+        for value in values:
+            normalized = key(value) if key else re.sub(r"\s+", "", value).lower()
+            if normalized not in seen:
+                seen.add(normalized)
+                unique_values.append(value)
+        return unique_values
+
+
+class ContactExtractionStats:
+    """
+    Thread-safe counters for the regex fast path and the OpenAI fallback of contact extraction.
+    """
+
+    def __init__(self):
+        self.fast_path = 0
+        self.llm_fallbacks = 0
+        self.llm_calls_saved = 0
+        self._lock = threading.Lock()
+
+    def record_fast_path(self, llm_call_saved):
+        """
+        Records a CV whose contact information was taken from the regex extractor.
+
+        Args:
+            llm_call_saved (bool): Whether this avoided a separate contact extraction LLM call.
+        """
+        with self._lock:
+            self.fast_path += 1
+            if llm_call_saved:
+                self.llm_calls_saved += 1
+
+    def record_llm_fallback(self):
+        """
+        Records a CV whose contact information had to be extracted by OpenAI.
+        """
+        with self._lock:
+            self.llm_fallbacks += 1
+
+    def stats(self):
+        """
+        Returns the contact extraction counters.
+
+        Returns:
+            dict: The fast path and fallback counts, the fallback rate and the LLM calls saved.
+        """
+        with self._lock:
+            total = self.fast_path + self.llm_fallbacks
+            return {
+                "fast_path": self.fast_path,
+                "llm_fallbacks": self.llm_fallbacks,
+                "fallback_rate": self.llm_fallbacks / total if total else 0.0,
+                "llm_calls_saved": self.llm_calls_saved,
+                "confidence_threshold": config.CONTACT_EXTRACTION_CONFIDENCE_THRESHOLD
+            }
+
+
+contact_extraction_stats = ContactExtractionStats()
@@ -0,0 +1,188 @@
+import hashlib
+import threading
+from utils.ann_index import IVFIndex
+from utils.embedding_store import EmbeddingStore
+from utils.indexer import Indexer
+from utils.local_search import LocalSearcher
+from utils.search import AISearcher
+from utils.result_cache import get_result_cache
+import config
+
+
+def content_id(pdf_content):
+    """
+    Derives a stable CV id from the content of a CV PDF.
+
+    The same file always gets the same id, so re-uploading a CV that is already in the corpus
+    is detected without cleaning or embedding it again.
+
+    Args:
+        pdf_content (bytes): The raw bytes of the PDF file.
+
+    Returns:
+        str: A 32 character hexadecimal id.
+    """
+    return hashlib.sha256(pdf_content).hexdigest()[:32]
+
+
+class CVCorpus:
+    """
+    A persistent collection of CV embeddings that job descriptions are matched against.
+
+    Unlike the per-request flow of /find-best-cv, CVs are ingested once and kept. With the "azure"
+    backend they live in a dedicated Azure Cognitive Search index (config.CV_CORPUS_CONFIG["index_name"]),
+    which the per-request cleanup never touches. With the "local" backend they are held by a
+    LocalSearcher that is saved to config.CV_CORPUS_CONFIG["local_path"] after every change. Large
+    corpora can use an IVFIndex for approximate search instead (config.ANN_INDEX_CONFIG, saved after
+    every change as well), or an EmbeddingStore that appends every change to its files
+    (config.EMBEDDING_STORE_CONFIG).
+
+    Every change also increases the corpus version used by the ResultCache, so cached rankings of
+    the previous corpus content are never returned.
+    """
+
+    RESULT_CACHE_SCOPE = "corpus"
+
+    def __init__(self):
+        """
+        Initializes the CVCorpus for the configured search backend.
+
+        Raises:
+            ValueError: If config.SEARCH_BACKEND is not a supported backend name.
+        """
+        self.backend = config.SEARCH_BACKEND
+        self._lock = threading.Lock()
+        self.local_path = config.CV_CORPUS_CONFIG["local_path"]
+        if self.backend == "local" and config.ANN_INDEX_CONFIG["enabled"]:
+            ann_config = dict(config.ANN_INDEX_CONFIG)
+            self.local_path = ann_config.pop("path")
+            ann_config.pop("enabled")
+            self.local_searcher = IVFIndex.load(self.local_path, **ann_config)
+        elif self.backend == "local" and config.EMBEDDING_STORE_CONFIG["enabled"]:
+            store_config = config.EMBEDDING_STORE_CONFIG
+            self.local_searcher = EmbeddingStore(
+                store_config["path"], store_config["encoding"], store_config["keep_full_precision"]
+            )
+        elif self.backend == "local":
+            self.local_searcher = LocalSearcher.load(self.local_path)
+        elif self.backend == "azure":
+            self.indexer = Indexer({}, index_name=config.CV_CORPUS_CONFIG["index_name"])
+            self.indexer.create_index()
+            self.ai_searcher = AISearcher(index_name=config.CV_CORPUS_CONFIG["index_name"])
+        else:
+            raise ValueError(f"Unsupported search backend: {self.backend}")
+
+    def version(self):
+        """
+        Returns the current corpus version used to scope cached rankings.
+
+        Returns:
+            str or None: The corpus version, or None if the result cache is disabled.
+        """
+        result_cache = get_result_cache()
+        return result_cache.get_corpus_version(self.RESULT_CACHE_SCOPE) if result_cache else None
+
+    def filter_indexed(self, cv_ids):
+        """
+        Returns the subset of the given CV ids that are already in the corpus.
+
+        Args:
+            cv_ids (iterable of str): The CV ids to check.
+
+        Returns:
+            set: The CV ids that are already indexed.
+        """
+        if self.backend == "local":
+            with self._lock:
+                return set(cv_ids) & self.local_searcher.indexed_cv_ids()
+        return self.indexer.filter_indexed_cv_ids(cv_ids)
+
+    def add(self, cv_embeddings):
+        """
+        Adds CV embeddings to the corpus.
+
+        Args:
+            cv_embeddings (dict): A dictionary containing CV embeddings keyed by CV id, as returned
+                by CVEmbedder.embed_all_cvs.
+        """
+        if not cv_embeddings:
+            return
+        if self.backend == "local":
+            with self._lock:
+                self.local_searcher.add_embeddings(cv_embeddings)
+                self._save_local()
+        else:
+            self.indexer.cv_embeddings = cv_embeddings
+            self.indexer.ingest_embeddings()
+        self._invalidate_cached_results()
+
+    def search(self, job_embedding, top_k=10):
+        """
+        Searches the corpus for the CVs most similar to a job embedding.
+
+        Args:
+            job_embedding (list): The embedding vector for the job description.
+            top_k (int, optional): The number of top similar CVs to return. Defaults to 10.
+
+        Returns:
+            list: A list of dictionaries, each containing the CV id, CV name, contact information,
+                  and similarity score.
+        """
+        if self.backend == "local":
+            with self._lock:
+                return self.local_searcher.search_similar_cv(job_embedding, top_k=top_k)
+        return self.ai_searcher.search_similar_cv(job_embedding, top_k=top_k)
+
+    def delete(self, cv_id):
+        """
+        Removes a CV from the corpus.
+
+        Args:
+            cv_id (str): The id of the CV to remove.
+
+        Returns:
+            bool: True if the CV was found and removed, False otherwise.
+        """
+        if self.backend == "local":
+            with self._lock:
+                removed = self.local_searcher.delete_documents([cv_id])
+                if removed:
+                    self._save_local()
+        else:
+            removed = self.indexer.delete_cv(cv_id)
+        if removed:
+            self._invalidate_cached_results()
+        return removed > 0
+
+    def _save_local(self):
+        """
+        Saves the LocalSearcher or IVFIndex to disk. An EmbeddingStore has already written every change.
+        """
+        if not isinstance(self.local_searcher, EmbeddingStore):
+            self.local_searcher.save(self.local_path)
+
+    def _invalidate_cached_results(self):
+        """
+        Increases the corpus version, which invalidates the cached rankings of the corpus.
+        """
+        result_cache = get_result_cache()
+        if result_cache:
+            result_cache.bump_corpus_version(self.RESULT_CACHE_SCOPE)
+
+
+_cv_corpus = None
+_cv_corpus_lock = threading.Lock()
+
+
+def get_cv_corpus():
+    """
+    Returns the process-wide CV corpus, creating it on first use.
+
+    Returns:
+        CVCorpus: The shared CV corpus.
+    """
+    global _cv_corpus
+    with _cv_corpus_lock:
+        if _cv_corpus is None:
+            _cv_corpus = CVCorpus()
+        return _cv_corpus
@@ -0,0 +1,124 @@
+import hashlib
+import zlib
+import numpy as np
+from utils.keyword_filter import tokenize
+
+# A prime above 2**32 for the permutations (a * x + b) % HASH_PRIME of 32-bit shingle hashes; with a, b and x
+# below 2**32 the product never overflows uint64
+HASH_PRIME = np.uint64(4294967311)
+
+
+class DuplicateDetector:
+    """
+    Finds exact and near-duplicate CV texts with a content hash and MinHash locality-sensitive hashing.
+
+    Texts are compared after normalization (see utils.keyword_filter.tokenize), so case, Turkish
+    diacritics, whitespace and punctuation differences do not matter. Two texts are exact duplicates if
+    their normalized token sequences are equal, and near duplicates if the Jaccard similarity of their
+    word shingles (runs of shingle_size consecutive tokens) reaches similarity_threshold.
+
+    Near duplicates are found without comparing every pair: each text's MinHash signature is split into
+    bands, and only texts that share a band bucket become candidates. Candidates are then verified with
+    their exact shingle Jaccard similarity. Texts are added one at a time and compared with the
+    representatives added before them, so the detector works on a whole batch as well as on a stream.
+    """
+
+    def __init__(self, similarity_threshold=0.9, shingle_size=5, num_permutations=128, bands=16):
+        """
+        Initializes an empty DuplicateDetector.
+
+        Args:
+            similarity_threshold (float, optional): The shingle Jaccard similarity from which two texts
+                are near duplicates. Defaults to 0.9.
+            shingle_size (int, optional): The number of tokens per shingle. Defaults to 5.
+            num_permutations (int, optional): The length of the MinHash signatures. Defaults to 128.
+            bands (int, optional): The number of LSH bands the signatures are split into; more bands
+                find less similar candidates. Must divide num_permutations. Defaults to 16.
+
+        Raises:
+            ValueError: If bands does not divide num_permutations.
+        """
+        if num_permutations % bands:
+            raise ValueError(f"The {bands} LSH bands do not divide {num_permutations} MinHash permutations.")
+        self.similarity_threshold = similarity_threshold
+        self.shingle_size = shingle_size
+        self.bands = bands
+        self.rows_per_band = num_permutations // bands
+        rng = np.random.default_rng(0)
+        self._a = rng.integers(1, 2 ** 32, num_permutations, dtype=np.uint64)
+        self._b = rng.integers(0, 2 ** 32, num_permutations, dtype=np.uint64)
+        self._exact = {}
+        self._buckets = {}
+        self._shingles = {}
+
+    def add(self, key, text):
+        """
+        Checks a text against the texts added so far and keeps it as a representative if it is new.
+
+        Args:
+            key (str): The key of the text, e.g. a CV upload id.
+            text (str): The text.
+
+        Returns:
+            tuple or None: The key of the representative text it duplicates and their shingle Jaccard
+                           similarity (1.0 for exact duplicates), or None if the text is not a duplicate.
+                           Texts without any token are never duplicates.
+        """
+        tokens = tokenize(text)
+        if not tokens:
+            return None
+
+        content_hash = hashlib.sha256(" ".join(tokens).encode("utf-8")).hexdigest()
+        if content_hash in self._exact:
+            return self._exact[content_hash], 1.0
+
+        shingles = self._shingle(tokens)
+        band_keys = self._band_keys(self._signature(shingles))
+        candidates = {candidate for band_key in band_keys for candidate in self._buckets.get(band_key, ())}
+        best_match = None
+        for candidate in candidates:
+            similarity = self._jaccard(shingles, self._shingles[candidate])
+            if similarity >= self.similarity_threshold and (best_match is None or similarity > best_match[1]):
+                best_match = (candidate, similarity)
+        if best_match is not None:
+            return best_match
+
+        self._exact[content_hash] = key
+        self._shingles[key] = shingles
+        for band_key in band_keys:
+            self._buckets.setdefault(band_key, []).append(key)
+        return None
+
+    def _shingle(self, tokens):
+        """
+        Returns the sorted unique 32-bit hashes of the text's word shingles.
+        """
+        size = min(self.shingle_size, len(tokens))
+        return np.unique(np.fromiter(
+            (zlib.crc32(" ".join(tokens[start:start + size]).encode("utf-8"))
+             for start in range(len(tokens) - size + 1)),
+            dtype=np.uint64
+        ))
+
+    def _signature(self, shingles):
+        """
+        Returns the MinHash signature of a shingle set: the minimum of every hash permutation.
+        """
+        return ((self._a[:, None] * shingles[None, :] + self._b[:, None]) % HASH_PRIME).min(axis=1)
+
+    def _band_keys(self, signature):
+        """
+        Returns the LSH bucket key of every band of a signature.
+        """
+        return [
+            (band, signature[band * self.rows_per_band:(band + 1) * self.rows_per_band].tobytes())
+            for band in range(self.bands)
+        ]
+
+    @staticmethod
+    def _jaccard(shingles, other_shingles):
+        """
+        Returns the Jaccard similarity of two sorted unique shingle hash arrays.
+        """
+        intersection = len(np.intersect1d(shingles, other_shingles, assume_unique=True))
+        return intersection / (len(shingles) + len(other_shingles) - intersection)
@@ -0,0 +1,172 @@
+import hashlib
+import sqlite3
+import threading
+import time
+import numpy as np
+import config
+
+
+class EmbeddingCache:
+    """
+    A persistent, content-addressed cache for embedding vectors backed by SQLite.
+
+    Entries are keyed by a SHA-256 hash of the normalized input text together with the embedding
+    model and deployment name, so the same CV or job description is only sent to the embedding API
+    once. The cache holds at most `max_entries` vectors and evicts the least recently used ones.
+    The access times of cache hits are kept in memory and written in one batch on the next put, or
+    once ACCESS_FLUSH_BATCH_SIZE of them are pending, so lookups do not write to the database.
+    """
+
+    # Number of pending access times that triggers a write from get
+    ACCESS_FLUSH_BATCH_SIZE = 256
+
+    def __init__(self, db_path, max_entries):
+        """
+        Initializes the EmbeddingCache and creates the SQLite table if needed.
+
+        Args:
+            db_path (str): The path of the SQLite database file.
+            max_entries (int): The maximum number of embeddings kept in the cache.
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._pending_access = {}
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, "
+            "vector BLOB NOT NULL, "
+            "last_access REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)"
+        )
+        self._connection.commit()
+        self._size = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def make_key(text, model_name):
+        """
+        Builds the cache key for a text and an embedding model.
+
+        The text is normalized by collapsing all whitespace runs, so re-extracted PDFs that only
+        differ in line breaks or spacing map to the same entry.
+
+        Args:
+            text (str): The text to be embedded.
+            model_name (str): The embedding model and deployment identifier.
+
+        Returns:
+            str: The hexadecimal SHA-256 digest used as the cache key.
+        """
+        normalized_text = " ".join(text.split())
+        return hashlib.sha256(f"{model_name}\x00{normalized_text}".encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Retrieves a cached embedding and marks it as recently used.
+
+        Args:
+            key (str): The cache key built by make_key.
+
+        Returns:
+            list or None: The cached embedding vector, or None on a cache miss.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT vector FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._pending_access[key] = time.time()
+            if len(self._pending_access) >= self.ACCESS_FLUSH_BATCH_SIZE:
+                self._flush_access_times()
+                self._connection.commit()
+            self.hits += 1
+        return np.frombuffer(row[0], dtype=np.float32).tolist()
+
+    def put(self, key, embedding):
+        """
+        Stores an embedding and evicts the least recently used entries beyond the size cap.
+
+        Args:
+            key (str): The cache key built by make_key.
+            embedding (list): The embedding vector to store.
+        """
+        vector = np.asarray(embedding, dtype=np.float32).tobytes()
+        with self._lock:
+            # Write the pending access times first, so eviction sees the actual recency
+            self._flush_access_times()
+            cursor = self._connection.execute(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+                (key, vector, time.time())
+            )
+            self._size += cursor.rowcount
+            if self._size > self.max_entries:
+                overflow = self._size - self.max_entries
+                self._connection.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,)
+                )
+                self._size -= overflow
+                self.evictions += overflow
+            self._connection.commit()
+
+    def _flush_access_times(self):
+        """
+        Writes the pending access times of cache hits without committing. The caller holds the lock.
+        """
+        if self._pending_access:
+            self._connection.executemany(
+                "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                [(last_access, key) for key, last_access in self._pending_access.items()]
+            )
+            self._pending_access = {}
+
+    def stats(self):
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict: The number of hits, misses, evictions and stored entries, and the hit rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": self._size,
+                "max_entries": self.max_entries,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+_embedding_cache = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache():
+    """
+    Returns the process-wide EmbeddingCache, creating it on first use.
+
+    Returns:
+        EmbeddingCache or None: The shared cache, or None if caching is disabled in the configuration.
+    """
+    global _embedding_cache
+    if not config.EMBEDDING_CACHE_CONFIG["enabled"]:
+        return None
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            _embedding_cache = EmbeddingCache(
+                config.EMBEDDING_CACHE_CONFIG["path"],
+                config.EMBEDDING_CACHE_CONFIG["max_entries"]
+            )
+    return _embedding_cache
@@ -0,0 +1,584 @@
+import json
+import os
+import shutil
+import threading
+import numpy as np
+import config
+
+ENCODINGS = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+
+def encode_rows(vectors, encoding):
+    """
+    Encodes unit-length float32 rows as float32, float16 or scalar-quantized int8.
+
+    int8 rows are quantized with a per-row scale factor, `row ~= codes * scale` with
+    `scale = max(|row|) / 127`, so every row uses the full code range.
+
+    Args:
+        vectors (numpy.ndarray): The rows to encode.
+        encoding (str): One of ENCODINGS.
+
+    Returns:
+        tuple: The encoded rows and, for int8, their float32 scale factors (None otherwise).
+    """
+    if encoding != "int8":
+        return vectors.astype(ENCODINGS[encoding]), None
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+class EmbeddingStore:
+    """
+    A compact, append-only on-disk store of CV embeddings that is searched through memory maps.
+
+    Rows are normalized to unit length and encoded as float32, float16 (half the size) or int8
+    (a quarter of the size, scalar-quantized with a per-row scale factor, see encode_rows). At 1,536
+    dimensions a CV takes 1,540 bytes as int8 (6 KB as float32), and a million CVs fit in about
+    1.5 GB of page cache.
+
+    The store is a directory with one file per column, each only ever appended to:
+        - meta.json: the dimension, the encoding and whether full-precision rows are kept.
+        - vectors.bin: the encoded rows.
+        - scales.bin: the float32 scale of every row (int8 only).
+        - full.bin: the float32 rows (optional), read only for the candidates being re-ranked.
+        - documents.jsonl: one line per added CV (its id, name, contact info and number of rows) and
+          one line per deleted CV. A CV is committed once its line is written, and rows appended after
+          the last committed line, e.g. by a crash during an append, are cut off when the store is opened.
+
+    Searching scores float32 stores directly on the memory map, without any copy. float16 and int8
+    rows are converted to float32 in small blocks that stay in the CPU cache. The best candidates of the
+    quantized scores can be re-scored with the full-precision rows before the final top-k is taken.
+    Deleted CVs are kept as tombstones until compact rewrites the files.
+
+    The search methods return the same results as LocalSearcher, so the store can replace it as
+    the local CV corpus.
+    """
+
+    # Rows converted to float32 at a time while scoring; 1.5 MB at 1,536 dimensions fits in the CPU cache
+    BLOCK_ROWS = 256
+
+    def __init__(self, path, encoding="int8", keep_full_precision=True, dimension=config.EMBEDDING_DIMENSION):
+        """
+        Opens the store at a directory, creating it if it does not exist.
+
+        The encoding, full-precision setting and dimension of an existing store are read from its
+        meta.json; the arguments only apply to new stores.
+
+        Args:
+            path (str): The directory of the store.
+            encoding (str, optional): "float32", "float16" or "int8". Defaults to "int8".
+            keep_full_precision (bool, optional): Whether to also keep float32 rows for re-ranking.
+                Ignored for float32 stores. Defaults to True.
+            dimension (int, optional): The embedding dimension. Defaults to config.EMBEDDING_DIMENSION.
+
+        Raises:
+            ValueError: If the encoding is not supported.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._recover_compaction()
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as meta_file:
+                meta = json.load(meta_file)
+            encoding, keep_full_precision, dimension = meta["encoding"], meta["full_precision"], meta["dimension"]
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unsupported embedding store encoding: {encoding}")
+        self.encoding = encoding
+        self.dtype = ENCODINGS[encoding]
+        self.dimension = dimension
+        self.keep_full_precision = keep_full_precision and encoding != "float32"
+
+        if not os.path.exists(meta_path):
+            os.makedirs(path, exist_ok=True)
+            self._write_meta()
+        self._load()
+
+    def add_embeddings(self, cv_embeddings):
+        """
+        Appends CV embeddings to the store.
+
+        CVs whose id is already present are replaced. Embeddings with an unexpected dimension are
+        skipped and logged. With "max" chunk pooling (config.CV_CHUNKING_CONFIG) every chunk vector
+        of a CV gets its own row, like in LocalSearcher.
+
+        Args:
+            cv_embeddings (dict): A dictionary containing CV embeddings keyed by CV id.
+        """
+        use_chunks = config.CV_CHUNKING_CONFIG["pooling"] == "max"
+        documents = []
+        vectors = []
+        for cv_id, cv_data in cv_embeddings.items():
+            cv_name = cv_data.get('cv_name', cv_id)
+            cv_vectors = cv_data.get('chunk_embeddings') if use_chunks else None
+            cv_vectors = cv_vectors or [cv_data['embedding']]
+            if any(len(embedding) != self.dimension for embedding in cv_vectors):
+                config.app_logger.error(f"Embedding dimension mismatch for {cv_name}: Expected {self.dimension}")
+                continue
+            documents.append({
+                "cv_id": cv_id,
+                "cv_name": cv_name,
+                "contact_info": cv_data.get('contact_info', ''),
+                "rows": len(cv_vectors)
+            })
+            vectors.extend(cv_vectors)
+
+        if documents:
+            self._append(documents, np.asarray(vectors, dtype=np.float32))
+        config.app_logger.info(f"{len(documents)} documents appended to the embedding store.")
+
+    def add_vectors(self, cv_ids, vectors, cv_names=None, contact_infos=None):
+        """
+        Appends one embedding per CV from a NumPy matrix, without building Python lists.
+
+        Args:
+            cv_ids (list of str): The CV ids, one per row.
+            vectors (numpy.ndarray): A (len(cv_ids), dimension) array of embeddings.
+            cv_names (list of str, optional): The CV names. Defaults to the CV ids.
+            contact_infos (list of str, optional): The contact information. Defaults to empty strings.
+        """
+        cv_names = cv_names or cv_ids
+        contact_infos = contact_infos or [''] * len(cv_ids)
+        documents = [
+            {"cv_id": cv_id, "cv_name": cv_name, "contact_info": contact_info, "rows": 1}
+            for cv_id, cv_name, contact_info in zip(cv_ids, cv_names, contact_infos)
+        ]
+        self._append(documents, np.asarray(vectors, dtype=np.float32).reshape(len(documents), self.dimension))
+
+    def indexed_cv_ids(self):
+        """
+        Returns the ids of all CVs held by the store.
+
+        Returns:
+            set: The CV ids.
+        """
+        with self._lock:
+            return set(self._positions)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._positions)
+
+    def vectors(self):
+        """
+        Returns a read-only, zero-copy view of the encoded rows, including deleted ones.
+
+        Returns:
+            numpy.ndarray: A (rows, dimension) memory-mapped array of the store's encoding.
+        """
+        with self._lock:
+            return self._vectors
+
+    def scales(self):
+        """
+        Returns a read-only, zero-copy view of the per-row scale factors.
+
+        Returns:
+            numpy.ndarray or None: The float32 scales of an int8 store, None for other encodings.
+        """
+        with self._lock:
+            return self._scales
+
+    def search_similar_cv(self, job_embedding, top_k=10, rerank_oversample=None):
+        """
+        Searches for the most similar CVs based on the provided job embedding.
+
+        Args:
+            job_embedding (list): The embedding vector for the job description.
+            top_k (int, optional): The number of top similar CVs to return. Defaults to 10.
+            rerank_oversample (int, optional): See search_similar_cv_batch.
+
+        Returns:
+            list: A list of dictionaries, each containing the CV id, CV name, contact information, and
+                  similarity score. Returns an empty list if an error occurs during the search.
+        """
+        results = self.search_similar_cv_batch([job_embedding], top_k=top_k, rerank_oversample=rerank_oversample)
+        return results[0] if results else []
+
+    def search_similar_cv_batch(self, job_embeddings, top_k=10, rerank_oversample=None):
+        """
+        Searches for the most similar CVs for several job embeddings.
+
+        Scores are reported on the same scale as Azure Cognitive Search cosine scores
+        (1 / (2 - cosine_similarity)), like LocalSearcher.
+
+        Args:
+            job_embeddings (list): A list of embedding vectors, one per job description.
+            top_k (int, optional): The number of top similar CVs to return per job. Defaults to 10.
+            rerank_oversample (int, optional): Re-score the best top_k * rerank_oversample rows with
+                the full-precision rows. 0 disables re-ranking. Defaults to
+                config.EMBEDDING_STORE_CONFIG["rerank_oversample"]; ignored without full-precision rows.
+
+        Returns:
+            list: One result list per job embedding, in the same format as search_similar_cv.
+                  Returns an empty list if an error occurs during the search.
+        """
+        if rerank_oversample is None:
+            rerank_oversample = config.EMBEDDING_STORE_CONFIG["rerank_oversample"]
+        try:
+            queries = np.asarray(job_embeddings, dtype=np.float32).reshape(-1, self.dimension)
+            norms = np.linalg.norm(queries, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            queries = np.ascontiguousarray(queries / norms, dtype=np.float32)
+
+            with self._lock:
+                if not self._positions:
+                    return [[] for _ in range(len(queries))]
+                # The arrays are only ever replaced, never changed in place, so a snapshot stays consistent
+                vectors, scales, full = self._vectors, self._scales, self._full
+                row_documents, live_rows, row_offsets = self._row_documents, self._live_rows, self._row_offsets
+                documents = self._documents
+
+            similarities = self._score_rows(queries, vectors, scales)
+            similarities[:, ~live_rows] = -np.inf
+            if rerank_oversample and full is not None:
+                top_documents, top_scores = self._rerank(
+                    queries, similarities, full, row_documents, top_k, top_k * rerank_oversample
+                )
+            else:
+                top_documents, top_scores = self._top_documents(similarities, row_offsets, top_k)
+
+            results = []
+            for document_indices, document_scores in zip(top_documents, top_scores):
+                results.append([
+                    {
+                        "cv_id": documents[index]["cv_id"],
+                        "cv_name": documents[index]["cv_name"],
+                        "contact_info": documents[index]["contact_info"] or "N/A",
+                        "similarity_score": float(1.0 / (2.0 - score))
+                    }
+                    for index, score in zip(document_indices, document_scores) if np.isfinite(score)
+                ])
+            return results
+
+        except Exception as e:
+            config.app_logger.error(f"Error during embedding store search for similar CVs: {str(e)}")
+            return []
+
+    def delete_documents(self, cv_ids):
+        """
+        Deletes CVs by appending tombstones. Their rows are reclaimed by compact.
+
+        The store is compacted automatically once more than half of its rows are deleted.
+
+        Args:
+            cv_ids (iterable of str): The ids of the CVs to remove. Unknown ids are ignored.
+
+        Returns:
+            int: The number of removed CVs.
+        """
+        with self._lock:
+            cv_ids = [cv_id for cv_id in dict.fromkeys(cv_ids) if cv_id in self._positions]
+            if not cv_ids:
+                return 0
+            self._write_documents([{"deleted": cv_id} for cv_id in cv_ids])
+            for cv_id in cv_ids:
+                self._delete_position(cv_id)
+            self._refresh_rows()
+            needs_compaction = (~self._live_rows).sum() * 2 > len(self._live_rows)
+        if needs_compaction:
+            self.compact()
+        return len(cv_ids)
+
+    def delete_all_documents(self):
+        """
+        Removes all CVs and empties the store's files.
+
+        The files are replaced rather than truncated, so searches still reading the previous memory
+        maps are not affected. The document log is emptied first: if the store crashes before the row
+        files are emptied, opening it cuts off their rows, which no committed log line refers to anymore.
+        """
+        with self._lock:
+            for name in ("documents.jsonl", "vectors.bin", "scales.bin", "full.bin"):
+                empty_path = os.path.join(self.path, f"{name}.tmp")
+                open(empty_path, "wb").close()
+                os.replace(empty_path, os.path.join(self.path, name))
+            self._load_files()
+
+    def compact(self):
+        """
+        Rewrites the store without the rows and log lines of deleted CVs.
+
+        The compacted files are written to a sibling directory that then replaces the store, so a
+        crash during compaction leaves the previous store intact. The store is moved aside to
+        `<path>.previous` for the swap; if a crash happens before the compacted directory takes its place,
+        the next open moves it back (see _recover_compaction).
+        """
+        with self._lock:
+            compacted_path = f"{self.path}.compact"
+            shutil.rmtree(compacted_path, ignore_errors=True)
+            os.makedirs(compacted_path)
+            live_documents = [
+                self._documents[index] for index in sorted(self._positions.values())
+            ]
+            live_rows = self._live_rows
+            with open(os.path.join(compacted_path, "meta.json"), "w") as meta_file:
+                json.dump(self._meta(), meta_file)
+            self._copy_rows(self._vectors, live_rows, os.path.join(compacted_path, "vectors.bin"))
+            self._copy_rows(self._scales, live_rows, os.path.join(compacted_path, "scales.bin"))
+            self._copy_rows(self._full, live_rows, os.path.join(compacted_path, "full.bin"))
+            with open(os.path.join(compacted_path, "documents.jsonl"), "w", encoding="utf-8") as documents_file:
+                documents_file.writelines(json.dumps(document) + "\n" for document in live_documents)
+
+            self._vectors = self._scales = self._full = None
+            previous_path = f"{self.path}.previous"
+            os.replace(self.path, previous_path)
+            os.replace(compacted_path, self.path)
+            shutil.rmtree(previous_path, ignore_errors=True)
+            self._load_files()
+        config.app_logger.info(f"Embedding store compacted to {len(live_documents)} documents.")
+
+    def nbytes(self):
+        """
+        Returns the size of the store's files.
+
+        Returns:
+            dict: The bytes of the encoded rows (with their scales), which are scanned by every search,
+                  and of the full-precision rows, which are only read for re-ranked candidates.
+        """
+        with self._lock:
+            scanned = self._vectors.nbytes + (self._scales.nbytes if self._scales is not None else 0)
+            full = self._full.nbytes if self._full is not None else 0
+        return {"scanned_bytes": scanned, "full_precision_bytes": full}
+
+    def _append(self, documents, vectors):
+        """
+        Appends CVs and their rows. Existing CVs with the same ids are deleted first.
+
+        Args:
+            documents (list of dict): The log entries of the CVs, with their number of rows.
+            vectors (numpy.ndarray): The float32 rows of all CVs, in order.
+        """
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        vectors = vectors / norms
+        codes, scales = encode_rows(vectors, self.encoding)
+
+        with self._lock:
+            replaced = [document["cv_id"] for document in documents if document["cv_id"] in self._positions]
+            if replaced:
+                self._write_documents([{"deleted": cv_id} for cv_id in replaced])
+                for cv_id in replaced:
+                    self._delete_position(cv_id)
+
+            # Rows first, then the log lines that commit them
+            self._append_rows("vectors.bin", codes)
+            if scales is not None:
+                self._append_rows("scales.bin", scales)
+            if self.keep_full_precision:
+                self._append_rows("full.bin", vectors.astype(np.float32))
+            self._write_documents(documents)
+
+            for document in documents:
+                self._add_position(document)
+            self._map_files()
+            self._refresh_rows()
+
+    def _score_rows(self, queries, vectors, scales):
+        """
+        Computes the cosine similarity of every query with every row.
+
+        Args:
+            queries (numpy.ndarray): The unit-length float32 queries.
+            vectors (numpy.ndarray): The memory-mapped encoded rows.
+            scales (numpy.ndarray or None): The memory-mapped int8 scale factors.
+
+        Returns:
+            numpy.ndarray: A (queries, rows) float32 array of similarities.
+        """
+        if vectors.dtype == np.float32:
+            return queries @ vectors.T
+
+        similarities = np.empty((len(queries), len(vectors)), dtype=np.float32)
+        block = np.empty((self.BLOCK_ROWS, self.dimension), dtype=np.float32)
+        for start in range(0, len(vectors), self.BLOCK_ROWS):
+            rows = vectors[start:start + self.BLOCK_ROWS]
+            np.copyto(block[:len(rows)], rows, casting="unsafe")
+            similarities[:, start:start + len(rows)] = queries @ block[:len(rows)].T
+        if scales is not None:
+            similarities *= scales
+        return similarities
+
+    @staticmethod
+    def _top_documents(similarities, row_offsets, top_k):
+        """
+        Selects the top_k CVs per query, scoring CVs with several rows by their best row.
+
+        Args:
+            similarities (numpy.ndarray): The (queries, rows) similarities; deleted rows are -inf.
+            row_offsets (numpy.ndarray): The first row of every CV in the log, deleted ones included.
+            top_k (int): The number of CVs per query.
+
+        Returns:
+            tuple: The (queries, k) CV indices and their similarities, best first.
+        """
+        if len(row_offsets) != similarities.shape[1]:
+            similarities = np.maximum.reduceat(similarities, row_offsets, axis=1)
+        k = min(top_k, similarities.shape[1])
+        top_indices = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(similarities, top_indices, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        return np.take_along_axis(top_indices, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+    @staticmethod
+    def _rerank(queries, similarities, full, row_documents, top_k, candidates):
+        """
+        Re-scores the best candidate rows of every query with the full-precision rows.
+
+        Only the candidate rows of the memory-mapped full-precision file are read.
+
+        Args:
+            queries (numpy.ndarray): The unit-length float32 queries.
+            similarities (numpy.ndarray): The (queries, rows) quantized similarities.
+            full (numpy.ndarray): The memory-mapped float32 rows.
+            row_documents (numpy.ndarray): The CV index of every row.
+            top_k (int): The number of CVs per query.
+            candidates (int): The number of candidate rows per query.
+
+        Returns:
+            tuple: Per query, the CV indices and their exact similarities, best first.
+        """
+        candidates = min(max(candidates, top_k), similarities.shape[1])
+        top_documents, top_scores = [], []
+        for query, row_similarities in zip(queries, similarities):
+            candidate_rows = np.argpartition(-row_similarities, candidates - 1)[:candidates]
+            candidate_rows = candidate_rows[np.isfinite(row_similarities[candidate_rows])]
+            candidate_rows.sort()
+            exact_scores = np.asarray(full[candidate_rows], dtype=np.float32) @ query
+            order = np.argsort(-exact_scores)
+            # Keep the best row of every CV, then the top_k CVs
+            _, first = np.unique(row_documents[candidate_rows[order]], return_index=True)
+            best = np.sort(first)[:top_k]
+            top_documents.append(row_documents[candidate_rows[order[best]]])
+            top_scores.append(exact_scores[order[best]])
+        return top_documents, top_scores
+
+    def _recover_compaction(self):
+        """
+        Finishes or rolls back a compaction that was interrupted by a crash.
+
+        If the store directory is missing while `<path>.previous` exists, the crash happened between
+        the two renames of compact, and the previous store is restored. A leftover previous store next to
+        the store directory, or a leftover compacted directory, is removed.
+        """
+        previous_path = f"{self.path}.previous"
+        if os.path.isdir(previous_path):
+            if os.path.exists(self.path):
+                shutil.rmtree(previous_path, ignore_errors=True)
+            else:
+                config.app_logger.warning(f"Restoring the embedding store {self.path} after an interrupted compaction.")
+                os.replace(previous_path, self.path)
+        shutil.rmtree(f"{self.path}.compact", ignore_errors=True)
+
+    def _meta(self):
+        return {
+            "dimension": self.dimension,
+            "encoding": self.encoding,
+            "full_precision": self.keep_full_precision
+        }
+
+    def _write_meta(self):
+        with open(os.path.join(self.path, "meta.json"), "w") as meta_file:
+            json.dump(self._meta(), meta_file)
+
+    def _append_rows(self, name, rows):
+        with open(os.path.join(self.path, name), "ab") as rows_file:
+            rows_file.write(np.ascontiguousarray(rows).tobytes())
+            rows_file.flush()
+            os.fsync(rows_file.fileno())
+
+    def _write_documents(self, entries):
+        with open(os.path.join(self.path, "documents.jsonl"), "a", encoding="utf-8") as documents_file:
+            documents_file.write("".join(json.dumps(entry) + "\n" for entry in entries))
+            documents_file.flush()
+            os.fsync(documents_file.fileno())
+
+    @staticmethod
+    def _copy_rows(rows, keep, path):
+        with open(path, "wb") as rows_file:
+            if rows is not None:
+                for start in range(0, len(rows), EmbeddingStore.BLOCK_ROWS):
+                    block_keep = keep[start:start + EmbeddingStore.BLOCK_ROWS]
+                    rows_file.write(np.ascontiguousarray(rows[start:start + len(block_keep)][block_keep]).tobytes())
+
+    def _load(self):
+        with self._lock:
+            self._load_files()
+
+    def _load_files(self):
+        """
+        Replays the document log and maps the row files. Must be called with the lock held.
+
+        A torn last log line and rows that no committed log line refers to are cut off.
+        """
+        self._documents = []
+        self._positions = {}
+        self._deleted = set()
+        self._rows = 0
+        documents_path = os.path.join(self.path, "documents.jsonl")
+        if os.path.exists(documents_path):
+            with open(documents_path, "rb") as documents_file:
+                content = documents_file.read()
+            committed = content[:content.rfind(b"\n") + 1]
+            if len(committed) != len(content):
+                with open(documents_path, "r+b") as documents_file:
+                    documents_file.truncate(len(committed))
+            for line in committed.decode("utf-8").splitlines():
+                entry = json.loads(line)
+                if "deleted" in entry:
+                    self._delete_position(entry["deleted"])
+                else:
+                    self._add_position(entry)
+
+        row_files = [("vectors.bin", self.dimension * np.dtype(self.dtype).itemsize)]
+        if self.encoding == "int8":
+            row_files.append(("scales.bin", 4))
+        if self.keep_full_precision:
+            row_files.append(("full.bin", self.dimension * 4))
+        for name, row_bytes in row_files:
+            row_path = os.path.join(self.path, name)
+            if not os.path.exists(row_path):
+                open(row_path, "wb").close()
+            if os.path.getsize(row_path) > self._rows * row_bytes:
+                os.truncate(row_path, self._rows * row_bytes)
+            elif os.path.getsize(row_path) < self._rows * row_bytes:
+                raise ValueError(f"The embedding store file {row_path} is missing rows.")
+        self._map_files()
+        self._refresh_rows()
+
+    def _add_position(self, document):
+        self._positions[document["cv_id"]] = len(self._documents)
+        self._documents.append(document)
+        self._rows += document["rows"]
+
+    def _delete_position(self, cv_id):
+        position = self._positions.pop(cv_id, None)
+        if position is not None:
+            self._deleted.add(position)
+
+    def _map_files(self):
+        """
+        Maps the committed rows of every row file. Must be called with the lock held.
+        """
+        self._vectors = self._map("vectors.bin", self.dtype, (self._rows, self.dimension))
+        self._scales = self._map("scales.bin", np.float32, (self._rows,)) if self.encoding == "int8" else None
+        self._full = self._map("full.bin", np.float32, (self._rows, self.dimension)) if self.keep_full_precision else None
+
+    def _map(self, name, dtype, shape):
+        if shape[0] == 0:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(os.path.join(self.path, name), dtype=dtype, mode="r", shape=shape)
+
+    def _refresh_rows(self):
+        """
+        Rebuilds the row-to-CV mapping and the mask of live rows. Must be called with the lock held.
+        """
+        row_counts = np.asarray([document["rows"] for document in self._documents], dtype=np.int64)
+        self._row_offsets = (np.cumsum(row_counts) - row_counts).astype(np.int64)
+        self._row_documents = np.repeat(np.arange(len(self._documents), dtype=np.int64), row_counts)
+        live_documents = np.ones(len(self._documents), dtype=bool)
+        live_documents[list(self._deleted)] = False
+        self._live_rows = np.repeat(live_documents, row_counts)
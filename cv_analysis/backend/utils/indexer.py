@@ -1,7 +1,6 @@
-from azure.search.documents.indexes import SearchIndexClient
-from azure.core.credentials import AzureKeyCredential
-from azure.search.documents import SearchClient
-from uuid import uuid4
+import hashlib
+import json
+import re
 from azure.search.documents.indexes.models import (
     SearchableField,
     SearchField,
@@ -12,6 +11,8 @@ from azure.search.documents.indexes.models import (
     HnswAlgorithmConfiguration,
     VectorSearchProfile,
 )
+from utils.clients import get_search_client, get_search_index_client, is_index_ready, set_index_ready
+from utils.metrics import track_stage
 import config
 
 
@@ -21,36 +22,48 @@ class Indexer:
 
     This class manages the creation of search indexes, preparation of documents,
     ingestion of embeddings, and verification of document indexing within Azure Cognitive Search.
+    Document keys are derived from the CV id and chunk number, so re-ingesting a CV overwrites its
+    documents instead of duplicating them.
+
+    When a batch id is given, every document is tagged with it and its key is prefixed with it, so
+    concurrent requests can share one index and clean up only their own documents.
     """
 
-    def __init__(self, cv_embeddings):
+    # Number of CV ids checked per search.in filter in filter_indexed_cv_ids
+    MEMBERSHIP_CHECK_BATCH_SIZE = 300
+
+    def __init__(self, cv_embeddings, index_name=None, batch_id=None):
         """
-        Initializes the Indexer with CV embeddings and sets up Azure Search clients.
+        Initializes the Indexer with CV embeddings and the shared Azure Search clients.
 
         Args:
-            cv_embeddings (dict): A dictionary containing CV embeddings with CV names as keys.
+            cv_embeddings (dict): A dictionary containing CV embeddings keyed by CV id.
+            index_name (str, optional): The search index to use. Defaults to the per-request index
+                configured in config.COGNITIVE_SEARCH_CONFIG["index_name"].
+            batch_id (str, optional): The id of the request the documents belong to. Documents of the
+                persistent CV corpus have no batch id.
         """
         self.cv_embeddings = cv_embeddings
-        self.index_client = SearchIndexClient(
-            endpoint=config.COGNITIVE_SEARCH_CONFIG["endpoint"],
-            credential=AzureKeyCredential(config.COGNITIVE_SEARCH_CONFIG["api_key"])
-        )
-        self.search_client = SearchClient(
-            endpoint=config.COGNITIVE_SEARCH_CONFIG["endpoint"],
-            index_name=config.COGNITIVE_SEARCH_CONFIG["index_name"],
-            credential=AzureKeyCredential(config.COGNITIVE_SEARCH_CONFIG["api_key"])
-        )
+        self.index_name = index_name or config.COGNITIVE_SEARCH_CONFIG["index_name"]
+        self.batch_id = batch_id
+        self.uploaded_document_ids = set()
+        self.index_client = get_search_index_client()
+        self.search_client = get_search_client(self.index_name)
 
     def does_index_exist(self):
         """
         Checks if the specified search index exists in Azure Cognitive Search.
 
+        Indexes created or verified earlier by this process are not looked up again.
+
         Returns:
             bool: True if the index exists, False otherwise.
         """
+        if is_index_ready(self.index_name):
+            return True
         try:
             index_names = list(self.index_client.list_index_names())
-            return config.COGNITIVE_SEARCH_CONFIG["index_name"] in index_names
+            return self.index_name in index_names
         except Exception as e:
             config.app_logger.error(f"Error checking index existence: {str(e)}")
             return False
@@ -59,72 +72,131 @@ class Indexer:
         """
         Creates a search index in Azure Cognitive Search if it does not already exist.
 
-        The index includes fields for CV ID, name, embedding vector, and contact information.
-        It also configures vector search capabilities using the HNSW algorithm.
+        The index includes fields for the document ID, CV ID, batch ID, name, embedding vector, and contact
+        information. It also configures vector search capabilities using the HNSW algorithm.
+
+        An existing index that was created before a field was added to the schema is updated in place,
+        since the index is no longer recreated after every request. Once the index is created or verified,
+        later calls in this process return without any request to the search service.
         """
+        if is_index_ready(self.index_name):
+            return
         if not self.does_index_exist():
             try:
-                fields = [
-                    SimpleField(
-                        name="id",
-                        type=SearchFieldDataType.String,
-                        key=True,
-                        filterable=True,
-                        sortable=True
-                    ),
-                    SearchableField(
-                        name="cv_name",
-                        type=SearchFieldDataType.String,
-                        searchable=True,
-                        filterable=True,
-                        sortable=True
-                    ),
-                    SearchField(
-                        name="cv_vector",
-                        type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
-                        searchable=True,
-                        vector_search_dimensions=config.EMBEDDING_DIMENSION,
-                        vector_search_profile_name="default_vector_search_profile",
-                    ),
-                    SearchableField(
-                        name="contact_info",
-                        type=SearchFieldDataType.String,
-                        searchable=True
-                    )
-                ]
-
-                search_index = SearchIndex(
-                    name=config.COGNITIVE_SEARCH_CONFIG["index_name"],
-                    fields=fields,
-                    vector_search=VectorSearch(
-                        profiles=[
-                            VectorSearchProfile(
-                                name="default_vector_search_profile",
-                                algorithm_configuration_name="default_hnsw_algorithm_config"
-                            )
-                        ],
-                        algorithms=[
-                            HnswAlgorithmConfiguration(
-                                name="default_hnsw_algorithm_config",
-                            )
-                        ]
-                    )
-                )
-                self.index_client.create_index(search_index)
+                with track_stage("index_create", service="search"):
+                    self.index_client.create_index(self._build_index())
+                set_index_ready(self.index_name)
                 config.app_logger.info("Search Index is created successfully!")
             except Exception as e:
                 config.app_logger.error(f"Error creating index: {str(e)}")
         else:
             config.app_logger.info("Index already exists. Skipping index creation.")
+            if self._add_missing_fields():
+                set_index_ready(self.index_name)
+
+    def _build_index(self):
+        """
+        Builds the search index definition.
+
+        Returns:
+            SearchIndex: The index with its fields and vector search configuration.
+        """
+        fields = [
+            SimpleField(
+                name="id",
+                type=SearchFieldDataType.String,
+                key=True,
+                filterable=True,
+                sortable=True
+            ),
+            SimpleField(
+                name="cv_id",
+                type=SearchFieldDataType.String,
+                filterable=True
+            ),
+            SimpleField(
+                name="batch_id",
+                type=SearchFieldDataType.String,
+                filterable=True
+            ),
+            SearchableField(
+                name="cv_name",
+                type=SearchFieldDataType.String,
+                searchable=True,
+                filterable=True,
+                sortable=True
+            ),
+            SearchField(
+                name="cv_vector",
+                type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
+                searchable=True,
+                vector_search_dimensions=config.EMBEDDING_DIMENSION,
+                vector_search_profile_name="default_vector_search_profile",
+            ),
+            SearchableField(
+                name="contact_info",
+                type=SearchFieldDataType.String,
+                searchable=True
+            )
+        ]
+
+        return SearchIndex(
+            name=self.index_name,
+            fields=fields,
+            vector_search=VectorSearch(
+                profiles=[
+                    VectorSearchProfile(
+                        name="default_vector_search_profile",
+                        algorithm_configuration_name="default_hnsw_algorithm_config"
+                    )
+                ],
+                algorithms=[
+                    HnswAlgorithmConfiguration(
+                        name="default_hnsw_algorithm_config",
+                    )
+                ]
+            )
+        )
 
-    def prepare_document(self, cv_name, embedding, contact_info):
+    def _add_missing_fields(self):
+        """
+        Adds schema fields that are missing from an existing search index.
+
+        Azure Cognitive Search allows new fields to be added to an index without rebuilding it;
+        documents indexed before the update have no value for the new fields.
+
+        Returns:
+            bool: True if the index schema is up to date, False if it could not be checked or updated.
+        """
+        try:
+            with track_stage("index_create", service="search"):
+                search_index = self.index_client.get_index(self.index_name)
+                existing_fields = {field.name for field in search_index.fields}
+                missing_fields = [field for field in self._build_index().fields if field.name not in existing_fields]
+                if missing_fields:
+                    search_index.fields.extend(missing_fields)
+                    self.index_client.create_or_update_index(search_index)
+            if missing_fields:
+                config.app_logger.info(
+                    f"Added fields {[field.name for field in missing_fields]} to search index '{self.index_name}'."
+                )
+            return True
+        except Exception as e:
+            config.app_logger.error(f"Error updating index schema: {str(e)}")
+            return False
+
+    def prepare_document(self, cv_name, embedding, contact_info, cv_id=None, chunk_index=0):
         """
         Prepares a document dictionary for indexing into Azure Cognitive Search.
 
         Args:
             cv_name (str): The name of the CV file.
             embedding (list): The embedding vector representing the CV.
-            contact_info (str): The extracted contact information from the CV.
+            contact_info (str or dict): The extracted contact information from the CV. Structured
+                contact fields are stored as a JSON string in the "contact_info" field.
+            cv_id (str, optional): The key of the CV the document belongs to. Several documents share
+                a cv_id when the chunks of a long CV are indexed separately. Defaults to cv_name.
+            chunk_index (int, optional): The chunk number of the embedding within its CV. Defaults to 0.
 
         Returns:
             dict or None: A dictionary representing the document ready for indexing,
@@ -136,11 +208,15 @@ class Indexer:
                     f"Embedding dimension mismatch: Expected {config.EMBEDDING_DIMENSION}, got {len(embedding)}"
                 )
 
+            cv_id = cv_id or cv_name
+            document_id = f"{self._document_key(cv_id)}_{chunk_index}"
             document = {
-                "id": str(uuid4()),
+                "id": f"{self.batch_id}_{document_id}" if self.batch_id else document_id,
+                "cv_id": cv_id,
+                "batch_id": self.batch_id,
                 "cv_name": cv_name,
                 "cv_vector": embedding,
-                "contact_info": contact_info
+                "contact_info": json.dumps(contact_info) if isinstance(contact_info, dict) else contact_info
             }
             return document
         except Exception as e:
@@ -153,41 +229,55 @@ class Indexer:
 
         This method performs the following steps:
             1. Creates the search index if it does not exist.
-            2. Iterates through all CV embeddings.
-            3. Checks if each CV is already indexed.
+            2. Looks up which CVs are already indexed with a few bulk queries (see filter_indexed_cv_ids).
+               Indexers with a batch id skip the lookup, since a new batch has no documents yet.
+            3. Iterates through all CV embeddings that are not indexed yet.
             4. Prepares and uploads new documents to the search index.
 
+        With "max" chunk pooling (config.CV_CHUNKING_CONFIG), every chunk embedding of a long CV is
+        uploaded as its own document so that AISearcher can score the CV by its best chunk.
+
         Logs the outcome of the ingestion process.
         """
         # Create the index if it does not exist
         self.create_index()
 
+        use_chunks = config.CV_CHUNKING_CONFIG["pooling"] == "max"
+        indexed_cv_ids = set() if self.batch_id else self.filter_indexed_cv_ids(self.cv_embeddings)
         documents = []
-        for cv_name, cv_data in self.cv_embeddings.items():
-            cv_embedding = cv_data['embedding']
+        for cv_key, cv_data in self.cv_embeddings.items():
+            cv_name = cv_data.get('cv_name', cv_key)
+            cv_vectors = cv_data.get('chunk_embeddings') if use_chunks else None
             contact_info = cv_data.get('contact_info', '')
 
             # Check if the CV is already indexed
-            if not self.is_document_indexed(cv_name):
-                document = self.prepare_document(cv_name, cv_embedding, contact_info)
-                if document:
-                    documents.append(document)
+            if cv_key not in indexed_cv_ids:
+                for chunk_index, cv_embedding in enumerate(cv_vectors or [cv_data['embedding']]):
+                    document = self.prepare_document(
+                        cv_name, cv_embedding, contact_info, cv_id=cv_key, chunk_index=chunk_index
+                    )
+                    if document:
+                        documents.append(document)
 
         if documents:
             try:
-                self.search_client.upload_documents(documents=documents)
+                with track_stage("index_upload", service="search"):
+                    self.search_client.upload_documents(documents=documents)
+                self.uploaded_document_ids.update(document["id"] for document in documents)
                 config.app_logger.info(f"{len(documents)} documents indexed successfully!")
             except Exception as e:
                 config.app_logger.error(f"Error during document ingestion: {str(e)}")
         else:
             config.app_logger.info("No new documents to index.")
 
-    def is_document_indexed(self, cv_name):
+    def is_document_indexed(self, cv_id):
         """
-        Checks if a document with the given CV name is already indexed in Azure Cognitive Search.
+        Checks if a document with the given CV id is already indexed in Azure Cognitive Search.
+
+        Only documents of the Indexer's batch are considered when a batch id is set.
 
         Args:
-            cv_name (str): The name of the CV file to check.
+            cv_id (str): The id of the CV to check.
 
         Returns:
             bool: True if the document is indexed, False otherwise.
@@ -195,7 +285,7 @@ class Indexer:
         try:
             results = self.search_client.search(
                 search_text="*",
-                filter=f"cv_name eq '{cv_name}'",
+                filter=self._scope_filter(f"cv_id eq '{self._escape_odata(cv_id)}'"),
                 include_total_count=True
             )
             return results.get_count() > 0
@@ -203,20 +293,156 @@ class Indexer:
             config.app_logger.error(f"Error checking if document is indexed: {str(e)}")
             return False
 
+    def delete_batch(self):
+        """
+        Deletes the documents of the Indexer's batch, leaving other requests' documents untouched.
+
+        Documents are looked up by their batch id and combined with the keys this Indexer uploaded,
+        so documents that are not yet visible to search queries are removed as well.
+
+        Returns:
+            int: The number of deleted documents.
+        """
+        if not self.batch_id:
+            config.app_logger.error("Batch deletion requires a batch id.")
+            return 0
+        try:
+            with track_stage("index_delete", service="search"):
+                results = self.search_client.search(
+                    search_text="*",
+                    filter=self._scope_filter(),
+                    select=["id"]
+                )
+                document_ids = self.uploaded_document_ids | {result["id"] for result in results}
+                if document_ids:
+                    self.search_client.delete_documents(
+                        documents=[{"id": document_id} for document_id in document_ids]
+                    )
+            config.app_logger.info(f"{len(document_ids)} documents deleted for batch {self.batch_id}.")
+            return len(document_ids)
+        except Exception as e:
+            config.app_logger.error(f"Error deleting documents of batch {self.batch_id}: {str(e)}")
+            return 0
+
     def delete_all_documents(self):
         """
         Deletes the entire search index and recreates it to remove all documents.
 
         This effectively clears all indexed data by removing the index and setting it up anew.
+        It affects every request using the index; use delete_batch to remove a single request's documents.
         """
         try:
             # Delete the existing index
-            self.index_client.delete_index(config.COGNITIVE_SEARCH_CONFIG["index_name"])
-            config.app_logger.info(
-                f"Search index '{config.COGNITIVE_SEARCH_CONFIG['index_name']}' deleted successfully."
-            )
+            set_index_ready(self.index_name, ready=False)
+            with track_stage("index_delete", service="search"):
+                self.index_client.delete_index(self.index_name)
+            config.app_logger.info(f"Search index '{self.index_name}' deleted successfully.")
 
             # Recreate the index
             self.create_index()
         except Exception as e:
             config.app_logger.error(f"Error during index deletion and recreation: {str(e)}")
+
+    def filter_indexed_cv_ids(self, cv_ids):
+        """
+        Returns the subset of the given CV ids that already have documents in the index.
+
+        The ids are checked in batches of MEMBERSHIP_CHECK_BATCH_SIZE with one search.in filtered query
+        per batch, so the number of round trips grows with the number of batches rather than CVs. Ids that
+        contain the "|" delimiter cannot be listed in search.in and are checked one by one.
+
+        Args:
+            cv_ids (iterable of str): The CV ids to check.
+
+        Returns:
+            set: The CV ids that are already indexed.
+        """
+        cv_ids = list(dict.fromkeys(cv_ids))
+        indexed_cv_ids = {cv_id for cv_id in cv_ids if "|" in cv_id and self.is_document_indexed(cv_id)}
+        listable_cv_ids = [cv_id for cv_id in cv_ids if "|" not in cv_id]
+
+        for start in range(0, len(listable_cv_ids), self.MEMBERSHIP_CHECK_BATCH_SIZE):
+            batch = listable_cv_ids[start:start + self.MEMBERSHIP_CHECK_BATCH_SIZE]
+            try:
+                results = self.search_client.search(
+                    search_text="*",
+                    filter=self._scope_filter(f"search.in(cv_id, '{self._escape_odata('|'.join(batch))}', '|')"),
+                    select=["cv_id"]
+                )
+                indexed_cv_ids.update(result["cv_id"] for result in results)
+            except Exception as e:
+                config.app_logger.error(f"Error checking which documents are indexed: {str(e)}")
+        return indexed_cv_ids
+
+    def delete_cv(self, cv_id):
+        """
+        Deletes all documents (every chunk) of a CV from the search index.
+        Only documents of the Indexer's batch are deleted when a batch id is set.
+
+        Args:
+            cv_id (str): The id of the CV to delete.
+
+        Returns:
+            int: The number of deleted documents.
+        """
+        try:
+            with track_stage("index_delete", service="search"):
+                results = self.search_client.search(
+                    search_text="*",
+                    filter=self._scope_filter(f"cv_id eq '{self._escape_odata(cv_id)}'"),
+                    select=["id"]
+                )
+                documents = [{"id": result["id"]} for result in results]
+                if documents:
+                    self.search_client.delete_documents(documents=documents)
+            config.app_logger.info(f"{len(documents)} documents deleted for CV {cv_id}.")
+            return len(documents)
+        except Exception as e:
+            config.app_logger.error(f"Error deleting documents of CV {cv_id}: {str(e)}")
+            return 0
+
+    def _scope_filter(self, expression=None):
+        """
+        Restricts an OData filter expression to the Indexer's batch.
+
+        Args:
+            expression (str, optional): The filter expression to restrict.
+
+        Returns:
+            str or None: The expression combined with the batch id condition when a batch id is set.
+        """
+        if not self.batch_id:
+            return expression
+        batch_filter = f"batch_id eq '{self._escape_odata(self.batch_id)}'"
+        return f"{expression} and {batch_filter}" if expression else batch_filter
+
+    @staticmethod
+    def _document_key(cv_id):
+        """
+        Converts a CV id into a valid Azure Cognitive Search document key prefix.
+
+        Keys may only contain letters, digits, dashes, underscores and equal signs and may not start
+        with an underscore, so ids with other characters (e.g. filenames) are replaced by a hash of the id.
+
+        Args:
+            cv_id (str): The id of the CV.
+
+        Returns:
+            str: The CV id itself if it is a valid key, otherwise its SHA-256 prefix.
+        """
+        if re.fullmatch(r"[A-Za-z0-9\-=][A-Za-z0-9_\-=]*", cv_id):
+            return cv_id
+        return hashlib.sha256(cv_id.encode("utf-8")).hexdigest()[:32]
+
+    @staticmethod
+    def _escape_odata(value):
+        """
+        Escapes a string literal for use in an OData filter expression.
+
+        Args:
+            value (str): The string value.
+
+        Returns:
+            str: The value with single quotes doubled.
+        """
+        return value.replace("'", "''")
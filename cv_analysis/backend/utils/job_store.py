@@ -0,0 +1,313 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+import numpy as np
+import config
+
+
+class JobStore:
+    """
+    A persistent store for asynchronous CV matching jobs backed by SQLite.
+
+    A job holds the job description and one row per uploaded CV. The PDF content of a CV is kept
+    until the CV is processed; then it is replaced by the CV's embeddings and contact information
+    (or the failure reason). Duplicates keep their PDF until the job finishes, since one of them is
+    processed instead if the CV they were merged into fails. Because every finished CV is saved right
+    away, a job interrupted by a restart resumes with only the CVs that were not finished yet.
+    """
+
+    def __init__(self, db_path):
+        """
+        Initializes the JobStore and creates the SQLite tables if needed.
+
+        Args:
+            db_path (str): The path of the SQLite database file.
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id TEXT PRIMARY KEY, "
+            "job_description TEXT NOT NULL, "
+            "status TEXT NOT NULL, "
+            "result TEXT, "
+            "error TEXT, "
+            "created_at REAL NOT NULL, "
+            "updated_at REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS job_cvs ("
+            "job_id TEXT NOT NULL, "
+            "cv_id TEXT NOT NULL, "
+            "cv_name TEXT NOT NULL, "
+            "status TEXT NOT NULL, "
+            "pdf BLOB, "
+            "embedding BLOB, "
+            "chunk_embeddings BLOB, "
+            "contact_info TEXT, "
+            "reason TEXT, "
+            "PRIMARY KEY (job_id, cv_id))"
+        )
+        self._connection.commit()
+
+    def create_job(self, job_description, cv_documents):
+        """
+        Creates a queued job with its CVs.
+
+        Args:
+            job_description (str): The text of the job description.
+            cv_documents (dict): A dictionary mapping a unique CV id to a (filename, PDF bytes) tuple.
+
+        Returns:
+            str: The id of the new job.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO jobs (job_id, job_description, status, created_at, updated_at) "
+                "VALUES (?, ?, 'queued', ?, ?)",
+                (job_id, job_description, now, now)
+            )
+            self._connection.executemany(
+                "INSERT INTO job_cvs (job_id, cv_id, cv_name, status, pdf) VALUES (?, ?, ?, 'pending', ?)",
+                [(job_id, cv_id, cv_name, pdf_content) for cv_id, (cv_name, pdf_content) in cv_documents.items()]
+            )
+            self._connection.commit()
+        return job_id
+
+    def get_job(self, job_id):
+        """
+        Returns the state of a job.
+
+        Args:
+            job_id (str): The id of the job.
+
+        Returns:
+            dict or None: The job id, status, the number of total, embedded and failed CVs, the failed
+                          CVs with their reasons, the CVs merged as duplicates of another CV, the ranked
+                          CVs once the job is completed and the error if it failed. None if the job does
+                          not exist.
+        """
+        with self._lock:
+            job = self._connection.execute(
+                "SELECT status, result, error, created_at, updated_at FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if job is None:
+                return None
+            cv_rows = self._connection.execute(
+                "SELECT cv_id, cv_name, status, reason FROM job_cvs WHERE job_id = ?", (job_id,)
+            ).fetchall()
+
+        status, result, error, created_at, updated_at = job
+        cv_names = {cv_id: cv_name for cv_id, cv_name, _, _ in cv_rows}
+        return {
+            "job_id": job_id,
+            "status": status,
+            "total": len(cv_rows),
+            "embedded": sum(1 for row in cv_rows if row[2] == "embedded"),
+            "failed": [
+                {"cv_id": cv_id, "cv_name": cv_name, "reason": reason}
+                for cv_id, cv_name, cv_status, reason in cv_rows if cv_status == "failed"
+            ],
+            "duplicates": [
+                {"cv_id": cv_id, "cv_name": cv_name, "duplicate_of": reason, "duplicate_of_name": cv_names.get(reason)}
+                for cv_id, cv_name, cv_status, reason in cv_rows if cv_status == "duplicate"
+            ],
+            "cv_list": json.loads(result) if result else None,
+            "error": error,
+            "created_at": created_at,
+            "updated_at": updated_at
+        }
+
+    def get_job_description(self, job_id):
+        """
+        Returns the job description of a job.
+
+        Args:
+            job_id (str): The id of the job.
+
+        Returns:
+            str or None: The job description, or None if the job does not exist.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT job_description FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_pending_cvs(self, job_id):
+        """
+        Returns the CVs of a job that have not been processed yet.
+
+        Duplicates of a CV that was not embedded (it failed, is a duplicate itself or was still being
+        processed) are pending again, so they are merged anew or processed in its place.
+
+        Args:
+            job_id (str): The id of the job.
+
+        Returns:
+            dict: A dictionary mapping each pending CV id to a (filename, PDF bytes) tuple.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT cv_id, cv_name, pdf FROM job_cvs AS cv WHERE job_id = ? AND (status = 'pending' OR "
+                "(status = 'duplicate' AND pdf IS NOT NULL AND NOT EXISTS (SELECT 1 FROM job_cvs AS representative "
+                "WHERE representative.job_id = cv.job_id AND representative.cv_id = cv.reason "
+                "AND representative.status = 'embedded')))",
+                (job_id,)
+            ).fetchall()
+        return {cv_id: (cv_name, bytes(pdf_content)) for cv_id, cv_name, pdf_content in rows}
+
+    def get_cv_embeddings(self, job_id):
+        """
+        Returns the embeddings of the processed CVs of a job.
+
+        Args:
+            job_id (str): The id of the job.
+
+        Returns:
+            dict: A dictionary containing CV embeddings keyed by CV id, in the format returned by
+                  CVEmbedder.embed_all_cvs.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT cv_id, cv_name, embedding, chunk_embeddings, contact_info FROM job_cvs "
+                "WHERE job_id = ? AND status = 'embedded'", (job_id,)
+            ).fetchall()
+
+        cv_embeddings = {}
+        for cv_id, cv_name, embedding, chunk_embeddings, contact_info in rows:
+            cv_embeddings[cv_id] = {
+                "cv_name": cv_name,
+                "embedding": np.frombuffer(embedding, dtype=np.float32).tolist(),
+                "contact_info": json.loads(contact_info)
+            }
+            if chunk_embeddings:
+                cv_embeddings[cv_id]["chunk_embeddings"] = np.frombuffer(
+                    chunk_embeddings, dtype=np.float32
+                ).reshape(-1, config.EMBEDDING_DIMENSION).tolist()
+        return cv_embeddings
+
+    def save_cv_embedding(self, job_id, cv_id, cv_data):
+        """
+        Saves the embeddings of a processed CV and drops its PDF content.
+
+        Args:
+            job_id (str): The id of the job.
+            cv_id (str): The id of the CV.
+            cv_data (dict): The CV's embedding data, in the format returned by CVEmbedder.embed_all_cvs.
+        """
+        chunk_embeddings = cv_data.get("chunk_embeddings")
+        with self._lock:
+            self._connection.execute(
+                "UPDATE job_cvs SET status = 'embedded', pdf = NULL, embedding = ?, chunk_embeddings = ?, "
+                "contact_info = ? WHERE job_id = ? AND cv_id = ?",
+                (
+                    np.asarray(cv_data["embedding"], dtype=np.float32).tobytes(),
+                    np.asarray(chunk_embeddings, dtype=np.float32).tobytes() if chunk_embeddings else None,
+                    json.dumps(cv_data.get("contact_info", "")),
+                    job_id,
+                    cv_id
+                )
+            )
+            self._touch(job_id)
+            self._connection.commit()
+
+    def save_cv_failure(self, job_id, cv_id, reason):
+        """
+        Marks a CV that could not be processed and drops its PDF content.
+
+        Args:
+            job_id (str): The id of the job.
+            cv_id (str): The id of the CV.
+            reason (str): Why the CV was skipped.
+        """
+        with self._lock:
+            self._connection.execute(
+                "UPDATE job_cvs SET status = 'failed', pdf = NULL, reason = ? WHERE job_id = ? AND cv_id = ?",
+                (reason, job_id, cv_id)
+            )
+            self._touch(job_id)
+            self._connection.commit()
+
+    def save_cv_duplicate(self, job_id, cv_id, duplicate_of):
+        """
+        Marks a CV that duplicates another CV of the job. Its PDF content is kept until the job finishes.
+
+        Args:
+            job_id (str): The id of the job.
+            cv_id (str): The id of the CV.
+            duplicate_of (str): The id of the CV it was merged into.
+        """
+        with self._lock:
+            self._connection.execute(
+                "UPDATE job_cvs SET status = 'duplicate', reason = ? WHERE job_id = ? AND cv_id = ?",
+                (duplicate_of, job_id, cv_id)
+            )
+            self._touch(job_id)
+            self._connection.commit()
+
+    def set_status(self, job_id, status, result=None, error=None):
+        """
+        Updates the status of a job. The PDF content still held by a completed or failed job is dropped.
+
+        Args:
+            job_id (str): The id of the job.
+            status (str): The new status: "queued", "running", "completed" or "failed".
+            result (list, optional): The ranked CVs of a completed job.
+            error (str, optional): The error message of a failed job.
+        """
+        with self._lock:
+            self._connection.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ? WHERE job_id = ?",
+                (status, json.dumps(result) if result is not None else None, error, job_id)
+            )
+            if status in ("completed", "failed"):
+                self._connection.execute("UPDATE job_cvs SET pdf = NULL WHERE job_id = ?", (job_id,))
+            self._touch(job_id)
+            self._connection.commit()
+
+    def get_unfinished_job_ids(self):
+        """
+        Returns the jobs that were queued or running, e.g. when the server stopped.
+
+        Returns:
+            list: The job ids, oldest first.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT job_id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def _touch(self, job_id):
+        """
+        Updates the modification time of a job. Must be called with the lock held.
+
+        Args:
+            job_id (str): The id of the job.
+        """
+        self._connection.execute("UPDATE jobs SET updated_at = ? WHERE job_id = ?", (time.time(), job_id))
+
+
+_job_store = None
+_job_store_lock = threading.Lock()
+
+
+def get_job_store():
+    """
+    Returns the process-wide job store, creating it on first use.
+
+    Returns:
+        JobStore: The shared job store.
+    """
+    global _job_store
+    with _job_store_lock:
+        if _job_store is None:
+            _job_store = JobStore(config.JOB_CONFIG["db_path"])
+    return _job_store
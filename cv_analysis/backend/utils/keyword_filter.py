@@ -0,0 +1,181 @@
+import re
+import threading
+import unicodedata
+
+# Turkish letters whose ASCII form is not reached by stripping combining marks (the dotless ı has none)
+TURKISH_FOLDING = str.maketrans({"ı": "i", "İ": "i", "I": "i"})
+
+# Tokens are runs of letters and digits; a trailing + or # is kept so that C++ and C# stay distinct from C
+TOKEN_PATTERN = re.compile(r"[0-9a-z]+[+#]*")
+
+
+def normalize_text(text):
+    """
+    Folds a text to lowercase ASCII letters for case- and Turkish-diacritic-insensitive matching.
+
+    "Yazılım Geliştirme", "YAZILIM GELİŞTİRME" and "yazilim gelistirme" all normalize to the same text.
+
+    Args:
+        text (str): The text to normalize.
+
+    Returns:
+        str: The text lowercased, with ı/İ folded to i and the accents of ç, ğ, ö, ş, ü (and other
+             letters) removed.
+    """
+    decomposed = unicodedata.normalize("NFKD", text.translate(TURKISH_FOLDING).lower())
+    return "".join(character for character in decomposed if not unicodedata.combining(character))
+
+
+def tokenize(text):
+    """
+    Splits a text into normalized tokens.
+
+    Args:
+        text (str): The text to split.
+
+    Returns:
+        list of str: The tokens in their original order.
+    """
+    return TOKEN_PATTERN.findall(normalize_text(text))
+
+
+def parse_terms(value):
+    """
+    Parses a list of must-have terms from a form value.
+
+    Args:
+        value (str or None): Terms separated by commas, semicolons or new lines, e.g. "Python, SQL".
+
+    Returns:
+        list of str: The non-empty terms, stripped, in their original order. Terms that normalize to
+                     the same text as an earlier term are dropped.
+    """
+    terms = {}
+    for term in re.split(r"[,;\n]", value or ""):
+        term = term.strip()
+        if term:
+            terms.setdefault(normalize_text(term), term)
+    return list(terms.values())
+
+
+class KeywordIndex:
+    """
+    An in-memory inverted index from normalized tokens to the positions where they occur in each text.
+
+    It checks cheaply whether raw CV texts contain must-have terms before any OpenAI call is made.
+    A term matches a text if its tokens occur next to each other in that order, so multi-word terms
+    like "machine learning" are matched as phrases and "Java" does not match "JavaScript".
+    """
+
+    def __init__(self, texts=None):
+        """
+        Initializes the KeywordIndex and indexes the given texts.
+
+        Args:
+            texts (dict, optional): A dictionary mapping a text key (e.g. a CV upload id) to its text.
+        """
+        self.postings = {}
+        self.keys = set()
+        for key, text in (texts or {}).items():
+            self.add(key, text)
+
+    def add(self, key, text):
+        """
+        Indexes a text.
+
+        Args:
+            key (str): The key of the text.
+            text (str): The text.
+        """
+        self.keys.add(key)
+        for position, token in enumerate(tokenize(text)):
+            self.postings.setdefault(token, {}).setdefault(key, []).append(position)
+
+    def matching_keys(self, term):
+        """
+        Returns the keys of the texts that contain a term.
+
+        Args:
+            term (str): The term, a word or a phrase.
+
+        Returns:
+            set: The keys of the matching texts. A term without any token matches every text.
+        """
+        tokens = tokenize(term)
+        if not tokens:
+            return set(self.keys)
+
+        # Start from the positions of the first token and keep those followed by the next tokens
+        candidates = {key: set(positions) for key, positions in self.postings.get(tokens[0], {}).items()}
+        for offset, token in enumerate(tokens[1:], start=1):
+            postings = self.postings.get(token, {})
+            next_candidates = {}
+            for key, positions in candidates.items():
+                token_positions = set(postings.get(key, ()))
+                positions = {position for position in positions if position + offset in token_positions}
+                if positions:
+                    next_candidates[key] = positions
+            candidates = next_candidates
+        return set(candidates)
+
+    def missing_terms(self, terms):
+        """
+        Finds, for every indexed text, the must-have terms it does not contain.
+
+        Args:
+            terms (list of str): The must-have terms.
+
+        Returns:
+            dict: A dictionary mapping every key to the list of terms its text does not contain (an
+                  empty list if it contains all of them).
+        """
+        missing = {key: [] for key in self.keys}
+        for term in terms:
+            matching = self.matching_keys(term)
+            for key in self.keys - matching:
+                missing[key].append(term)
+        return missing
+
+
+class KeywordFilterStats:
+    """
+    Thread-safe counters of the must-have-terms prefilter.
+    """
+
+    def __init__(self):
+        self.checked = 0
+        self.skipped = 0
+        self.llm_calls_saved = 0
+        self._lock = threading.Lock()
+
+    def record(self, checked, skipped, llm_calls_saved):
+        """
+        Records one filtered batch of CVs.
+
+        Args:
+            checked (int): The number of CVs checked against the must-have terms.
+            skipped (int): The number of CVs that lacked a term and were skipped.
+            llm_calls_saved (int): The estimated OpenAI chat completions the skipped CVs would have used.
+        """
+        with self._lock:
+            self.checked += checked
+            self.skipped += skipped
+            self.llm_calls_saved += llm_calls_saved
+
+    def stats(self):
+        """
+        Returns the prefilter counters.
+
+        Returns:
+            dict: The checked and skipped CVs, the skip rate and the LLM calls saved.
+        """
+        with self._lock:
+            return {
+                "checked": self.checked,
+                "skipped": self.skipped,
+                "skip_rate": self.skipped / self.checked if self.checked else 0.0,
+                "llm_calls_saved": self.llm_calls_saved
+            }
+
+
+keyword_filter_stats = KeywordFilterStats()
@@ -0,0 +1,269 @@
+import json
+import os
+import numpy as np
+import config
+
+
+class LocalSearcher:
+    """
+    An in-process exact vector search engine for CV embeddings.
+
+    This class keeps all CV embeddings as a contiguous float32 NumPy matrix of unit-length rows
+    and ranks them against job embeddings with a batched cosine similarity and an argpartition
+    top-k selection. It exposes the same ingest/search/cleanup methods as the Azure Cognitive Search
+    based Indexer and AISearcher pair, so it can be used as a drop-in search backend.
+
+    With "max" chunk pooling (config.CV_CHUNKING_CONFIG), every chunk vector of a long CV gets its
+    own row and the CV is scored by its best matching chunk.
+    """
+
+    def __init__(self, cv_embeddings=None):
+        """
+        Initializes the LocalSearcher with CV embeddings.
+
+        Args:
+            cv_embeddings (dict, optional): A dictionary containing CV embeddings keyed by CV id.
+        """
+        self.cv_embeddings = cv_embeddings or {}
+        self.delete_all_documents()
+
+    def ingest_embeddings(self):
+        """
+        Loads all CV embeddings into the in-memory matrix, replacing its previous content.
+        """
+        self.delete_all_documents()
+        self.add_embeddings(self.cv_embeddings)
+
+    def add_embeddings(self, cv_embeddings):
+        """
+        Adds CV embeddings to the in-memory matrix.
+
+        CVs whose id is already present are replaced. Embeddings with an unexpected dimension are
+        skipped and logged. Every row is normalized to unit length once at ingestion time, so
+        searching only needs a matrix product. The rows of each CV are stored contiguously and
+        `row_offsets` holds the first row of every CV.
+
+        Args:
+            cv_embeddings (dict): A dictionary containing CV embeddings keyed by CV id.
+        """
+        self.delete_documents(cv_embeddings)
+
+        use_chunks = config.CV_CHUNKING_CONFIG["pooling"] == "max"
+        row_offsets = []
+        vectors = []
+        for cv_id, cv_data in cv_embeddings.items():
+            cv_name = cv_data.get('cv_name', cv_id)
+            cv_vectors = cv_data.get('chunk_embeddings') if use_chunks else None
+            cv_vectors = cv_vectors or [cv_data['embedding']]
+            if any(len(embedding) != config.EMBEDDING_DIMENSION for embedding in cv_vectors):
+                config.app_logger.error(
+                    f"Embedding dimension mismatch for {cv_name}: Expected {config.EMBEDDING_DIMENSION}"
+                )
+                continue
+            self.cv_ids.append(cv_id)
+            self.cv_names.append(cv_name)
+            self.contact_infos.append(cv_data.get('contact_info', ''))
+            row_offsets.append(self.matrix.shape[0] + len(vectors))
+            vectors.extend(cv_vectors)
+
+        if vectors:
+            self.matrix = np.ascontiguousarray(np.concatenate(
+                [self.matrix, self._normalize(np.asarray(vectors, dtype=np.float32))]
+            ))
+            self.row_offsets = np.concatenate([self.row_offsets, np.asarray(row_offsets, dtype=np.int64)])
+        config.app_logger.info(f"{len(row_offsets)} documents loaded into the local search engine.")
+
+    def indexed_cv_ids(self):
+        """
+        Returns the ids of all CVs held by the search engine.
+
+        Returns:
+            set: The CV ids.
+        """
+        return set(self.cv_ids)
+
+    def search_similar_cv(self, job_embedding, top_k=10):
+        """
+        Searches for the most similar CVs based on the provided job embedding.
+
+        Args:
+            job_embedding (list): The embedding vector for the job description.
+            top_k (int, optional): The number of top similar CVs to return. Defaults to 10.
+
+        Returns:
+            list: A list of dictionaries, each containing the CV id, CV name, contact information, and
+                  similarity score. Returns an empty list if an error occurs during the search.
+        """
+        results = self.search_similar_cv_batch([job_embedding], top_k=top_k)
+        return results[0] if results else []
+
+    def search_similar_cv_batch(self, job_embeddings, top_k=10):
+        """
+        Searches for the most similar CVs for several job embeddings in a single matrix product.
+
+        Scores are reported on the same scale as Azure Cognitive Search cosine scores
+        (1 / (2 - cosine_similarity)), so rankings and percentages stay comparable across backends.
+
+        Args:
+            job_embeddings (list): A list of embedding vectors, one per job description.
+            top_k (int, optional): The number of top similar CVs to return per job. Defaults to 10.
+
+        Returns:
+            list: One result list per job embedding, in the same format as search_similar_cv.
+                  Returns an empty list if an error occurs during the search.
+        """
+        try:
+            return self.rank_similarities(self.similarity_matrix(job_embeddings), top_k)
+
+        except Exception as e:
+            config.app_logger.error(f"Error during local search for similar CVs: {str(e)}")
+            return []
+
+    def similarity_matrix(self, job_embeddings):
+        """
+        Computes the cosine similarity of every job embedding with every CV in a single matrix product.
+
+        With "max" chunk pooling a CV's similarity is that of its best matching chunk row.
+
+        Args:
+            job_embeddings (list): A list of embedding vectors, one per job description.
+
+        Returns:
+            numpy.ndarray: A (jobs, CVs) float32 array of cosine similarities, with the CVs in the
+                           order of `cv_ids`.
+        """
+        queries = self._normalize(np.asarray(job_embeddings, dtype=np.float32).reshape(-1, self.matrix.shape[1]))
+        if not self.cv_ids:
+            return np.empty((len(queries), 0), dtype=np.float32)
+
+        similarities = queries @ self.matrix.T
+        if len(self.row_offsets) != self.matrix.shape[0]:
+            # Max-sim pooling: score every CV by its best matching chunk row
+            similarities = np.maximum.reduceat(similarities, self.row_offsets, axis=1)
+        return similarities
+
+    def rank_similarities(self, similarities, top_k=10):
+        """
+        Selects the top_k CVs of every row of a similarity matrix computed by similarity_matrix.
+
+        Args:
+            similarities (numpy.ndarray): A (jobs, CVs) array of cosine similarities.
+            top_k (int, optional): The number of top similar CVs to return per job. Defaults to 10.
+
+        Returns:
+            list: One result list per row, in the same format as search_similar_cv.
+        """
+        if not self.cv_ids:
+            return [[] for _ in range(len(similarities))]
+
+        k = min(top_k, similarities.shape[1])
+        # Select the top_k candidates per row without fully sorting every score
+        top_indices = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(similarities, top_indices, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top_indices = np.take_along_axis(top_indices, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        results = []
+        for row_indices, row_scores in zip(top_indices, top_scores):
+            results.append([
+                {
+                    "cv_id": self.cv_ids[index],
+                    "cv_name": self.cv_names[index],
+                    "contact_info": self.contact_infos[index] or "N/A",
+                    "similarity_score": float(1.0 / (2.0 - score))
+                }
+                for index, score in zip(row_indices, row_scores)
+            ])
+        return results
+
+    def delete_documents(self, cv_ids):
+        """
+        Removes the given CVs, with all of their rows, from the in-memory matrix.
+
+        Args:
+            cv_ids (iterable of str): The ids of the CVs to remove. Unknown ids are ignored.
+
+        Returns:
+            int: The number of removed CVs.
+        """
+        cv_ids = set(cv_ids)
+        keep = np.asarray([cv_id not in cv_ids for cv_id in self.cv_ids], dtype=bool)
+        if keep.all():
+            return 0
+
+        row_counts = np.diff(np.append(self.row_offsets, self.matrix.shape[0]))
+        kept_counts = row_counts[keep]
+        self.matrix = np.ascontiguousarray(self.matrix[np.repeat(keep, row_counts)])
+        self.row_offsets = (np.cumsum(kept_counts) - kept_counts).astype(np.int64)
+        self.cv_ids = [cv_id for cv_id, kept in zip(self.cv_ids, keep) if kept]
+        self.cv_names = [cv_name for cv_name, kept in zip(self.cv_names, keep) if kept]
+        self.contact_infos = [contact_info for contact_info, kept in zip(self.contact_infos, keep) if kept]
+        return int((~keep).sum())
+
+    def delete_all_documents(self):
+        """
+        Removes all CV embeddings from the in-memory matrix.
+        """
+        self.cv_ids = []
+        self.cv_names = []
+        self.contact_infos = []
+        self.row_offsets = np.empty(0, dtype=np.int64)
+        self.matrix = np.empty((0, config.EMBEDDING_DIMENSION), dtype=np.float32)
+
+    def save(self, path):
+        """
+        Saves the search engine content to a NumPy .npz file.
+
+        The file is written under a temporary name and then moved into place, so a crash during
+        saving never leaves a truncated file behind.
+
+        Args:
+            path (str): The path of the .npz file.
+        """
+        metadata = json.dumps({
+            "cv_ids": self.cv_ids,
+            "cv_names": self.cv_names,
+            "contact_infos": self.contact_infos
+        })
+        temporary_path = f"{path}.tmp.npz"
+        np.savez(temporary_path, matrix=self.matrix, row_offsets=self.row_offsets, metadata=np.array(metadata))
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a search engine saved with save.
+
+        Args:
+            path (str): The path of the .npz file.
+
+        Returns:
+            LocalSearcher: The loaded search engine, or an empty one if the file does not exist.
+        """
+        local_searcher = cls()
+        if not os.path.exists(path):
+            return local_searcher
+        with np.load(path, allow_pickle=False) as data:
+            metadata = json.loads(str(data["metadata"]))
+            local_searcher.matrix = np.ascontiguousarray(data["matrix"], dtype=np.float32)
+            local_searcher.row_offsets = data["row_offsets"].astype(np.int64)
+        local_searcher.cv_ids = metadata["cv_ids"]
+        local_searcher.cv_names = metadata["cv_names"]
+        local_searcher.contact_infos = metadata["contact_infos"]
+        return local_searcher
+
+    @staticmethod
+    def _normalize(vectors):
+        """
+        Scales each row of the given matrix to unit length.
+
+        Args:
+            vectors (numpy.ndarray): A 2D float32 array of embedding vectors.
+
+        Returns:
+            numpy.ndarray: A C-contiguous float32 array with unit-length rows (zero rows are left as zeros).
+        """
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return np.ascontiguousarray(vectors / norms, dtype=np.float32)
@@ -0,0 +1,149 @@
+import time
+from contextlib import contextmanager
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# Pipeline stages timed by STAGE_DURATION. Labels are limited to these stages and to the outcomes
+# "success" and "error", so the number of series stays fixed and scrapes stay cheap.
+STAGES = (
+    "pdf_parsing",
+    "gpt_cleaning",
+    "cv_extraction",
+    "contact_extraction",
+    "embedding",
+    "index_create",
+    "index_upload",
+    "index_delete",
+    "search"
+)
+# Stages that call Azure OpenAI, used as the stage label of the token metrics
+LLM_STAGES = ("gpt_cleaning", "cv_extraction", "contact_extraction", "comparison", "embedding")
+
+STAGE_DURATION = Histogram(
+    "cv_analysis_stage_duration_seconds",
+    "Duration of one pipeline stage call, e.g. parsing one PDF or sending one embedding request.",
+    ["stage", "outcome"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+UPSTREAM_ERRORS = Counter(
+    "cv_analysis_upstream_errors_total",
+    "Failed requests to Azure OpenAI or Azure Cognitive Search, including retried ones.",
+    ["service"]
+)
+RATE_LIMITED_REQUESTS = Counter(
+    "cv_analysis_rate_limited_requests_total",
+    "Azure OpenAI requests answered with 429 Too Many Requests.",
+    ["deployment"]
+)
+RATE_LIMIT_WAIT = Histogram(
+    "cv_analysis_rate_limit_wait_seconds",
+    "Time an Azure OpenAI request waited for the client-side quota before it was sent.",
+    ["deployment"],
+    buckets=(0.001, 0.01, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+CVS_PROCESSED = Counter(
+    "cv_analysis_cvs_processed_total",
+    "CVs that went through the pipeline, by outcome (embedded, failed, duplicate of another upload, or skipped "
+    "by the must-have-terms filter).",
+    ["outcome"]
+)
+LLM_TOKENS = Counter(
+    "cv_analysis_llm_tokens_total",
+    "Tokens used by Azure OpenAI calls, by stage and kind (prompt or completion).",
+    ["stage", "kind"]
+)
+LLM_COST = Counter(
+    "cv_analysis_llm_cost_usd_total",
+    "Estimated cost of Azure OpenAI calls in USD, from the prices in config.TOKEN_USAGE_CONFIG.",
+    ["stage"]
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "cv_analysis_requests_in_flight",
+    "HTTP requests currently being handled, including open streaming responses."
+)
+
+# Create the series up front, so they are exported with zero values before the first observation
+for _stage in STAGES:
+    for _outcome in ("success", "error"):
+        STAGE_DURATION.labels(_stage, _outcome)
+for _service in ("openai", "search"):
+    UPSTREAM_ERRORS.labels(_service)
+for _deployment in ("embedding", "chat"):
+    RATE_LIMITED_REQUESTS.labels(_deployment)
+    RATE_LIMIT_WAIT.labels(_deployment)
+for _outcome in ("embedded", "failed", "duplicate", "skipped"):
+    CVS_PROCESSED.labels(_outcome)
+for _stage in LLM_STAGES:
+    LLM_COST.labels(_stage)
+    for _kind in ("prompt", "completion"):
+        LLM_TOKENS.labels(_stage, _kind)
+
+
+@contextmanager
+def track_stage(stage, service=None):
+    """
+    Times a pipeline stage call and records it in STAGE_DURATION.
+
+    The outcome is "error" if the block raises; the exception is passed on unchanged.
+
+    Args:
+        stage (str): One of STAGES.
+        service (str, optional): "openai" or "search" to also count a raised exception in UPSTREAM_ERRORS.
+    """
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "success"
+    except Exception:
+        if service:
+            UPSTREAM_ERRORS.labels(service).inc()
+        raise
+    finally:
+        STAGE_DURATION.labels(stage, outcome).observe(time.perf_counter() - started)
+
+
+def observe_stage(stage, seconds, success):
+    """
+    Records a stage call that was timed elsewhere, e.g. inside a worker process.
+
+    Args:
+        stage (str): One of STAGES.
+        seconds (float): The duration of the call.
+        success (bool): Whether the call succeeded.
+    """
+    STAGE_DURATION.labels(stage, "success" if success else "error").observe(seconds)
+
+
+def render_metrics():
+    """
+    Renders all metrics in the Prometheus text exposition format.
+
+    Returns:
+        tuple: The metrics payload (bytes) and its content type.
+    """
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class InFlightRequestsMiddleware:
+    """
+    ASGI middleware that keeps REQUESTS_IN_FLIGHT up to date.
+
+    It wraps the whole ASGI call rather than the endpoint, so streaming responses count as in flight
+    until their last chunk is sent.
+    """
+
+    def __init__(self, app):
+        """
+        Initializes the middleware.
+
+        Args:
+            app: The wrapped ASGI application.
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with REQUESTS_IN_FLIGHT.track_inprogress():
+            await self.app(scope, receive, send)
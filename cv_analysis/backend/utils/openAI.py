@@ -1,5 +1,10 @@
+import json
 import openai
 import config
+from utils.metrics import track_stage
+from utils.rate_limiter import estimate_chat_tokens, get_rate_limiter
+from utils.token_usage import record_usage
+from utils.system_messages import SYSTEM_MESSAGES_CV_EXTRACTION
 
 
 class OpenAIClient:
@@ -7,7 +12,12 @@ class OpenAIClient:
     A client class to interact with OpenAI's ChatCompletion API for various text processing tasks.
 
     This class provides methods to compare texts, extract contact information from CVs,
-    and clean/extract meaningful text from raw PDF content using OpenAI's GPT models.
+    and clean/extract meaningful text from raw PDF content using OpenAI's GPT models, either
+    with separate calls or with a single combined JSON extraction call.
+
+    Every completion waits for the chat deployment's quota and is retried on rate limits and server
+    errors by the shared RateLimiter. A call that still fails returns None instead of a placeholder
+    text, so failed results are never mistaken for CV content.
     """
 
     def __init__(self, engine):
@@ -19,6 +29,55 @@ class OpenAIClient:
         """
         self.engine = engine
 
+    @staticmethod
+    def _api_params():
+        """
+        Returns the Azure OpenAI connection parameters of the chat deployment.
+
+        They are passed with every request, so chat completions never depend on the global openai
+        settings or on the embedding deployment's API version.
+
+        Returns:
+            dict: The API type, key, base URL and version.
+        """
+        return {
+            "api_type": "azure",
+            "api_key": config.AZURE_OPENAI_CONFIG["api_key"],
+            "api_base": config.AZURE_OPENAI_CONFIG["api_base"],
+            "api_version": config.AZURE_OPENAI_CONFIG["api_version"]
+        }
+
+    def _create_completion(self, stage, system_message, user_message, max_tokens, **kwargs):
+        """
+        Sends a chat completion request through the chat deployment's RateLimiter and records its tokens.
+
+        Args:
+            stage (str): The pipeline stage the tokens are accounted to (see utils.token_usage).
+            system_message (str): The system-level instruction.
+            user_message (str): The user input.
+            max_tokens (int): The maximum number of tokens of the completion.
+            **kwargs: Additional ChatCompletion parameters, e.g. temperature.
+
+        Returns:
+            str: The content of the completion.
+        """
+        messages = [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": user_message}
+        ]
+        response = get_rate_limiter("chat").call(
+            openai.ChatCompletion.create,
+            estimate_chat_tokens(messages, max_tokens),
+            engine=self.engine,
+            messages=messages,
+            max_tokens=max_tokens,
+            **self._api_params(),
+            **kwargs
+        )
+        content = response['choices'][0]['message']['content']
+        record_usage(stage, response.get('usage'), lambda: estimate_chat_tokens(messages, 0), content)
+        return content
+
     def compare_texts(self, input_text, system_message):
         """
         Compares two texts by generating a response from the OpenAI ChatCompletion API.
@@ -30,22 +89,13 @@ class OpenAIClient:
             system_message (str): The system-level instruction guiding the comparison process.
 
         Returns:
-            str: The comparison result generated by the OpenAI model. Returns an error message if an exception occurs.
+            str or None: The comparison result generated by the OpenAI model, or None if the call failed.
         """
         try:
-            response = openai.ChatCompletion.create(
-                engine=self.engine,
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": input_text}
-                ],
-                max_tokens=3000
-            )
-            comparison_result = response['choices'][0]['message']['content']
-            return comparison_result
+            return self._create_completion("comparison", system_message, input_text, max_tokens=3000)
         except Exception as e:
             config.app_logger.error(f"Error comparing summaries: {str(e)}")
-            return "Error comparing summaries."
+            return None
 
     def extract_contact_info(self, cv_text):
         """
@@ -58,23 +108,15 @@ class OpenAIClient:
             cv_text (str): The raw text content of the CV from which contact information is to be extracted.
 
         Returns:
-            str: The extracted contact information. Returns an error message if an exception occurs.
+            str or None: The extracted contact information, or None if the call failed.
         """
         system_message = "Extract the contact information (email, phone number, address) from the following text."
         try:
-            response = openai.ChatCompletion.create(
-                engine=self.engine,
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": cv_text}
-                ],
-                max_tokens=1500
-            )
-            contact_info = response['choices'][0]['message']['content']
-            return contact_info
+            with track_stage("contact_extraction"):
+                return self._create_completion("contact_extraction", system_message, cv_text, max_tokens=1500)
         except Exception as e:
             config.app_logger.error(f"Error extracting contact info: {str(e)}")
-            return "Error extracting contact info."
+            return None
 
     def extract_text_using_gpt(self, pdf_raw_text):
         """
@@ -87,20 +129,49 @@ class OpenAIClient:
             pdf_raw_text (str): The raw text content extracted from a PDF file.
 
         Returns:
-            str: The cleaned and meaningful text extracted from the PDF. Returns an error message if an exception occurs.
+            str or None: The cleaned and meaningful text extracted from the PDF, or None if the call failed.
         """
         system_message = "Clean and extract the meaningful text from the following PDF content."
         try:
-            response = openai.ChatCompletion.create(
-                engine=self.engine,
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": pdf_raw_text}
-                ],
-                max_tokens=2000
-            )
-            cleaned_text = response['choices'][0]['message']['content']
-            return cleaned_text
+            with track_stage("gpt_cleaning"):
+                return self._create_completion("gpt_cleaning", system_message, pdf_raw_text, max_tokens=2000)
         except Exception as e:
             config.app_logger.error(f"Error extracting text using GPT: {str(e)}")
-            return "Error extracting text."
+            return None
+
+    def extract_cv_content(self, pdf_raw_text):
+        """
+        Cleans the raw PDF text and extracts structured contact information in a single call.
+
+        This method replaces the separate extract_text_using_gpt and extract_contact_info calls with
+        one JSON-formatted completion, so the CV text is only sent to the model once.
+
+        Args:
+            pdf_raw_text (str): The raw text content extracted from a PDF file.
+
+        Returns:
+            dict or None: A dictionary with the cleaned CV text under "cleaned_text" and a
+                          {"email", "phone", "address"} dictionary under "contact_info".
+                          Returns None if the call fails or the response is not valid JSON.
+        """
+        try:
+            with track_stage("cv_extraction"):
+                content = self._create_completion(
+                    "cv_extraction", SYSTEM_MESSAGES_CV_EXTRACTION, pdf_raw_text, max_tokens=3000, temperature=0
+                ).strip()
+            # Tolerate responses wrapped in Markdown code fences despite the instructions
+            if content.startswith("```"):
+                content = content.strip("`")
+                content = content[content.index("{"):]
+            extraction = json.loads(content)
+            contact_info = extraction.get("contact_info") or {}
+            return {
+                "cleaned_text": extraction.get("cleaned_text") or "",
+                "contact_info": {
+                    field: contact_info.get(field) or None
+                    for field in ("email", "phone", "address")
+                }
+            }
+        except Exception as e:
+            config.app_logger.error(f"Error extracting CV content using GPT: {str(e)}")
+            return None
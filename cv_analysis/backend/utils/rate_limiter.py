@@ -0,0 +1,294 @@
+import random
+import threading
+import time
+import openai
+import config
+from utils.metrics import RATE_LIMIT_WAIT, RATE_LIMITED_REQUESTS, UPSTREAM_ERRORS
+
+
+class RateLimiter:
+    """
+    A client-side scheduler for the requests sent to one Azure OpenAI deployment.
+
+    Azure OpenAI enforces a requests-per-minute (RPM) and a tokens-per-minute (TPM) quota per
+    deployment and answers requests beyond it with 429 errors. The scheduler keeps one token bucket
+    per quota, refilled continuously at the quota rate, and makes every call wait in line until both
+    buckets can cover it, so calls are queued before they exceed the quota instead of failing.
+    The token cost of a call is estimated up front (see estimate_chat_tokens and estimate_embedding_tokens).
+
+    Calls that still fail with a 429 or a 5xx response are retried with jittered exponential backoff.
+    A Retry-After header pauses the whole deployment, not only the failed call, for the requested time.
+    """
+
+    # Azure evaluates the quota over short intervals, so at most this many seconds of quota is sent at once
+    BURST_SECONDS = 10
+
+    def __init__(self, name, requests_per_minute, tokens_per_minute, max_retries,
+                 backoff_base_seconds, backoff_max_seconds):
+        """
+        Initializes the RateLimiter.
+
+        Args:
+            name (str): The name of the deployment, used in log messages.
+            requests_per_minute (int): The RPM quota. 0 disables the request budget.
+            tokens_per_minute (int): The TPM quota. 0 disables the token budget.
+            max_retries (int): The number of retries of a call that failed with a retryable error.
+            backoff_base_seconds (float): The delay before the first retry; it doubles with every retry.
+            backoff_max_seconds (float): The maximum delay between two retries.
+        """
+        self.name = name
+        self.requests_per_second = requests_per_minute / 60
+        self.tokens_per_second = tokens_per_minute / 60
+        self.request_capacity = max(1.0, self.requests_per_second * self.BURST_SECONDS)
+        self.token_capacity = self.tokens_per_second * self.BURST_SECONDS
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+
+        self._available_requests = self.request_capacity
+        self._available_tokens = self.token_capacity
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        # Held while a call waits for its budget, so calls are admitted one after the other
+        self._queue_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+
+        self.requests = 0
+        self.tokens = 0
+        self.retries = 0
+        self.failures = 0
+        self.wait_seconds = 0.0
+
+    def acquire(self, tokens):
+        """
+        Blocks until the request and token budgets can cover a call, then takes its share.
+
+        Args:
+            tokens (int): The estimated number of tokens of the call.
+
+        Returns:
+            float: The number of seconds the call waited.
+        """
+        started = time.monotonic()
+        with self._queue_lock:
+            while True:
+                with self._state_lock:
+                    now = time.monotonic()
+                    self._refill(now)
+                    # A call larger than the burst capacity is admitted once the bucket is full
+                    needed_tokens = min(tokens, self.token_capacity)
+                    delay = self._paused_until - now
+                    if self.requests_per_second:
+                        delay = max(delay, (1 - self._available_requests) / self.requests_per_second)
+                    if self.tokens_per_second:
+                        delay = max(delay, (needed_tokens - self._available_tokens) / self.tokens_per_second)
+                    if delay <= 0:
+                        self._available_requests -= 1
+                        self._available_tokens -= tokens
+                        self.requests += 1
+                        self.tokens += tokens
+                        waited = now - started
+                        self.wait_seconds += waited
+                        RATE_LIMIT_WAIT.labels(self.name).observe(waited)
+                        return waited
+                time.sleep(delay)
+
+    def call(self, function, tokens, **kwargs):
+        """
+        Calls an OpenAI API function within the quota, retrying rate-limited and server errors.
+
+        Args:
+            function (callable): The API function, e.g. openai.Embedding.create.
+            tokens (int): The estimated number of tokens of the call.
+            **kwargs: The arguments of the API function.
+
+        Returns:
+            The response of the API function.
+
+        Raises:
+            openai.error.OpenAIError: The last error if the call failed with a non-retryable error
+                or still failed after config.OPENAI_RATE_LIMIT_CONFIG["max_retries"] retries.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire(tokens)
+            try:
+                return function(**kwargs)
+            except openai.error.OpenAIError as e:
+                UPSTREAM_ERRORS.labels("openai").inc()
+                if isinstance(e, openai.error.RateLimitError) or e.http_status == 429:
+                    RATE_LIMITED_REQUESTS.labels(self.name).inc()
+                if attempt == self.max_retries or not self._is_retryable(e):
+                    with self._state_lock:
+                        self.failures += 1
+                    raise
+                delay = self._retry_delay(e, attempt)
+                with self._state_lock:
+                    self.retries += 1
+                    if self._retry_after(e) is not None:
+                        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                config.app_logger.warning(
+                    f"OpenAI {self.name} request failed ({e.http_status or type(e).__name__}), "
+                    f"retrying in {delay:.1f}s (attempt {attempt + 1} of {self.max_retries})."
+                )
+                time.sleep(delay)
+
+    def stats(self):
+        """
+        Returns the scheduler counters.
+
+        Returns:
+            dict: The number of admitted requests, their estimated tokens, retries, failed calls and
+                  the total number of seconds calls waited for the quota.
+        """
+        with self._state_lock:
+            return {
+                "requests": self.requests,
+                "estimated_tokens": self.tokens,
+                "retries": self.retries,
+                "failures": self.failures,
+                "wait_seconds": round(self.wait_seconds, 3)
+            }
+
+    def _refill(self, now):
+        """
+        Adds the quota accrued since the last refill to both buckets. Must be called with the state lock held.
+
+        Args:
+            now (float): The current time.monotonic() value.
+        """
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._available_requests = min(
+            self.request_capacity, self._available_requests + elapsed * self.requests_per_second
+        )
+        self._available_tokens = min(
+            self.token_capacity, self._available_tokens + elapsed * self.tokens_per_second
+        )
+
+    def _retry_delay(self, error, attempt):
+        """
+        Returns the delay before retrying a failed call.
+
+        The Retry-After time of the response is used when present, with a little jitter so the
+        waiting calls do not all retry at the same instant. Otherwise the delay is drawn uniformly
+        between zero and the exponential backoff of the attempt ("full jitter").
+
+        Args:
+            error (openai.error.OpenAIError): The error of the failed call.
+            attempt (int): The zero-based number of the failed attempt.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        retry_after = self._retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max_seconds) + random.uniform(0, self.backoff_base_seconds)
+        return random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** attempt))
+
+    @staticmethod
+    def _retry_after(error):
+        """
+        Reads the retry delay requested by the service from the response headers.
+
+        Args:
+            error (openai.error.OpenAIError): The error of the failed call.
+
+        Returns:
+            float or None: The delay in seconds, or None if the response did not specify one.
+        """
+        headers = {key.lower(): value for key, value in (error.headers or {}).items()}
+        try:
+            if "retry-after-ms" in headers:
+                return float(headers["retry-after-ms"]) / 1000
+            if "retry-after" in headers:
+                return float(headers["retry-after"])
+        except ValueError:
+            pass
+        return None
+
+    @staticmethod
+    def _is_retryable(error):
+        """
+        Returns whether a failed call may succeed when it is sent again.
+
+        Args:
+            error (openai.error.OpenAIError): The error of the failed call.
+
+        Returns:
+            bool: True for rate limits (429), server errors (5xx), timeouts and connection errors.
+        """
+        if isinstance(error, (openai.error.RateLimitError, openai.error.ServiceUnavailableError,
+                              openai.error.Timeout, openai.error.APIConnectionError, openai.error.TryAgain)):
+            return True
+        status = error.http_status
+        return isinstance(error, openai.error.APIError) and (status is None or status == 429 or status >= 500)
+
+
+def estimate_chat_tokens(messages, max_tokens):
+    """
+    Estimates the tokens a chat completion counts against the TPM quota.
+
+    Azure OpenAI counts the prompt tokens plus the requested max_tokens when it admits a request.
+
+    Args:
+        messages (list): The chat messages of the request.
+        max_tokens (int): The max_tokens value of the request.
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    # Every message adds a few formatting tokens on top of its content, and the reply is primed with 3
+    prompt_tokens = sum(len(config.encoding.encode(message["content"])) + 4 for message in messages) + 3
+    return prompt_tokens + max_tokens
+
+
+def estimate_embedding_tokens(texts):
+    """
+    Estimates the tokens an embedding request counts against the TPM quota.
+
+    Args:
+        texts (list of str): The inputs of the request.
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    return sum(len(config.embedding_encoding.encode(text)) for text in texts)
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(deployment):
+    """
+    Returns the process-wide scheduler of a deployment, creating it on first use.
+
+    Args:
+        deployment (str): "embedding" or "chat".
+
+    Returns:
+        RateLimiter: The shared scheduler of the deployment.
+    """
+    with _rate_limiters_lock:
+        if deployment not in _rate_limiters:
+            rate_limit_config = config.OPENAI_RATE_LIMIT_CONFIG
+            _rate_limiters[deployment] = RateLimiter(
+                deployment,
+                rate_limit_config[f"{deployment}_requests_per_minute"],
+                rate_limit_config[f"{deployment}_tokens_per_minute"],
+                rate_limit_config["max_retries"],
+                rate_limit_config["backoff_base_seconds"],
+                rate_limit_config["backoff_max_seconds"]
+            )
+        return _rate_limiters[deployment]
+
+
+def rate_limiter_stats():
+    """
+    Returns the counters of every scheduler created so far.
+
+    Returns:
+        dict: The stats of each scheduler keyed by deployment.
+    """
+    with _rate_limiters_lock:
+        return {deployment: rate_limiter.stats() for deployment, rate_limiter in _rate_limiters.items()}
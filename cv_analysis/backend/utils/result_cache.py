@@ -0,0 +1,279 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import numpy as np
+import config
+
+
+class ResultCache:
+    """
+    A persistent cache for CV rankings backed by SQLite.
+
+    Rankings are stored per job description and corpus version. A lookup first tries the exact
+    job description (whitespace-normalized text hash) and then falls back to a near-duplicate
+    search over the cached job embeddings of the same corpus version, so small wording changes
+    still hit the cache. The corpus version identifies the set of ranked CVs: a hash of the CV
+    contents for uploaded CV sets, or a counter for the persistent CV corpus that is increased
+    whenever CVs are added or removed, which invalidates its cached rankings. Both also include the
+    ranking settings, so changing them does not serve rankings computed with the old settings.
+    """
+
+    def __init__(self, db_path, max_entries, similarity_threshold):
+        """
+        Initializes the ResultCache and creates the SQLite tables if needed.
+
+        Args:
+            db_path (str): The path of the SQLite database file.
+            max_entries (int): The maximum number of rankings kept in the cache.
+            similarity_threshold (float): The minimum cosine similarity between two job embeddings
+                for a cached ranking to be reused.
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, "
+            "scope TEXT NOT NULL, "
+            "corpus_version TEXT NOT NULL, "
+            "top_k INTEGER NOT NULL, "
+            "job_embedding BLOB NOT NULL, "
+            "results TEXT NOT NULL, "
+            "last_access REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_results_corpus_version ON results (corpus_version)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS corpus_versions (scope TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+        )
+        self._connection.commit()
+
+    @staticmethod
+    def make_key(job_description, corpus_version, top_k):
+        """
+        Builds the cache key for a job description, corpus version and result count.
+
+        Args:
+            job_description (str): The text of the job description.
+            corpus_version (str): The version of the ranked CV set (see upload_version and get_corpus_version).
+            top_k (int): The number of ranked CVs.
+
+        Returns:
+            str: The hexadecimal SHA-256 digest used as the cache key.
+        """
+        normalized_text = " ".join(job_description.split())
+        return hashlib.sha256(f"{corpus_version}\x00{top_k}\x00{normalized_text}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def settings_version():
+        """
+        Returns the part of the corpus version that depends on the ranking settings.
+
+        Rankings produced with another search backend, CV extraction mode or chunk pooling are
+        not reused.
+
+        Returns:
+            str: The settings version.
+        """
+        return f"{config.SEARCH_BACKEND}/{config.CV_EXTRACTION_MODE}/{config.CV_CHUNKING_CONFIG['pooling']}"
+
+    @staticmethod
+    def upload_version(cv_files, block_size=1024 * 1024):
+        """
+        Builds the corpus version of a set of uploaded CVs.
+
+        The version only depends on the CV contents and the ranking settings, not on the order or
+        filenames of the CVs. The files are hashed block by block and rewound afterwards, so they
+        are never loaded into memory as a whole.
+
+        Args:
+            cv_files (iterable of file-like objects): The binary PDF stream of every uploaded CV.
+            block_size (int): The number of bytes read at a time.
+
+        Returns:
+            str: The corpus version.
+        """
+        content_hashes = []
+        for cv_file in cv_files:
+            content_hash = hashlib.sha256()
+            cv_file.seek(0)
+            for block in iter(lambda: cv_file.read(block_size), b""):
+                content_hash.update(block)
+            cv_file.seek(0)
+            content_hashes.append(content_hash.hexdigest())
+        uploads_hash = hashlib.sha256("\n".join(sorted(content_hashes)).encode("utf-8")).hexdigest()
+        return f"uploads:{uploads_hash}:{ResultCache.settings_version()}"
+
+    def get_corpus_version(self, scope):
+        """
+        Returns the current version of a persistent CV collection.
+
+        Args:
+            scope (str): The name of the CV collection, e.g. "corpus".
+
+        Returns:
+            str: The corpus version, which also depends on the ranking settings.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT version FROM corpus_versions WHERE scope = ?", (scope,)
+            ).fetchone()
+        return f"{scope}:{row[0] if row else 0}:{self.settings_version()}"
+
+    def bump_corpus_version(self, scope):
+        """
+        Increases the version of a persistent CV collection and drops its cached rankings.
+
+        Args:
+            scope (str): The name of the CV collection, e.g. "corpus".
+        """
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO corpus_versions (scope, version) VALUES (?, 1) "
+                "ON CONFLICT(scope) DO UPDATE SET version = version + 1",
+                (scope,)
+            )
+            self._connection.execute("DELETE FROM results WHERE scope = ?", (scope,))
+            self._connection.commit()
+
+    def get(self, key):
+        """
+        Retrieves the ranking cached for an exact job description.
+
+        Args:
+            key (str): The cache key built by make_key.
+
+        Returns:
+            list or None: The cached ranking, or None on a cache miss.
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT results FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._connection.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._connection.commit()
+            self.exact_hits += 1
+        return json.loads(row[0])
+
+    def find_similar(self, job_embedding, corpus_version, top_k):
+        """
+        Retrieves the ranking cached for the most similar job description of the same corpus version.
+
+        Args:
+            job_embedding (list): The embedding vector of the job description.
+            corpus_version (str): The version of the ranked CV set.
+            top_k (int): The number of ranked CVs.
+
+        Returns:
+            list or None: The cached ranking if the cosine similarity between the job embeddings reaches
+                          the similarity threshold, otherwise None.
+        """
+        query = np.asarray(job_embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT key, job_embedding FROM results WHERE corpus_version = ? AND top_k = ?",
+                (corpus_version, top_k)
+            ).fetchall()
+            if rows:
+                embeddings = np.frombuffer(b"".join(row[1] for row in rows), dtype=np.float32).reshape(len(rows), -1)
+                similarities = embeddings @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    key = rows[best][0]
+                    result = self._connection.execute("SELECT results FROM results WHERE key = ?", (key,)).fetchone()
+                    self._connection.execute(
+                        "UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key)
+                    )
+                    self._connection.commit()
+                    self.similar_hits += 1
+                    return json.loads(result[0])
+            self.misses += 1
+        return None
+
+    def put(self, key, corpus_version, top_k, job_embedding, results):
+        """
+        Stores a ranking and evicts the least recently used rankings beyond the size cap.
+
+        Args:
+            key (str): The cache key built by make_key.
+            corpus_version (str): The version of the ranked CV set.
+            top_k (int): The number of ranked CVs requested.
+            job_embedding (list): The embedding vector of the job description.
+            results (list): The ranking to cache.
+        """
+        vector = np.asarray(job_embedding, dtype=np.float32)
+        vector /= np.linalg.norm(vector) or 1.0
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO results "
+                "(key, scope, corpus_version, top_k, job_embedding, results, last_access) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    corpus_version.split(":", 1)[0],
+                    corpus_version,
+                    top_k,
+                    vector.tobytes(),
+                    json.dumps(results),
+                    time.time()
+                )
+            )
+            self._connection.execute(
+                "DELETE FROM results WHERE key IN "
+                "(SELECT key FROM results ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._connection.commit()
+
+    def stats(self):
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict: The number of exact and near-duplicate hits, misses and stored rankings, and the hit rate.
+        """
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            hits = self.exact_hits + self.similar_hits
+            lookups = hits + self.misses
+            return {
+                "exact_hits": self.exact_hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "hit_rate": hits / lookups if lookups else 0.0
+            }
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """
+    Returns the process-wide result cache, creating it on first use.
+
+    Returns:
+        ResultCache or None: The shared cache, or None if caching is disabled in the configuration.
+    """
+    global _result_cache
+    if not config.RESULT_CACHE_CONFIG["enabled"]:
+        return None
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = ResultCache(
+                config.RESULT_CACHE_CONFIG["path"],
+                config.RESULT_CACHE_CONFIG["max_entries"],
+                config.RESULT_CACHE_CONFIG["similarity_threshold"]
+            )
+    return _result_cache
@@ -1,6 +1,7 @@
-from azure.search.documents import SearchClient
-from azure.search.documents.models import VectorizedQuery
-from azure.core.credentials import AzureKeyCredential
+from azure.search.documents.models import VectorizedQuery, VectorFilterMode
+import json
+from utils.clients import get_search_client
+from utils.metrics import track_stage
 import config
 
 
@@ -12,57 +13,81 @@ class AISearcher:
     functionality to search for the most similar CVs based on a provided job embedding vector.
     """
 
-    def __init__(self):
+    def __init__(self, index_name=None):
         """
-        Initializes the AISearcher by setting up the Azure SearchClient.
+        Initializes the AISearcher with the shared Azure SearchClient of the index.
 
         The SearchClient is configured using the endpoint, index name, and API key provided
-        in the configuration.
+        in the configuration, and reuses the process-wide keep-alive connection pool.
+
+        Args:
+            index_name (str, optional): The search index to query. Defaults to the per-request index
+                configured in config.COGNITIVE_SEARCH_CONFIG["index_name"].
         """
-        self.search_client = SearchClient(
-            endpoint=config.COGNITIVE_SEARCH_CONFIG["endpoint"],
-            index_name=config.COGNITIVE_SEARCH_CONFIG["index_name"],
-            credential=AzureKeyCredential(config.COGNITIVE_SEARCH_CONFIG["api_key"])
-        )
+        self.search_client = get_search_client(index_name or config.COGNITIVE_SEARCH_CONFIG["index_name"])
 
-    def search_similar_cv(self, job_embedding, top_k=10):
+    def search_similar_cv(self, job_embedding, top_k=10, batch_id=None):
         """
         Searches for the most similar CVs based on the provided job embedding.
 
         This method performs a vector search against the "cv_vector" field in the Azure Cognitive Search index.
-        It retrieves the top_k CVs that are closest to the provided job embedding vector.
+        It retrieves the top_k CVs that are closest to the provided job embedding vector. With "max" chunk
+        pooling, several documents can belong to one CV, so more neighbours are requested and the results
+        are collapsed to the best scoring document per CV.
+
+        When a batch id is given, only the documents of that request are searched. The filter is applied
+        before the vector search, so the top_k results are never crowded out by other requests' documents.
 
         Args:
             job_embedding (list): The embedding vector for the job description.
             top_k (int, optional): The number of top similar CVs to return. Defaults to 3.
+            batch_id (str, optional): The batch id of the documents to search (see Indexer).
 
         Returns:
             list: A list of dictionaries, each containing the CV name, contact information, and similarity score.
+                  Structured contact information stored as JSON is returned as a dictionary.
                   Returns an empty list if an error occurs during the search.
         """
         try:
+            k_nearest_neighbors = top_k
+            if config.CV_CHUNKING_CONFIG["pooling"] == "max":
+                k_nearest_neighbors = top_k * config.CV_CHUNKING_CONFIG["search_oversample"]
+
             # Create a VectorizedQuery to search for similar vectors in the "cv_vector" field
             vector_query = VectorizedQuery(
                 vector=job_embedding,
-                k_nearest_neighbors=top_k,
+                k_nearest_neighbors=k_nearest_neighbors,
                 fields="cv_vector",
                 exhaustive=True  # Set to True for exact nearest neighbor search
             )
 
-            # Perform the search on the indexed CV vectors
-            search_results = self.search_client.search(
-                search_text="*",  # Wildcard to include all documents, prioritize vector search
-                vector_queries=[vector_query],
-                select=["cv_name", "contact_info"],  # Include contact_info in the results
-                top=top_k
-            )
+            # Perform the search on the indexed CV vectors; the results are fetched lazily, so they are
+            # read inside the timed block
+            with track_stage("search", service="search"):
+                search_results = list(self.search_client.search(
+                    search_text="*",  # Wildcard to include all documents, prioritize vector search
+                    vector_queries=[vector_query],
+                    filter=f"batch_id eq '{batch_id}'" if batch_id else None,  # Restrict the search to one request
+                    vector_filter_mode=VectorFilterMode.PRE_FILTER,
+                    select=["cv_id", "cv_name", "contact_info"],  # Include contact_info in the results
+                    top=k_nearest_neighbors
+                ))
 
             # Process the search results and compile the top CVs with their similarity scores and contact information
             results = []
+            seen_cv_ids = set()
             for result in search_results:
+                # Results arrive best first, so the first document of a CV carries its max-sim score
+                cv_id = result.get("cv_id") or result["cv_name"]
+                if cv_id in seen_cv_ids:
+                    continue
+                seen_cv_ids.add(cv_id)
+                if len(results) == top_k:
+                    break
                 results.append({
+                    "cv_id": cv_id,
                     "cv_name": result["cv_name"],
-                    "contact_info": result.get("contact_info", "N/A"),  # Default to "N/A" if contact_info is missing
+                    "contact_info": self._decode_contact_info(result.get("contact_info")),
                     "similarity_score": result["@search.score"]  # Retrieve the similarity score from the search metadata
                 })
 
@@ -72,3 +97,24 @@ class AISearcher:
             # Log any exceptions that occur during the search process
             config.app_logger.error(f"Error during search for similar CVs: {str(e)}")
             return []
+
+    @staticmethod
+    def _decode_contact_info(contact_info):
+        """
+        Decodes the contact information stored in the index.
+
+        Args:
+            contact_info (str or None): The "contact_info" field of a search result.
+
+        Returns:
+            dict or str: The structured contact fields if the field holds a JSON object, the stored
+                         text for legacy free-text contact information, or "N/A" if it is missing.
+        """
+        if not contact_info:
+            return "N/A"
+        if contact_info.startswith("{"):
+            try:
+                return json.loads(contact_info)
+            except ValueError:
+                pass
+        return contact_info
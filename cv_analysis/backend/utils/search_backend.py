@@ -0,0 +1,111 @@
+from utils.indexer import Indexer
+from utils.local_search import LocalSearcher
+from utils.search import AISearcher
+import uuid
+import numpy as np
+import config
+
+
+def rank_cvs(cv_embeddings, job_embedding, top_k=10):
+    """
+    Ranks CV embeddings against a job embedding using the configured search backend.
+
+    With the "azure" backend the CVs are ingested into the shared Azure Cognitive Search index under a
+    new batch id, searched with a filter on that batch id and then removed by deleting only that batch,
+    so concurrent requests never see or delete each other's documents. With the "local" backend the CVs
+    are ranked in-process by the LocalSearcher without any network round trips. Both backends return
+    results in the same format.
+
+    Args:
+        cv_embeddings (dict): A dictionary containing CV embeddings keyed by CV name or upload id.
+        job_embedding (list): The embedding vector for the job description.
+        top_k (int, optional): The number of top similar CVs to return. Defaults to 10.
+
+    Returns:
+        list: A list of dictionaries, each containing the CV name, contact information, and similarity score.
+
+    Raises:
+        ValueError: If config.SEARCH_BACKEND is not a supported backend name.
+    """
+    if config.SEARCH_BACKEND == "local":
+        local_searcher = LocalSearcher(cv_embeddings)
+        local_searcher.ingest_embeddings()
+        return local_searcher.search_similar_cv(job_embedding, top_k=top_k)
+
+    if config.SEARCH_BACKEND == "azure":
+        # Ingest the CV embeddings into Azure Cognitive Search under a batch id unique to this request
+        batch_id = uuid.uuid4().hex
+        indexer = Indexer(cv_embeddings, batch_id=batch_id)
+        try:
+            indexer.ingest_embeddings()
+            config.app_logger.info(f"Embeddings ingested into the indexer with batch id {batch_id}")
+
+            # Initialize the AISearcher and search this request's CVs based on the job embedding
+            ai_searcher = AISearcher()
+            return ai_searcher.search_similar_cv(job_embedding, top_k=top_k, batch_id=batch_id)
+        finally:
+            # Delete only this request's documents to clean up the search index
+            indexer.delete_batch()
+            config.app_logger.info("Indexed data deleted.")
+
+    raise ValueError(f"Unsupported search backend: {config.SEARCH_BACKEND}")
+
+
+def match_jobs(cv_embeddings, job_embeddings, top_k=10, jobs_per_cv=0):
+    """
+    Ranks one set of CV embeddings against several job embeddings at once.
+
+    The (jobs, CVs) similarity matrix is computed in-process by the LocalSearcher in a single matrix
+    product, whatever config.SEARCH_BACKEND is: the CV embeddings are already in memory, and one Azure
+    Cognitive Search query per job would only add network round trips. Scores use the same
+    1 / (2 - cosine_similarity) scale as rank_cvs.
+
+    Args:
+        cv_embeddings (dict): A dictionary containing CV embeddings keyed by CV name or upload id.
+        job_embeddings (list): The embedding vectors of the job descriptions. None entries (jobs that
+            could not be embedded) get an empty ranking and are never among the best jobs of a CV.
+        top_k (int, optional): The number of top similar CVs to return per job, at least 1. Defaults to 10.
+        jobs_per_cv (int, optional): The number of best-fitting jobs to return per CV, 0 to skip them.
+            Defaults to 0.
+
+    Returns:
+        tuple: One ranking per job, in the format of rank_cvs, and one entry per CV with its id, name
+               and its best jobs as (job index, similarity score) dictionaries, best first (an empty
+               list if jobs_per_cv is 0).
+
+    Raises:
+        ValueError: If top_k is below 1 or jobs_per_cv is negative.
+    """
+    if top_k < 1:
+        raise ValueError(f"top_k must be at least 1, got {top_k}.")
+    if jobs_per_cv < 0:
+        raise ValueError(f"jobs_per_cv must not be negative, got {jobs_per_cv}.")
+    local_searcher = LocalSearcher(cv_embeddings)
+    local_searcher.ingest_embeddings()
+    job_indices = [index for index, job_embedding in enumerate(job_embeddings) if job_embedding is not None]
+    job_rankings = [[] for _ in job_embeddings]
+    if not job_indices or not local_searcher.cv_ids:
+        return job_rankings, []
+
+    similarities = local_searcher.similarity_matrix([job_embeddings[index] for index in job_indices])
+    for index, ranking in zip(job_indices, local_searcher.rank_similarities(similarities, top_k)):
+        job_rankings[index] = ranking
+
+    cv_rankings = []
+    if jobs_per_cv > 0:
+        k = min(jobs_per_cv, len(job_indices))
+        # Select the best jobs of every CV column, best first
+        top_jobs = np.argsort(-similarities, axis=0, kind="stable")[:k].T
+        for position, cv_id in enumerate(local_searcher.cv_ids):
+            cv_rankings.append({
+                "cv_id": cv_id,
+                "cv_name": local_searcher.cv_names[position],
+                "best_jobs": [
+                    {
+                        "job_index": job_indices[job],
+                        "similarity_score": float(1.0 / (2.0 - similarities[job, position]))
+                    }
+                    for job in top_jobs[position]
+                ]
+            })
+    return job_rankings, cv_rankings
@@ -11,3 +11,12 @@ Here’s how you should structure the description:
 
 The entire description should maintain a professional, engaging tone, written in full paragraphs. Avoid using bullet points or overly technical language. Make sure the content flows naturally and presents the company and role in the best light possible.
 """
+
+SYSTEM_MESSAGES_CV_EXTRACTION = """
+You receive the raw text extracted from a CV PDF. Return a single JSON object and nothing else, with exactly these keys:
+
+- "cleaned_text": the meaningful CV content (summary, experience, education, skills, languages, certificates) as clean, readable text. Fix broken lines and extraction artifacts, and leave out the candidate's email address, phone number and postal address.
+- "contact_info": an object with the keys "email", "phone" and "address", each holding the value found in the CV as a string, or null if it is not present.
+
+Do not wrap the JSON in Markdown code fences and do not add any commentary.
+"""
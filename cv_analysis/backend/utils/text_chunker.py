@@ -0,0 +1,58 @@
+import config
+
+
+def count_tokens(text, encoding=None):
+    """
+    Counts the tokens of a text with a tiktoken encoding.
+
+    Args:
+        text (str): The text to count.
+        encoding (tiktoken.Encoding, optional): The encoding of the model the text is sent to.
+            Defaults to config.encoding, the chat model's encoding.
+
+    Returns:
+        int: The number of tokens in the text.
+    """
+    return len((encoding or config.encoding).encode(text))
+
+
+def chunk_text(text, max_tokens, encoding=None):
+    """
+    Splits a text into chunks of at most `max_tokens` tokens.
+
+    Lines are packed into chunks whole, so chunk boundaries fall between lines where possible.
+    A single line longer than the budget is split at token boundaries.
+
+    Args:
+        text (str): The text to split.
+        max_tokens (int): The maximum number of tokens per chunk, counted with `encoding`.
+        encoding (tiktoken.Encoding, optional): The encoding of the model the chunks are sent to.
+            Defaults to config.encoding, the chat model's encoding.
+
+    Returns:
+        list of str: The chunks in their original order. A text within the budget is returned
+                     as a single chunk.
+    """
+    encoding = encoding or config.encoding
+    if count_tokens(text, encoding) <= max_tokens:
+        return [text]
+
+    chunks = []
+    chunk_lines, chunk_tokens = [], 0
+    for line in text.splitlines(keepends=True):
+        line_tokens = encoding.encode(line)
+        if len(line_tokens) > max_tokens:
+            if chunk_lines:
+                chunks.append(''.join(chunk_lines))
+                chunk_lines, chunk_tokens = [], 0
+            for start in range(0, len(line_tokens), max_tokens):
+                chunks.append(encoding.decode(line_tokens[start:start + max_tokens]))
+            continue
+        if chunk_tokens + len(line_tokens) > max_tokens:
+            chunks.append(''.join(chunk_lines))
+            chunk_lines, chunk_tokens = [], 0
+        chunk_lines.append(line)
+        chunk_tokens += len(line_tokens)
+    if chunk_lines:
+        chunks.append(''.join(chunk_lines))
+    return chunks
@@ -0,0 +1,228 @@
+import contextvars
+import json
+import threading
+from contextlib import contextmanager
+from starlette.datastructures import MutableHeaders
+import config
+from utils.metrics import LLM_COST, LLM_TOKENS
+
+_current_usage = contextvars.ContextVar("token_usage", default=None)
+
+
+class TokenUsage:
+    """
+    Accumulates the tokens used by the OpenAI calls of one request or job, per pipeline stage.
+
+    Token counts come from the "usage" field of the API responses; calls whose response has no usage
+    are estimated with config.encoding and counted as estimated. The cost is derived from the per-1K
+    token prices in config.TOKEN_USAGE_CONFIG and only reported when a price is configured.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty TokenUsage.
+        """
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, prompt_tokens, completion_tokens, estimated):
+        """
+        Adds the tokens of one API call.
+
+        Args:
+            stage (str): The pipeline stage of the call, e.g. "gpt_cleaning" or "embedding".
+            prompt_tokens (int): The prompt (input) tokens.
+            completion_tokens (int): The completion (output) tokens.
+            estimated (bool): Whether the counts were estimated instead of reported by the API.
+        """
+        with self._lock:
+            totals = self.stages.setdefault(stage, {
+                "calls": 0, "estimated_calls": 0, "prompt_tokens": 0, "completion_tokens": 0
+            })
+            totals["calls"] += 1
+            totals["estimated_calls"] += int(estimated)
+            totals["prompt_tokens"] += prompt_tokens
+            totals["completion_tokens"] += completion_tokens
+
+    @property
+    def calls(self):
+        """
+        int: The number of recorded API calls.
+        """
+        with self._lock:
+            return sum(totals["calls"] for totals in self.stages.values())
+
+    def summary(self):
+        """
+        Returns the token totals of the request and of each stage.
+
+        Returns:
+            dict: The number of calls, estimated calls, prompt, completion and total tokens (and the
+                  cost in USD if prices are configured), overall and under "stages" per stage.
+        """
+        with self._lock:
+            stages = {stage: self._with_totals(stage, dict(totals)) for stage, totals in self.stages.items()}
+        overall = {"calls": 0, "estimated_calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        for totals in stages.values():
+            for key in overall:
+                overall[key] += totals[key]
+        overall["total_tokens"] = overall["prompt_tokens"] + overall["completion_tokens"]
+        if _is_priced():
+            overall["cost_usd"] = round(sum(totals["cost_usd"] for totals in stages.values()), 6)
+        overall["stages"] = stages
+        return overall
+
+    @staticmethod
+    def _with_totals(stage, totals):
+        totals["total_tokens"] = totals["prompt_tokens"] + totals["completion_tokens"]
+        if _is_priced():
+            totals["cost_usd"] = round(estimate_cost(stage, totals["prompt_tokens"], totals["completion_tokens"]), 6)
+        return totals
+
+
+def _is_priced():
+    return any(
+        config.TOKEN_USAGE_CONFIG[price] for price in
+        ("chat_prompt_price_per_1k", "chat_completion_price_per_1k", "embedding_price_per_1k")
+    )
+
+
+def estimate_cost(stage, prompt_tokens, completion_tokens):
+    """
+    Estimates the cost of tokens with the prices in config.TOKEN_USAGE_CONFIG.
+
+    Args:
+        stage (str): The pipeline stage; "embedding" is priced as embedding tokens, every other stage as chat.
+        prompt_tokens (int): The prompt tokens.
+        completion_tokens (int): The completion tokens.
+
+    Returns:
+        float: The cost in USD.
+    """
+    prices = config.TOKEN_USAGE_CONFIG
+    if stage == "embedding":
+        return prompt_tokens * prices["embedding_price_per_1k"] / 1000
+    return (prompt_tokens * prices["chat_prompt_price_per_1k"]
+            + completion_tokens * prices["chat_completion_price_per_1k"]) / 1000
+
+
+def current_usage():
+    """
+    Returns the TokenUsage of the current request or job.
+
+    Returns:
+        TokenUsage or None: The active TokenUsage, or None outside of track_usage.
+    """
+    return _current_usage.get()
+
+
+@contextmanager
+def track_usage():
+    """
+    Collects the tokens of all OpenAI calls made within the block, including calls made on threads
+    started with bind_usage or asyncio.to_thread.
+
+    Yields:
+        TokenUsage: The usage of the block.
+    """
+    usage = TokenUsage()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+def bind_usage(function):
+    """
+    Binds a function to the current TokenUsage, so calls on executor or plain threads are counted.
+
+    Thread pools do not inherit context variables from the submitting thread, unlike asyncio.to_thread.
+
+    Args:
+        function (callable): The function run on another thread.
+
+    Returns:
+        callable: The wrapped function.
+    """
+    usage = _current_usage.get()
+
+    def bound(*args, **kwargs):
+        token = _current_usage.set(usage)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _current_usage.reset(token)
+
+    return bound
+
+
+def record_usage(stage, response_usage, estimate_prompt_tokens, completion_text=None):
+    """
+    Records the tokens of one API call in the current TokenUsage and in the token metrics.
+
+    Args:
+        stage (str): The pipeline stage of the call.
+        response_usage (dict or None): The "usage" field of the API response.
+        estimate_prompt_tokens (callable): Returns the estimated prompt tokens if the response has no usage.
+        completion_text (str, optional): The completion, estimated if the response has no usage.
+    """
+    if response_usage:
+        prompt_tokens = response_usage.get("prompt_tokens", 0)
+        completion_tokens = response_usage.get("completion_tokens", 0)
+        estimated = False
+    else:
+        prompt_tokens = estimate_prompt_tokens()
+        completion_tokens = len(config.encoding.encode(completion_text)) if completion_text else 0
+        estimated = True
+
+    LLM_TOKENS.labels(stage, "prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels(stage, "completion").inc(completion_tokens)
+    LLM_COST.labels(stage).inc(estimate_cost(stage, prompt_tokens, completion_tokens))
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.record(stage, prompt_tokens, completion_tokens, estimated)
+
+
+class TokenUsageMiddleware:
+    """
+    ASGI middleware that tracks the token usage of every HTTP request.
+
+    When config.TOKEN_USAGE_CONFIG["response_header"] is enabled, the usage summary is returned as
+    compact JSON in the configured header of responses that used any tokens. Streaming responses start
+    before their work is done, so they report the usage in their final event instead.
+    """
+
+    def __init__(self, app):
+        """
+        Initializes the middleware.
+
+        Args:
+            app: The wrapped ASGI application.
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_usage() as usage:
+            async def send_with_usage(message):
+                if message["type"] == "http.response.start" and config.TOKEN_USAGE_CONFIG["response_header"]:
+                    headers = MutableHeaders(scope=message)
+                    # Only complete responses carry a content length; streaming responses are still running
+                    if "content-length" in headers and usage.calls:
+                        headers.append(
+                            config.TOKEN_USAGE_CONFIG["header_name"],
+                            json.dumps(usage.summary(), separators=(",", ":"))
+                        )
+                await send(message)
+
+            await self.app(scope, receive, send_with_usage)
+            if usage.calls:
+                summary = usage.summary()
+                config.app_logger.info(
+                    f"{scope['method']} {scope['path']} used {summary['total_tokens']} tokens "
+                    f"in {summary['calls']} OpenAI call(s)."
+                )
@@ -5,6 +5,7 @@
 # Local API'ler
 GENERATE_DESCRIPTION_API_URL = "http://127.0.0.1:8000/generate_job_description"
 FIND_CV_API_URL = "http://127.0.0.1:8001/find-best-cv"
+FIND_CV_STREAM_API_URL = "http://127.0.0.1:8001/find-best-cv/stream"
 
 
 # Logger ayarı (örnek)
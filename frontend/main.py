@@ -1,6 +1,6 @@
 import streamlit as st
 import requests
-from config import GENERATE_DESCRIPTION_API_URL, FIND_CV_API_URL, app_logger
+from config import GENERATE_DESCRIPTION_API_URL, FIND_CV_STREAM_API_URL, app_logger
 import base64
 import re  # Regular expressions module
 import pandas as pd
@@ -158,7 +158,9 @@ with tabs[0]:
 # -------------------- Contact Info Parsing Function --------------------
 def parse_contact_info(contact_info_str):
     """
-    contact_info string'ini parse eder ve standartlaştırılmış anahtarlarla bir sözlük döner.
+    contact_info değerini parse eder ve standartlaştırılmış anahtarlarla bir sözlük döner.
+    Backend yapılandırılmış alanlar (email, phone, address) döndürdüğünde doğrudan eşlenir,
+    eski serbest metin formatı için regex ile ayrıştırma yapılır.
     """
     contact_info = {
         'Telefon': 'Bilgi yok',
@@ -166,6 +168,13 @@ def parse_contact_info(contact_info_str):
         'Adres': 'Bilgi yok'
     }
 
+    # Yapılandırılmış iletişim bilgileri
+    if isinstance(contact_info_str, dict):
+        contact_info['Telefon'] = contact_info_str.get('phone') or 'Bilgi yok'
+        contact_info['E-posta'] = contact_info_str.get('email') or 'Bilgi yok'
+        contact_info['Adres'] = contact_info_str.get('address') or 'Bilgi yok'
+        return contact_info
+
     # Markdown ve gereksiz karakterleri temizle
     text = contact_info_str.replace('*', '').replace('-', '').replace('_', '').strip()
 
@@ -252,28 +261,48 @@ with tabs[1]:
 
             try:
                 status_text.text("CV'ler İşleniyor...")
-                total_pdfs = len(uploaded_pdfs)
-                progress_increment = 100 / (total_pdfs + 1)  # +1 API çağrısı için
-
-                # Her bir PDF'yi işleyerek ilerleme çubuğunu güncelle
-                for i, pdf in enumerate(uploaded_pdfs, 1):
-                    # Burada gerçek PDF işleme kodunuz olmalı
-                    # Örneğin, her PDF'yi sunucuya gönderip işliyorsanız, burada bekleme süresi olabilir
-                    # Bu örnekte, sadece simülasyon için time.sleep kullanıyoruz
-                    time.sleep(0.2)  # PDF işleme süresini simüle et
-                    progress_bar.progress(int(i * progress_increment))
-                    status_text.text(f"İşleniyor: {pdf.name}")
-
-                # API çağrısı için ilerlemeyi güncelle
-                progress_bar.progress(int((total_pdfs + 1) * progress_increment))
-                status_text.text("En uygun CV'ler aranıyor...")
+                provisional_results = st.empty()  # Geçici sıralama için boş bir yer ayır
+                stage_labels = {
+                    "parsed": "Okundu",
+                    "cleaned": "Temizlendi",
+                    "embedded": "Vektörleştirildi",
+                    "failed": "Atlandı"
+                }
+                response_data = {}
 
                 with st.spinner('En Uygun CV Aranıyor...'):
                     app_logger.info("En uygun CV'yi bulma isteği gönderiliyor")
-                    response = requests.post(FIND_CV_API_URL, data=data, files=files)
-                    app_logger.info(f"Cevap durumu: {response.status_code}")
-
-                    response_data = response.json()
+                    # Backend her CV aşaması ve ara sıralama için bir JSON satırı gönderir (NDJSON)
+                    with requests.post(FIND_CV_STREAM_API_URL, data=data, files=files, stream=True) as response:
+                        app_logger.info(f"Cevap durumu: {response.status_code}")
+                        total_pdfs = len(uploaded_pdfs)
+                        processed = 0
+                        # Hata durumunda gövde NDJSON değildir, olay akışı yalnızca 200 cevabında okunur
+                        if response.status_code == 200:
+                            for line in response.iter_lines(decode_unicode=True):
+                                if not line:
+                                    continue
+                                event = json.loads(line)
+                                if event["event"] == "started":
+                                    total_pdfs = event["total"] or total_pdfs
+                                elif event["event"] in stage_labels:
+                                    if event["event"] in ("embedded", "failed"):
+                                        processed += 1
+                                        progress_bar.progress(int(processed * 100 / (total_pdfs + 1)))
+                                    status_text.text(
+                                        f"{stage_labels[event['event']]}: {event['cv_name']} ({processed}/{total_pdfs})"
+                                    )
+                                elif event["event"] == "ranking" and event["provisional"]:
+                                    with provisional_results.container():
+                                        st.info(f"Ara sonuçlar ({event['processed']}/{event['total']} CV işlendi)")
+                                        for i, cv in enumerate(event["cv_list"][:5]):
+                                            st.write(f"{i + 1}. {cv['cv_name']} - %{round(cv['similarity_score'] * 100, 2)}")
+                                elif event["event"] == "ranking":
+                                    progress_bar.progress(100)
+                                    response_data = {"cv_list": event["cv_list"]}
+                                elif event["event"] == "error":
+                                    response_data = {"error": event["error"]}
+                provisional_results.empty()
 
                 if response.status_code == 200:
                     # En uygun CV'lerin listesi
@@ -22,6 +22,15 @@ openai.api_version = AZURE_OPENAI_CONFIG['api_version']
 
 encoding = tiktoken.encoding_for_model("gpt-4o")
 
+# Token accounting: optional response header with the per-request token usage, and the USD prices
+# per 1K tokens used to estimate cost (cost is only reported when a price is set)
+TOKEN_USAGE_CONFIG = {
+    'response_header': os.getenv('TOKEN_USAGE_HEADER_ENABLED', 'false').lower() == 'true',
+    'header_name': os.getenv('TOKEN_USAGE_HEADER_NAME', 'X-Token-Usage'),
+    'chat_prompt_price_per_1k': float(os.getenv('CHAT_PROMPT_PRICE_PER_1K', '0')),
+    'chat_completion_price_per_1k': float(os.getenv('CHAT_COMPLETION_PRICE_PER_1K', '0'))
+}
+
 PORT = "8000"
 HOST = "0.0.0.0"
 CONCURRENCY_LIMIT = 50
@@ -1,9 +1,12 @@
 from fastapi import FastAPI
+from fastapi.responses import Response
 from pydantic import BaseModel
 from description import JobDescriptionGenerator
+from utils.token_usage import TokenUsageMiddleware, render_metrics
 import config
 
 app = FastAPI()
+app.add_middleware(TokenUsageMiddleware)
 
 
 class JobDescriptionRequest(BaseModel):
@@ -55,6 +58,18 @@ def generate_job_description(request: JobDescriptionRequest):
     return {"job_description": job_description}
 
 
+@app.get("/metrics")
+def get_metrics():
+    """
+    Exposes the OpenAI token and estimated cost counters in the Prometheus text format.
+
+    Returns:
+        Response: The metrics payload.
+    """
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
+
 # Entry point to run the FastAPI application
 if __name__ == "__main__":
     import uvicorn
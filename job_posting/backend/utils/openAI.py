@@ -1,6 +1,7 @@
 import openai
 
 import config
+from utils.token_usage import record_usage
 
 
 class OpenAIClient:
@@ -9,16 +10,18 @@ class OpenAIClient:
 
     def compare_texts(self, input_text, system_message):
 
+        messages = [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": input_text}
+        ]
         try:
             response = openai.ChatCompletion.create(
                 engine=self.engine,
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": input_text}
-                ],
+                messages=messages,
                 max_tokens=3000
             )
             comparison_result = response['choices'][0]['message']['content']
+            record_usage(response.get('usage'), messages, comparison_result)
             return comparison_result
         except Exception as e:
             config.app_logger.error(f"Error comparing summaries: {str(e)}")
@@ -0,0 +1,186 @@
+import contextvars
+import json
+import threading
+from contextlib import contextmanager
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, generate_latest
+from starlette.datastructures import MutableHeaders
+import config
+
+LLM_TOKENS = Counter(
+    "job_posting_llm_tokens_total",
+    "Tokens used by Azure OpenAI calls, by kind (prompt or completion).",
+    ["kind"]
+)
+LLM_COST = Counter(
+    "job_posting_llm_cost_usd_total",
+    "Estimated cost of Azure OpenAI calls in USD, from the prices in config.TOKEN_USAGE_CONFIG."
+)
+for _kind in ("prompt", "completion"):
+    LLM_TOKENS.labels(_kind)
+
+_current_usage = contextvars.ContextVar("token_usage", default=None)
+
+
+class TokenUsage:
+    """
+    Accumulates the tokens used by the OpenAI calls of one request.
+
+    Token counts come from the "usage" field of the API responses; calls whose response has no usage
+    are estimated with config.encoding and counted as estimated.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty TokenUsage.
+        """
+        self.calls = 0
+        self.estimated_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def record(self, prompt_tokens, completion_tokens, estimated):
+        """
+        Adds the tokens of one API call.
+
+        Args:
+            prompt_tokens (int): The prompt (input) tokens.
+            completion_tokens (int): The completion (output) tokens.
+            estimated (bool): Whether the counts were estimated instead of reported by the API.
+        """
+        with self._lock:
+            self.calls += 1
+            self.estimated_calls += int(estimated)
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    def summary(self):
+        """
+        Returns the token totals of the request.
+
+        Returns:
+            dict: The number of calls, estimated calls, prompt, completion and total tokens, and the
+                  cost in USD if prices are configured.
+        """
+        with self._lock:
+            summary = {
+                "calls": self.calls,
+                "estimated_calls": self.estimated_calls,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "total_tokens": self.prompt_tokens + self.completion_tokens
+            }
+        if config.TOKEN_USAGE_CONFIG["chat_prompt_price_per_1k"] or config.TOKEN_USAGE_CONFIG["chat_completion_price_per_1k"]:
+            summary["cost_usd"] = round(estimate_cost(summary["prompt_tokens"], summary["completion_tokens"]), 6)
+        return summary
+
+
+def estimate_cost(prompt_tokens, completion_tokens):
+    """
+    Estimates the cost of chat tokens with the prices in config.TOKEN_USAGE_CONFIG.
+
+    Args:
+        prompt_tokens (int): The prompt tokens.
+        completion_tokens (int): The completion tokens.
+
+    Returns:
+        float: The cost in USD.
+    """
+    prices = config.TOKEN_USAGE_CONFIG
+    return (prompt_tokens * prices["chat_prompt_price_per_1k"]
+            + completion_tokens * prices["chat_completion_price_per_1k"]) / 1000
+
+
+@contextmanager
+def track_usage():
+    """
+    Collects the tokens of all OpenAI calls made within the block, including calls made on threads
+    started with asyncio.to_thread or by FastAPI for sync endpoints.
+
+    Yields:
+        TokenUsage: The usage of the block.
+    """
+    usage = TokenUsage()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+def record_usage(response_usage, messages, completion_text=None):
+    """
+    Records the tokens of one chat completion in the current TokenUsage and in the token metrics.
+
+    Args:
+        response_usage (dict or None): The "usage" field of the API response.
+        messages (list): The chat messages of the request, estimated if the response has no usage.
+        completion_text (str, optional): The completion, estimated if the response has no usage.
+    """
+    if response_usage:
+        prompt_tokens = response_usage.get("prompt_tokens", 0)
+        completion_tokens = response_usage.get("completion_tokens", 0)
+        estimated = False
+    else:
+        # Every message adds a few formatting tokens on top of its content, and the reply is primed with 3
+        prompt_tokens = sum(len(config.encoding.encode(message["content"])) + 4 for message in messages) + 3
+        completion_tokens = len(config.encoding.encode(completion_text)) if completion_text else 0
+        estimated = True
+
+    LLM_TOKENS.labels("prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels("completion").inc(completion_tokens)
+    LLM_COST.inc(estimate_cost(prompt_tokens, completion_tokens))
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.record(prompt_tokens, completion_tokens, estimated)
+
+
+def render_metrics():
+    """
+    Renders all metrics in the Prometheus text exposition format.
+
+    Returns:
+        tuple: The metrics payload (bytes) and its content type.
+    """
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class TokenUsageMiddleware:
+    """
+    ASGI middleware that tracks the token usage of every HTTP request.
+
+    When config.TOKEN_USAGE_CONFIG["response_header"] is enabled, the usage summary is returned as
+    compact JSON in the configured header of responses that used any tokens.
+    """
+
+    def __init__(self, app):
+        """
+        Initializes the middleware.
+
+        Args:
+            app: The wrapped ASGI application.
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_usage() as usage:
+            async def send_with_usage(message):
+                if (message["type"] == "http.response.start" and config.TOKEN_USAGE_CONFIG["response_header"]
+                        and usage.calls):
+                    MutableHeaders(scope=message).append(
+                        config.TOKEN_USAGE_CONFIG["header_name"],
+                        json.dumps(usage.summary(), separators=(",", ":"))
+                    )
+                await send(message)
+
+            await self.app(scope, receive, send_with_usage)
+            if usage.calls:
+                summary = usage.summary()
+                config.app_logger.info(
+                    f"{scope['method']} {scope['path']} used {summary['total_tokens']} tokens "
+                    f"in {summary['calls']} OpenAI call(s)."
+                )